@@ -64,6 +64,20 @@ def create_app(config_class=Config):
             except Exception as e:
                 app.logger.warning(f"Event Listener başlatılamadı: {e}")
 
+            # IPFS outbox (IPFS'e yazılamamış template/metadata yüklemeleri)
+            try:
+                from backend.infra.ipfs_outbox import start_ipfs_outbox
+                start_ipfs_outbox()
+            except Exception as e:
+                app.logger.warning(f"IPFS outbox başlatılamadı: {e}")
+
+            # Transfer pipeline (önceki process'te yarım kalan transferler)
+            try:
+                from backend.infra.transfer_pipeline import start_transfer_pipeline
+                start_transfer_pipeline()
+            except Exception as e:
+                app.logger.warning(f"Transfer pipeline başlatılamadı: {e}")
+
             # Scheduler başlat
             from backend.infra.scheduler import start_scheduler
             start_scheduler(app)
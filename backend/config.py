@@ -28,10 +28,24 @@ class Config:
 
     # IPFS
     IPFS_API_URL = os.getenv('IPFS_API_URL', 'http://localhost:5001/api/v0')
+    IPFS_CACHE_MAX_BYTES = int(os.getenv('IPFS_CACHE_MAX_BYTES', 64 * 1024 * 1024))  # process içi CID LRU sınırı
+    IPFS_CACHE_REDIS_TTL = int(os.getenv('IPFS_CACHE_REDIS_TTL', 86400))  # Redis CID cache süresi (0: kapalı)
+    IPFS_HTTP_POOL_SIZE = int(os.getenv('IPFS_HTTP_POOL_SIZE', 16))  # keep-alive bağlantı havuzu
+    IPFS_UPLOAD_BATCH_SIZE = int(os.getenv('IPFS_UPLOAD_BATCH_SIZE', 32))  # arka plan yüklemede istek başına dosya
+    IPFS_ASYNC_UPLOAD = os.getenv('IPFS_ASYNC_UPLOAD', 'false').lower() == 'true'  # CID yerelde hesaplanır, yükleme arka planda
+    IPFS_OUTBOX_WORKERS = int(os.getenv('IPFS_OUTBOX_WORKERS', 2))  # bekleyen yüklemeleri boşaltan worker sayısı
+    IPFS_OUTBOX_BASE_DELAY = float(os.getenv('IPFS_OUTBOX_BASE_DELAY', 2))  # ilk tekrar denemesi (saniye, her hatada 2 katı)
+    IPFS_OUTBOX_MAX_DELAY = float(os.getenv('IPFS_OUTBOX_MAX_DELAY', 300))  # tekrar denemeleri arası üst sınır
+    IPFS_OUTBOX_POLL = float(os.getenv('IPFS_OUTBOX_POLL', 5))  # boş kuyrukta kontrol aralığı
 
     # Blockchain (Besu/ETH)
     BLOCKCHAIN_RPC_URL = os.getenv('BLOCKCHAIN_RPC_URL', 'http://localhost:8545')
+    BLOCKCHAIN_WS_URL = os.getenv('BLOCKCHAIN_WS_URL', '')  # ör. ws://localhost:8546 (eth_subscribe)
     MONEY_TOKEN_ADDRESS = os.getenv('MONEY_TOKEN_ADDRESS', '')  # DTL token contract
+    BLOCKCHAIN_GAS_PRICE_TTL = int(os.getenv('BLOCKCHAIN_GAS_PRICE_TTL', 15))  # saniye
+    BLOCKCHAIN_NONCE_RESYNC_INTERVAL = int(os.getenv('BLOCKCHAIN_NONCE_RESYNC_INTERVAL', 60))  # saniye
+    BLOCKCHAIN_HTTP_POOL_SIZE = int(os.getenv('BLOCKCHAIN_HTTP_POOL_SIZE', 20))  # keep-alive bağlantı sayısı
+    BLOCKCHAIN_RPC_BATCH_SIZE = int(os.getenv('BLOCKCHAIN_RPC_BATCH_SIZE', 100))  # JSON-RPC batch başına çağrı
 
     # Blockchain Private Keys (Development only - Besu genesis alloc keys)
     # WARNING: Never use these in production!
@@ -47,6 +61,17 @@ class Config:
     # Event Listener
     EVENT_LISTENER_INTERVAL = int(os.getenv('EVENT_LISTENER_INTERVAL', 30))  # saniye
     EVENT_LISTENER_ENABLED = os.getenv('EVENT_LISTENER_ENABLED', 'true').lower() == 'true'
+    EVENT_LISTENER_SOURCE = os.getenv('EVENT_LISTENER_SOURCE', 'auto').lower()  # auto | ws | filter | poll
+    EVENT_LISTENER_FILTER_POLL = float(os.getenv('EVENT_LISTENER_FILTER_POLL', 1.0))  # eth_getFilterChanges aralığı (saniye)
+    EVENT_LISTENER_RANGE = int(os.getenv('EVENT_LISTENER_RANGE', 10))  # başlangıç eth_getLogs aralığı (blok)
+    EVENT_LISTENER_MAX_RANGE = int(os.getenv('EVENT_LISTENER_MAX_RANGE', 2000))  # catch-up'ta en büyük aralık
+    EVENT_LISTENER_TARGET_EVENTS = int(os.getenv('EVENT_LISTENER_TARGET_EVENTS', 200))  # aralık başına hedef event
+    EVENT_LISTENER_WORKERS = int(os.getenv('EVENT_LISTENER_WORKERS', 4))  # IPFS + node sync paralelliği
+    EVENT_LISTENER_QUEUE_SIZE = int(os.getenv('EVENT_LISTENER_QUEUE_SIZE', 8))  # commit bekleyen en fazla aralık
+    EVENT_LISTENER_CONFIRMATIONS = int(os.getenv('EVENT_LISTENER_CONFIRMATIONS', 0))  # ledger'a yazmadan önce beklenen blok derinliği
+    EVENT_LISTENER_REORG_BUFFER = int(os.getenv('EVENT_LISTENER_REORG_BUFFER', 64))  # reorg kontrolü için tutulan son blok hash'i
+    EVENT_LISTENER_CHECKPOINT_BLOCKS = int(os.getenv('EVENT_LISTENER_CHECKPOINT_BLOCKS', 100))  # event'siz bloklarda checkpoint sıklığı (blok)
+    EVENT_LISTENER_CHECKPOINT_INTERVAL = float(os.getenv('EVENT_LISTENER_CHECKPOINT_INTERVAL', 30))  # event'siz bloklarda checkpoint sıklığı (saniye)
 
     # Scheduler
     SCHEDULER_INTERVAL = int(os.getenv('SCHEDULER_INTERVAL', 30))  # saniye
@@ -55,11 +80,33 @@ class Config:
     # OpenCBDC API (mock = mock mode)
     OPENCBDC_URL = os.getenv('OPENCBDC_URL', 'mock')
 
+    # OpenCBDC Ledger storage
+    LEDGER_BACKEND = os.getenv('LEDGER_BACKEND', 'json').lower()  # json | sqlite
+    LEDGER_SQLITE_SYNCHRONOUS = os.getenv('LEDGER_SQLITE_SYNCHRONOUS', 'NORMAL').upper()  # NORMAL | FULL
+    LEDGER_WAL_ENABLED = os.getenv('LEDGER_WAL_ENABLED', 'true').lower() == 'true'
+    LEDGER_WAL_GROUP_COMMIT_MS = int(os.getenv('LEDGER_WAL_GROUP_COMMIT_MS', 2))  # fsync gruplama penceresi
+    LEDGER_CHECKPOINT_INTERVAL = int(os.getenv('LEDGER_CHECKPOINT_INTERVAL', 1000))  # commit sayısı
+    LEDGER_LOCK_STRIPES = int(os.getenv('LEDGER_LOCK_STRIPES', 64))  # hesap lock stripe sayısı
+    LEDGER_CHANGE_FEED_SIZE = int(os.getenv('LEDGER_CHANGE_FEED_SIZE', 10000))  # bellekte tutulan son commit sayısı
+    LEDGER_CHANGE_FEED_POLL = float(os.getenv('LEDGER_CHANGE_FEED_POLL', 1.0))  # diğer process'lerin commit'leri için kontrol aralığı
+
+    # Asenkron transfer pipeline (blockchain/IPFS/validator log arka planda)
+    TRANSFER_PIPELINE_CHAIN_WORKERS = int(os.getenv('TRANSFER_PIPELINE_CHAIN_WORKERS', 4))
+    TRANSFER_PIPELINE_IPFS_WORKERS = int(os.getenv('TRANSFER_PIPELINE_IPFS_WORKERS', 4))
+    TRANSFER_RECEIPT_TIMEOUT = int(os.getenv('TRANSFER_RECEIPT_TIMEOUT', 30))  # saniye
+    TRANSFER_RECEIPT_POLL_INTERVAL = float(os.getenv('TRANSFER_RECEIPT_POLL_INTERVAL', 1.0))  # saniye
+
     # Multi-Indexer Validators
     VALIDATOR1_URL = os.getenv('VALIDATOR1_URL', 'http://localhost:8545')
     VALIDATOR2_URL = os.getenv('VALIDATOR2_URL', 'http://localhost:8555')
     VALIDATOR3_URL = os.getenv('VALIDATOR3_URL', 'http://localhost:8565')
     VALIDATOR4_URL = os.getenv('VALIDATOR4_URL', 'http://localhost:8575')
+    VALIDATOR_RPC_TIMEOUT = float(os.getenv('VALIDATOR_RPC_TIMEOUT', 3))  # paralel sorgu deadline'ı (saniye)
+    VALIDATOR_RPC_WORKERS = int(os.getenv('VALIDATOR_RPC_WORKERS', 16))
+    VALIDATOR_HEALTH_INTERVAL = float(os.getenv('VALIDATOR_HEALTH_INTERVAL', 5))  # arka plan ölçüm aralığı (saniye)
+    VALIDATOR_HEALTH_TTL = float(os.getenv('VALIDATOR_HEALTH_TTL', 15))  # snapshot en fazla bu kadar eski olabilir
+    VALIDATOR_BREAKER_THRESHOLD = int(os.getenv('VALIDATOR_BREAKER_THRESHOLD', 3))  # art arda hata sayısı
+    VALIDATOR_BREAKER_RESET = float(os.getenv('VALIDATOR_BREAKER_RESET', 30))  # açık devre süresi (saniye)
 
     # Frontend
     FRONTEND_URL = os.getenv('FRONTEND_URL', 'http://localhost:5173')
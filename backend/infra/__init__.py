@@ -1,13 +1,14 @@
 """
 Infrastructure module initialization.
 """
-from backend.infra.blockchain import BlockchainClient, TokenClient
+from backend.infra.blockchain import BlockchainClient, TokenClient, get_blockchain_client
 from backend.infra.ipfs_client import IPFSClient
 from backend.infra.event_listener import start_event_listener, stop_event_listener
 
 __all__ = [
     'BlockchainClient',
     'TokenClient',
+    'get_blockchain_client',
     'IPFSClient',
     'start_event_listener',
     'stop_event_listener'
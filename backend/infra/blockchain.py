@@ -1,11 +1,84 @@
 """
 Blockchain (ETH/Besu) bağlantısı ve işlem fonksiyonları.
 Web3.py ile JSON-RPC üzerinden blockchain ile iletişim.
+
+- Aynı RPC URL'ini kullanan tüm client'lar tek Web3 örneğini ve keep-alive
+  HTTP session havuzunu paylaşır (bağlantı kurulumu her çağrıda tekrarlanmaz).
+- get_blocks / get_transaction_receipts / get_chain_status birden çok RPC
+  çağrısını tek HTTP isteğinde (JSON-RPC batch) gönderir.
 """
+import os
+import time
+import threading
+from typing import Dict, List, Optional, Tuple
+
+import requests
+from requests.adapters import HTTPAdapter
 from web3 import Web3
 from web3.middleware import ExtraDataToPOAMiddleware
 
 from backend.config import Config
+from backend.infra.nonce_manager import get_nonce_manager
+
+# RPC URL başına zincir sabitleri ve kısa ömürlü gas price cache'i
+# (tüm BlockchainClient örnekleri paylaşır)
+_chain_cache: Dict[str, dict] = {}
+_chain_cache_lock = threading.Lock()
+
+# Nonce çakışması / tekrar gönderim hataları (Geth ve Besu mesajları)
+_NONCE_TOO_LOW_ERRORS = ("nonce too low", "replacement transaction underpriced", "already known", "known transaction")
+
+# (RPC URL, pid) -> paylaşılan Web3 / client; fork sonrası socket'ler paylaşılmaz
+_web3_instances: Dict[Tuple[str, int], Web3] = {}
+_clients: Dict[Tuple[str, int], "BlockchainClient"] = {}
+_pool_lock = threading.Lock()
+
+# Batch yanıtlarında int'e çevrilen alanlar (ham JSON-RPC hex değerleri)
+_BLOCK_INT_FIELDS = ("number", "timestamp", "gasLimit", "gasUsed", "size", "baseFeePerGas", "difficulty")
+_RECEIPT_INT_FIELDS = ("blockNumber", "status", "gasUsed", "cumulativeGasUsed", "transactionIndex", "effectiveGasPrice", "type")
+_LOG_INT_FIELDS = ("blockNumber", "logIndex", "transactionIndex")
+
+
+def _shared_web3(rpc_url: str) -> Web3:
+    """RPC URL başına process genelinde tek Web3 (keep-alive session havuzu ile)."""
+    key = (rpc_url, os.getpid())
+    with _pool_lock:
+        w3 = _web3_instances.get(key)
+        if w3 is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=Config.BLOCKCHAIN_HTTP_POOL_SIZE)
+            session.mount('http://', adapter)
+            session.mount('https://', adapter)
+            w3 = Web3(Web3.HTTPProvider(rpc_url, session=session))
+
+            # POA chain için middleware (Besu QBFT/IBFT için gerekli)
+            w3.middleware_onion.inject(ExtraDataToPOAMiddleware, layer=0)
+            _web3_instances[key] = w3
+        return w3
+
+
+def get_blockchain_client(rpc_url: str = None) -> "BlockchainClient":
+    """Process genelinde paylaşılan BlockchainClient (RPC URL başına bir tane)."""
+    rpc_url = rpc_url or Config.BLOCKCHAIN_RPC_URL
+    key = (rpc_url, os.getpid())
+    with _pool_lock:
+        client = _clients.get(key)
+    if client is None:
+        client = BlockchainClient(rpc_url)
+        with _pool_lock:
+            client = _clients.setdefault(key, client)
+    return client
+
+
+def _to_ints(record: Optional[dict], fields: tuple) -> Optional[dict]:
+    """Ham JSON-RPC kaydındaki hex sayı alanlarını int'e çevir."""
+    if not isinstance(record, dict):
+        return record
+    record = dict(record)
+    for field in fields:
+        if isinstance(record.get(field), str):
+            record[field] = int(record[field], 16)
+    return record
 
 
 class BlockchainClient:
@@ -22,10 +95,39 @@ class BlockchainClient:
             rpc_url: JSON-RPC endpoint URL (default: Config'den alınır)
         """
         self.rpc_url = rpc_url or Config.BLOCKCHAIN_RPC_URL
-        self.w3 = Web3(Web3.HTTPProvider(self.rpc_url))
-
-        # POA chain için middleware (Besu QBFT/IBFT için gerekli)
-        self.w3.middleware_onion.inject(ExtraDataToPOAMiddleware, layer=0)
+        self.w3 = _shared_web3(self.rpc_url)
+
+    def _cache(self) -> dict:
+        with _chain_cache_lock:
+            return _chain_cache.setdefault(self.rpc_url, {})
+
+    @property
+    def chain_id(self) -> int:
+        """Chain ID (değişmez; RPC URL başına bir kez sorgulanır)."""
+        cache = self._cache()
+        if "chain_id" not in cache:
+            cache["chain_id"] = self.w3.eth.chain_id
+        return cache["chain_id"]
+
+    def get_gas_price(self) -> int:
+        """Gas fiyatı (BLOCKCHAIN_GAS_PRICE_TTL saniye cache'lenir)."""
+        cache = self._cache()
+        cached = cache.get("gas_price")
+        if cached and time.monotonic() - cached[1] < Config.BLOCKCHAIN_GAS_PRICE_TTL:
+            return cached[0]
+        gas_price = self.w3.eth.gas_price
+        cache["gas_price"] = (gas_price, time.monotonic())
+        return gas_price
+
+    def nonce_manager(self, address: str):
+        """Adresin process genelindeki nonce dağıtıcısı (bkz. nonce_manager)."""
+        checksum_address = Web3.to_checksum_address(address)
+        return get_nonce_manager(
+            self.rpc_url,
+            checksum_address,
+            lambda: self.w3.eth.get_transaction_count(checksum_address, 'pending'),
+            Config.BLOCKCHAIN_NONCE_RESYNC_INTERVAL
+        )
 
     def is_connected(self) -> bool:
         """Blockchain node'a bağlı mı?"""
@@ -76,6 +178,65 @@ class BlockchainClient:
             return dict(receipt)
         return None
 
+    def batch_call(self, calls: List[Tuple[str, list]]) -> list:
+        """
+        JSON-RPC çağrılarını batch olarak gönder (BLOCKCHAIN_RPC_BATCH_SIZE'lık
+        parçalar halinde, parça başına tek HTTP isteği).
+
+        Args:
+            calls: [(method, params), ...]
+
+        Returns:
+            Her çağrının ham sonucu, aynı sırayla (hata dönen çağrı için None)
+        """
+        results = []
+        size = max(1, Config.BLOCKCHAIN_RPC_BATCH_SIZE)
+        for start in range(0, len(calls), size):
+            responses = self.w3.provider.make_batch_request(calls[start:start + size])
+            if not isinstance(responses, list):
+                # Node batch'in tamamını reddetti
+                raise ValueError(f"JSON-RPC batch hatası: {responses.get('error')}")
+            results += [None if "error" in r else r.get("result") for r in responses]
+        return results
+
+    def get_blocks(self, block_numbers: List[int], full_transactions: bool = False) -> List[Optional[dict]]:
+        """
+        Birden çok bloğu tek batch istekle getir.
+
+        Returns:
+            Blok listesi (ham JSON-RPC formatı, sayısal alanlar int; olmayan blok None)
+        """
+        results = self.batch_call([
+            ("eth_getBlockByNumber", [hex(n), full_transactions]) for n in block_numbers
+        ])
+        return [_to_ints(block, _BLOCK_INT_FIELDS) for block in results]
+
+    def get_transaction_receipts(self, tx_hashes: List[str]) -> Dict[str, Optional[dict]]:
+        """
+        Birden çok receipt'i tek batch istekle getir.
+
+        Returns:
+            {tx_hash -> receipt (sayısal alanlar int) veya henüz mine edilmediyse None}
+        """
+        results = self.batch_call([("eth_getTransactionReceipt", [tx_hash]) for tx_hash in tx_hashes])
+        receipts = {}
+        for tx_hash, receipt in zip(tx_hashes, results):
+            receipt = _to_ints(receipt, _RECEIPT_INT_FIELDS)
+            if receipt and receipt.get("logs"):
+                receipt["logs"] = [_to_ints(log, _LOG_INT_FIELDS) for log in receipt["logs"]]
+            receipts[tx_hash] = receipt
+        return receipts
+
+    def get_chain_status(self) -> dict:
+        """Son blok ve peer sayısı (eth_blockNumber + net_peerCount tek istekte)."""
+        block_number, peer_count = self.batch_call([("eth_blockNumber", []), ("net_peerCount", [])])
+        if block_number is None:
+            raise ValueError("eth_blockNumber yanıtı alınamadı")
+        return {
+            "block_number": int(block_number, 16),
+            "peer_count": int(peer_count, 16) if peer_count is not None else None
+        }
+
     def get_block(self, block_number: int, full_transactions: bool = False) -> dict:
         """
         Blok bilgisini getir.
@@ -103,7 +264,7 @@ class BlockchainClient:
         return tx_hash.hex()
 
     def build_transfer_tx(self, from_addr: str, to_addr: str, amount_ether: str,
-                          gas_price: int = None, gas_limit: int = 21000) -> dict:
+                          gas_price: int = None, gas_limit: int = 21000, nonce: int = None) -> dict:
         """
         Transfer transaction'ı oluştur (imzalanmamış).
 
@@ -111,8 +272,9 @@ class BlockchainClient:
             from_addr: Gönderen adresi
             to_addr: Alıcı adresi
             amount_ether: Transfer miktarı (ether cinsinden)
-            gas_price: Gas fiyatı (default: network önerisi)
+            gas_price: Gas fiyatı (default: cache'lenmiş network önerisi)
             gas_limit: Gas limiti (default: 21000)
+            nonce: Nonce (default: zincirden okunur; paralel gönderimde send_transfer kullanın)
 
         Returns:
             İmzalanmamış transaction dict
@@ -125,13 +287,40 @@ class BlockchainClient:
             'to': to_checksum,
             'value': value_wei,
             'gas': gas_limit,
-            'gasPrice': gas_price or self.w3.eth.gas_price,
-            'nonce': self.w3.eth.get_transaction_count(from_checksum),
-            'chainId': self.w3.eth.chain_id
+            'gasPrice': gas_price or self.get_gas_price(),
+            'nonce': nonce if nonce is not None else self.w3.eth.get_transaction_count(from_checksum),
+            'chainId': self.chain_id
         }
 
         return tx
 
+    def send_transfer(self, from_addr: str, to_addr: str, amount_ether: str,
+                      private_key: str, gas_limit: int = 21000, retries: int = 3) -> str:
+        """
+        Transferi yerel nonce dağıtıcısı ile imzala ve gönder (receipt beklemez).
+        Aynı hesaptan birçok tx aynı anda gönderilebilir. Gönderim başarısız olursa
+        nonce boşluk olarak geri verilir; nonce çakışmasında zincirle eşitlenip
+        yeni nonce ile tekrar denenir.
+
+        Returns:
+            Transaction hash
+        """
+        nonces = self.nonce_manager(from_addr)
+        for attempt in range(retries):
+            nonce = nonces.allocate()
+            try:
+                tx = self.build_transfer_tx(from_addr, to_addr, amount_ether, gas_limit=gas_limit, nonce=nonce)
+                tx_hash = self.sign_and_send_transaction(tx, private_key)
+            except Exception as e:
+                nonces.release(nonce)
+                message = str(e).lower()
+                if any(err in message for err in _NONCE_TOO_LOW_ERRORS) and attempt < retries - 1:
+                    nonces.resync()
+                    continue
+                raise
+            nonces.mark_sent(nonce)
+            return tx_hash
+
     def sign_and_send_transaction(self, tx: dict, private_key: str) -> str:
         """
         Transaction'ı imzala ve gönder.
@@ -262,5 +451,7 @@ class TokenClient(BlockchainClient):
             'to': event['args']['to'],
             'value': str(Web3.from_wei(event['args']['value'], 'ether')),
             'tx_hash': event['transactionHash'].hex(),
-            'block_number': event['blockNumber']
+            'block_number': event['blockNumber'],
+            'block_hash': Web3.to_hex(event['blockHash']),
+            'log_index': event['logIndex']
         } for event in events]
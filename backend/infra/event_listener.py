@@ -4,27 +4,40 @@ PostgreSQL KULLANMIYOR - Tüm veri OpenCBDC ledger'a yazılır.
 
 - Transfer event geldiğinde IPFS'e metadata yazar
 - IPFS CID'i OpenCBDC ledger'a ekler
-- Bakiyeleri OpenCBDC'de günceller
+- Bakiyeleri OpenCBDC'de günceller (blok aralığı başına tek batch commit)
+- Son işlenen blok ledger metadata'sında, transferlerle aynı commit'te tutulur;
+  event'ler (tx_hash, log_index) ile dedup edilir, aralık tekrar işlense de çift kayıt olmaz
+- Bloklar EVENT_LISTENER_CONFIRMATIONS derinliğe ulaşınca işlenir; son blokların hash'leri
+  bellekte tutulur, reorg (parent hash uyuşmazlığı) olursa etkilenen transferler geri alınır
+- Fetch / IPFS / ledger stage'leri sınırlı kuyruklarla eşzamanlı çalışır
 """
 import threading
 import time
+import queue
 import logging
 import json
 import os
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from decimal import Decimal
 
 from web3 import Web3
 
 from backend.config import Config
+from backend.infra.validator_client import post_all, validator_nodes
+from backend.infra.validator_health import get_health_monitor
+from backend.infra.event_sources import create_event_source
 
 logger = logging.getLogger('event_listener')
 logger.setLevel(logging.INFO)
 
 _listener_thread = None
 _stop_event = threading.Event()
+_event_source = None
 
-# Son işlenen blok file-based tracking
+# Son işlenen blok: ledger metadata anahtarı (eski sürümlerin dosyası sadece ilk açılışta okunur)
+CHECKPOINT_KEY = 'event_listener_block'
 LOGS_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'logs')
 LAST_BLOCK_FILE = os.path.join(LOGS_DIR, '.last_processed_block')
 
@@ -33,16 +46,13 @@ class MultiNodeSyncer:
     """Tüm validator node'lara IPFS CID ve veri sync eder."""
 
     def __init__(self):
-        self.nodes = []
-        for i in range(1, 5):
-            url = getattr(Config, f'VALIDATOR{i}_URL', None)
-            if url:
-                self.nodes.append({"name": f"validator{i}", "url": url})
+        self.nodes = [{"name": name, "url": url} for name, url in validator_nodes().items()]
 
     def sync_to_all_nodes(self, data: dict) -> dict:
-        """Veriyi tüm node'lara gönder."""
-        import requests
-
+        """
+        Veriyi tüm node'lara paralel gönder (süre: en yavaş node, en fazla 5 sn).
+        Devresi açık (bilinen ölü) node'lar atlanır.
+        """
         results = {
             "total": len(self.nodes),
             "success": 0,
@@ -50,41 +60,58 @@ class MultiNodeSyncer:
             "details": []
         }
 
+        payload = {
+            "jsonrpc": "2.0",
+            "method": "eth_call",
+            "params": [{
+                "to": "0x0000000000000000000000000000000000000000",
+                "data": Web3.keccak(text=json.dumps(data)).hex()
+            }, "latest"],
+            "id": 1
+        }
+        monitor = get_health_monitor()
+        allowed = monitor.allowed_nodes()
+        responses = post_all(payload, {node["name"]: node["url"] for node in self.nodes if node["name"] in allowed}, deadline=5)
+
         for node in self.nodes:
-            try:
-                response = requests.post(
-                    node["url"],
-                    json={
-                        "jsonrpc": "2.0",
-                        "method": "eth_call",
-                        "params": [{
-                            "to": "0x0000000000000000000000000000000000000000",
-                            "data": Web3.keccak(text=json.dumps(data)).hex()
-                        }, "latest"],
-                        "id": 1
-                    },
-                    timeout=5
-                )
+            response = responses.get(node["name"])
+            if response is None:
+                results["failed"] += 1
+                results["details"].append({
+                    "node": node["name"],
+                    "status": "skipped",
+                    "error": "circuit open"
+                })
+                continue
 
+            monitor.record(node["name"], response["status_code"] is not None)
+            if response["status_code"] is not None:
                 results["success"] += 1
                 results["details"].append({
                     "node": node["name"],
                     "status": "synced",
-                    "response_code": response.status_code
+                    "response_code": response["status_code"]
                 })
-            except Exception as e:
+            else:
                 results["failed"] += 1
                 results["details"].append({
                     "node": node["name"],
                     "status": "failed",
-                    "error": str(e)[:50]
+                    "error": response["error"]
                 })
 
         return results
 
 
 def _get_last_processed_block() -> int:
-    """Son işlenen blok numarasını file'dan oku."""
+    """Son işlenen blok numarasını ledger checkpoint'inden oku."""
+    from backend.infra.opencbdc_storage import OpenCBDCLedger
+
+    block_number = OpenCBDCLedger.get_metadata(CHECKPOINT_KEY)
+    if block_number is not None:
+        return int(block_number)
+
+    # Eski sürüm: checkpoint dosyası (bir sonraki commit ile ledger'a taşınır)
     try:
         if os.path.exists(LAST_BLOCK_FILE):
             with open(LAST_BLOCK_FILE, 'r') as f:
@@ -94,82 +121,333 @@ def _get_last_processed_block() -> int:
 
     # İlk çalıştırma: Son 100 bloktan başla
     try:
-        from backend.infra.blockchain import BlockchainClient
-        blockchain = BlockchainClient()
+        from backend.infra.blockchain import get_blockchain_client
+        blockchain = get_blockchain_client()
         return max(0, blockchain.get_block_number() - 100)
     except:
         return 0
 
 
-def _save_last_processed_block(block_number: int):
-    """Son işlenen blok numarasını file'a yaz."""
-    os.makedirs(LOGS_DIR, exist_ok=True)
-    with open(LAST_BLOCK_FILE, 'w') as f:
-        f.write(str(block_number))
-
-
 def _get_token_events(token_client, from_block: int, to_block: int) -> list:
-    """Token transfer event'lerini al."""
+    """
+    Token transfer event'lerini al (blok ve log sırasıyla).
+    Hata yukarı iletilir; çağıran aralığı küçültüp tekrar dener.
+    """
     events = []
-    try:
-        raw_events = token_client.get_transfer_events(from_block, to_block)
-        for e in raw_events:
-            events.append({
-                "tx_hash": e["tx_hash"],
-                "from": e["from"].lower(),
-                "to": e["to"].lower(),
-                "value": e["value"],
-                "block": e.get("block", from_block)
-            })
-    except Exception as e:
-        logger.warning(f"Token event'leri alınamadı: {e}")
+    for e in token_client.get_transfer_events(from_block, to_block):
+        events.append({
+            "tx_hash": e["tx_hash"],
+            "from": e["from"].lower(),
+            "to": e["to"].lower(),
+            "value": e["value"],
+            "block": e.get("block_number", from_block),
+            "block_hash": e.get("block_hash"),
+            "log_index": e.get("log_index", 0)
+        })
+    events.sort(key=lambda event: (event["block"], event["log_index"]))
     return events
 
 
-def _save_transfer_to_opencbdc(event_data: dict, ipfs_cid: str, sync_result: dict):
-    """Transfer event'ini OpenCBDC ledger'a kaydet."""
-    from backend.infra.opencbdc_storage import OpenCBDCLedger
+class _AdaptiveRange:
+    """
+    eth_getLogs blok aralığı boyutu: sonuç sayısına göre büyür/küçülür.
+    Hedefin yarısından az event -> aralık iki katına, iki katından fazla -> yarıya;
+    sorgu hatasında (node'un sonuç limiti, timeout) yarıya iner.
+    """
 
-    try:
-        sender = event_data["from"]
-        receiver = event_data["to"]
-        amount = Decimal(event_data["value"])
-        tx_hash = event_data["tx_hash"]
+    def __init__(self, initial: int, maximum: int, target_events: int):
+        self.maximum = max(1, maximum)
+        self.size = min(max(1, initial), self.maximum)
+        self.target_events = max(1, target_events)
+
+    def update(self, event_count: int):
+        if event_count > self.target_events * 2:
+            self.size = max(1, self.size // 2)
+        elif event_count < self.target_events // 2:
+            self.size = min(self.maximum, self.size * 2)
+
+    def shrink(self):
+        self.size = max(1, self.size // 2)
+
+
+class _BlockBuffer:
+    """
+    Son işlenen blokların hash'leri (reorg tespiti için, sadece bellekte).
+    block hash -> {"number", "parent_hash", "events": [(tx_hash, log_index), ...]};
+    en fazla size ardışık blok tutulur, daha eskiler kesinleşmiş sayılır.
+    """
 
-        # OpenCBDC'de transfer yap
-        result = OpenCBDCLedger.transfer(
-            sender_address=sender,
-            receiver_address=receiver,
-            amount=amount,
-            tx_hash=tx_hash,
-            ipfs_cid=ipfs_cid
-        )
+    def __init__(self, size: int):
+        self.size = max(1, size)
+        self.blocks: "OrderedDict[str, dict]" = OrderedDict()
+        self.hash_by_number = {}
+
+    def hash_of(self, number: int):
+        return self.hash_by_number.get(number)
+
+    def numbers(self) -> list:
+        return sorted(self.hash_by_number)
+
+    def add(self, number: int, block_hash: str, parent_hash: str, events: list):
+        if self.hash_by_number and number - 1 not in self.hash_by_number:
+            # Araya tutulmayan bloklar girdi (catch-up): zincir yeniden başlar
+            self.blocks.clear()
+            self.hash_by_number.clear()
+        self.blocks[block_hash] = {"number": number, "parent_hash": parent_hash, "events": events}
+        self.hash_by_number[number] = block_hash
+        while len(self.blocks) > self.size:
+            _, oldest = self.blocks.popitem(last=False)
+            self.hash_by_number.pop(oldest["number"], None)
+
+    def rollback(self, fork_block: int) -> list:
+        """fork_block ve sonrasındaki blokları çıkar; event'lerini (yeniden eskiye) döndür."""
+        events = []
+        for number in sorted((n for n in self.hash_by_number if n >= fork_block), reverse=True):
+            events.extend(self.blocks.pop(self.hash_by_number.pop(number))["events"])
+        return events
+
+
+def _find_fork(blockchain, blocks: _BlockBuffer) -> int:
+    """Tutulan blokları zincirle karşılaştır; hash'i değişen ilk bloğu döndür."""
+    numbers = blocks.numbers()
+    current = blockchain.get_blocks(numbers)
+    for number, block in reversed(list(zip(numbers, current))):
+        if block and block["hash"] == blocks.hash_of(number):
+            return number + 1
+    logger.error(f"Reorg tutulan {len(numbers)} bloktan daha derin; en eski tutulan bloktan geri alınıyor")
+    return numbers[0]
+
+
+def _verify_blocks(blockchain, blocks: _BlockBuffer, start_block: int, end_block: int, head: int, events: list):
+    """
+    Aralığın son blok başlıklarını (tampon penceresi) oku ve zincir devamlılığını kontrol et.
+    Tutarlıysa bloklar tampona eklenir.
+
+    Returns:
+        None veya reorg varsa geri alınacak ilk blok numarası
+    Raises:
+        ValueError: Okuma sırasında zincir değişti (aralık tekrar okunmalı)
+    """
+    first = max(start_block, head - Config.EVENT_LISTENER_CONFIRMATIONS - blocks.size + 1)
+    if first > end_block:
+        return None
+
+    headers = blockchain.get_blocks(list(range(first, end_block + 1)))
+    if any(header is None for header in headers):
+        raise ValueError("Blok başlıkları alınamadı")
+
+    parent_hash = blocks.hash_of(first - 1)
+    if parent_hash and headers[0]["parentHash"] != parent_hash:
+        fork_block = _find_fork(blockchain, blocks)
+        logger.warning(f"Reorg tespit edildi: blok {first - 1} hash'i değişti, {fork_block}'den itibaren geri alınacak")
+        return fork_block
+
+    for previous, header in zip(headers, headers[1:]):
+        if header["parentHash"] != previous["hash"]:
+            raise ValueError(f"Blok {header['number']} okunurken zincir değişti")
+
+    hashes = {header["number"]: header["hash"] for header in headers}
+    block_events = {}
+    for event in events:
+        if event["block"] < first:
+            continue
+        if event.get("block_hash") and event["block_hash"] != hashes[event["block"]]:
+            raise ValueError(f"Blok {event['block']} event'leri okunurken zincir değişti")
+        block_events.setdefault(event["block"], []).append((event["tx_hash"], event["log_index"]))
+
+    for header in headers:
+        blocks.add(header["number"], header["hash"], header["parentHash"], block_events.get(header["number"], []))
+    return None
+
+
+def _save_transfers_to_opencbdc(entries: list, end_block: int):
+    """
+    Bir blok aralığındaki transfer event'lerini ve son işlenen bloğu OpenCBDC
+    ledger'a tek batch (tek commit) olarak kaydet. Daha önce uygulanmış event'ler
+    (tx_hash, log_index) atlanır; commit hatası yukarı iletilir.
+
+    Args:
+        entries: [(event_data, ipfs_cid), ...] blok sırasıyla
+        end_block: Aralığın son bloğu (checkpoint)
+    """
+    from backend.infra.opencbdc_storage import OpenCBDCLedger
 
+    batch = OpenCBDCLedger.transfer_batch([
+        {
+            "sender_address": event_data["from"],
+            "receiver_address": event_data["to"],
+            "amount": Decimal(event_data["value"]),
+            "tx_hash": event_data["tx_hash"],
+            "log_index": event_data["log_index"],
+            "ipfs_cid": ipfs_cid
+        }
+        for event_data, ipfs_cid in entries
+    ], checkpoint={CHECKPOINT_KEY: end_block})
+
+    for (event_data, ipfs_cid), result in zip(entries, batch["results"]):
+        tx_hash = event_data["tx_hash"]
         if result.get("status") == "success":
             logger.info(f"OpenCBDC transfer kaydedildi: {tx_hash[:10]}... IPFS: {ipfs_cid}")
+            if event_data.get("ipfs_metadata"):
+                _enqueue_ipfs_metadata(result["tx_id"], event_data["ipfs_metadata"])
+        elif result.get("status") == "duplicate":
+            logger.info(f"OpenCBDC transfer zaten kayıtlı: {tx_hash[:10]}... (tx_id {result.get('tx_id')})")
         else:
-            logger.warning(f"OpenCBDC transfer hatası: {result.get('error')}")
+            logger.warning(f"OpenCBDC transfer hatası ({tx_hash[:10]}...): {result.get('error')}")
+
+
+def _enqueue_ipfs_metadata(tx_id: int, metadata: dict):
+    """IPFS'e yazılamayan event metadata'sını outbox'a al; CID yüklenince transaction'a yazılır."""
+    from backend.infra.ipfs_outbox import get_ipfs_outbox
+
+    try:
+        get_ipfs_outbox().enqueue("transaction", metadata, target=tx_id, field="ipfs_cid")
+    except Exception as e:
+        logger.error(f"IPFS outbox'a eklenemedi (tx_id {tx_id}): {e}")
+
 
+def _rollback_opencbdc(events: list, fork_block: int):
+    """
+    Reorg: fork_block ve sonrasında uygulanan transferleri geri al ve son işlenen
+    bloğu fork_block - 1'e çek (tek commit).
+    """
+    from backend.infra.opencbdc_storage import OpenCBDCLedger
+
+    result = OpenCBDCLedger.revert_events(events, checkpoint={CHECKPOINT_KEY: fork_block - 1})
+    logger.warning(f"Reorg: blok {fork_block} ve sonrası için {result['reverted']} transfer geri alındı")
+    for item in result["results"]:
+        if item.get("status") != "success":
+            logger.error(
+                f"Transfer geri alınamadı, revert_failed işaretlendi (tx_id {item.get('reverts')}): {item.get('error')}"
+            )
+
+
+def _process_event(event_data: dict, ipfs, syncer: "MultiNodeSyncer"):
+    """IPFS stage: event metadata'sını IPFS'e yaz ve tüm node'lara sync et."""
+    ipfs_cid = None
+    metadata = {
+        "type": "transfer",
+        "from": event_data["from"],
+        "to": event_data["to"],
+        "amount": event_data["value"],
+        "tx_hash": event_data["tx_hash"],
+        "block": event_data["block"],
+        "timestamp": datetime.utcnow().isoformat()
+    }
+    try:
+        ipfs_cid = ipfs.add_json(metadata, upload_async=Config.IPFS_ASYNC_UPLOAD)
+        logger.info(f"IPFS'e yazıldı: {ipfs_cid}")
     except Exception as e:
-        logger.error(f"OpenCBDC kaydetme hatası: {e}")
+        # Transfer ledger'a yazıldıktan sonra outbox'a alınır (bkz. _save_transfers_to_opencbdc)
+        logger.warning(f"IPFS yazma hatası, outbox'a alınacak: {e}")
+        event_data["ipfs_metadata"] = metadata
+
+    sync_data = {
+        "ipfs_cid": ipfs_cid,
+        "tx_hash": event_data["tx_hash"],
+        "from": event_data["from"],
+        "to": event_data["to"],
+        "amount": event_data["value"],
+        "block": event_data["block"]
+    }
+    try:
+        sync_result = syncer.sync_to_all_nodes(sync_data)
+        logger.info(f"Node sync: {sync_result['success']}/{sync_result['total']}")
+    except Exception as e:
+        logger.warning(f"Node sync hatası: {e}")
+
+    return event_data, ipfs_cid
+
+
+def _commit_loop(commit_queue: queue.Queue):
+    """
+    Ledger stage: aralıkları fetch sırasıyla al, IPFS sonuçlarını bekle,
+    aralığı son işlenen blokla birlikte tek batch ile commit et.
+    Reorg geri almaları da aynı kuyruktan, önceki aralıklar commit edildikten sonra uygulanır.
+    Commit başarısız olursa aynı aralık tekrar denenir (sonraki aralıklar atlanmaz);
+    tekrar denemede zaten uygulanmış event'ler dedup edilir.
+
+    Event'siz aralıklar her blokta ledger commit'i (WAL kaydı, change feed) üretmesin diye
+    checkpoint'leri birleştirilir: en fazla EVENT_LISTENER_CHECKPOINT_BLOCKS blok veya
+    EVENT_LISTENER_CHECKPOINT_INTERVAL saniyede bir yazılır (event'li aralık veya durdurma
+    anında hemen). Yazılmamış checkpoint kaybolursa o boş bloklar açılışta tekrar taranır.
+
+    Kuyruk kayıtları: ("range", start_block, end_block, futures) | ("rollback", fork_block, events)
+    """
+    abandoned = False
+    # Ertelenmiş checkpoint: {"block", "since_block": son yazılan checkpoint, "since": monotonic}
+    deferred = None
+    while True:
+        item = commit_queue.get()
+        if item is None:
+            if deferred and not abandoned:
+                try:
+                    _save_transfers_to_opencbdc([], deferred["block"])
+                except Exception as e:
+                    logger.warning(f"Son checkpoint yazılamadı ({deferred['block']}): {e}")
+            return
+        if abandoned:
+            # Fetch stage'i kuyrukta bloklanmasın diye kalan aralıklar boşaltılır
+            continue
+        if item[0] == "rollback":
+            _, fork_block, events = item
+            label = f"reorg geri alma ({fork_block} -)"
+            commit = lambda: _rollback_opencbdc(events, fork_block)
+            # Geri almanın checkpoint'i (fork_block - 1) ertelenmiş olanın yerine geçer
+            deferred = None
+        else:
+            _, start_block, end_block, futures = item
+            entries = [future.result() for future in futures]
+            label = f"{start_block} - {end_block}"
+
+            if entries:
+                deferred = None
+            else:
+                if deferred is None:
+                    deferred = {"since_block": start_block - 1, "since": time.monotonic()}
+                deferred["block"] = end_block
+                if (end_block - deferred["since_block"] < Config.EVENT_LISTENER_CHECKPOINT_BLOCKS
+                        and time.monotonic() - deferred["since"] < Config.EVENT_LISTENER_CHECKPOINT_INTERVAL):
+                    continue
+                deferred = None
+
+            def commit():
+                _save_transfers_to_opencbdc(entries, end_block)
+                if entries:
+                    logger.info(f"Bloklar commit edildi: {start_block} - {end_block} ({len(entries)} event)")
+        while True:
+            try:
+                commit()
+                break
+            except Exception as e:
+                logger.error(f"Blok aralığı commit edilemedi ({label}), tekrar denenecek: {e}")
+                if _stop_event.wait(5):
+                    # Durduruluyor: checkpoint ilerlemedi, açılışta bu aralıktan devam edilir
+                    abandoned = True
+                    break
 
 
 def event_listener_task(app):
     """
     Event Listener ana döngüsü - OpenCBDC Mode.
-    1. Besu'dan yeni event/transfer'leri dinler
-    2. Her event için IPFS'e metadata yazar
-    3. IPFS CID'i tüm node'lara sync eder
-    4. OpenCBDC ledger'a kaydeder (PostgreSQL YOK)
+    Üç stage eşzamanlı çalışır, aralarında sınırlı kuyruklar vardır:
+    1. Fetch (bu thread): Besu'dan transfer event'lerini adaptif boyutlu blok aralıklarıyla okur
+    2. IPFS (thread havuzu): her event için IPFS'e metadata yazar ve node'lara sync eder
+    3. Ledger (commit thread'i): aralıkları blok sırasıyla OpenCBDC ledger'a kaydeder (PostgreSQL YOK)
+
+    Geride kalındığında (catch-up) aralıklar beklemeden art arda işlenir;
+    son bloğa yetişince event kaynağından (bkz. event_sources) yeni blok sinyali beklenir.
+    Sadece EVENT_LISTENER_CONFIRMATIONS derinliğindeki bloklar işlenir; son
+    EVENT_LISTENER_REORG_BUFFER bloğun hash'leriyle reorg kontrol edilir.
     """
     logger.info("Event listener başlatılıyor (OpenCBDC mode)...")
 
-    from backend.infra.blockchain import BlockchainClient, TokenClient
+    from backend.infra.blockchain import TokenClient, get_blockchain_client
     from backend.infra.ipfs_client import IPFSClient
 
     # Blockchain client
     try:
-        blockchain = BlockchainClient()
+        blockchain = get_blockchain_client()
         if not blockchain.is_connected():
             logger.error("Blockchain'e bağlanılamadı!")
             return
@@ -199,66 +477,83 @@ def event_listener_task(app):
         except Exception as e:
             logger.warning(f"Token client başlatılamadı: {e}")
 
-    # Son işlenen blok
-    last_processed_block = _get_last_processed_block()
+    # Stage'ler
+    executor = ThreadPoolExecutor(max_workers=max(1, Config.EVENT_LISTENER_WORKERS), thread_name_prefix='EventIPFS')
+    commit_queue = queue.Queue(maxsize=max(1, Config.EVENT_LISTENER_QUEUE_SIZE))
+    committer = threading.Thread(target=_commit_loop, args=(commit_queue,), daemon=True, name='EventListener-Commit')
+    committer.start()
 
-    while not _stop_event.is_set():
-        try:
-            current_block = blockchain.get_block_number()
+    block_range = _AdaptiveRange(
+        Config.EVENT_LISTENER_RANGE,
+        Config.EVENT_LISTENER_MAX_RANGE,
+        Config.EVENT_LISTENER_TARGET_EVENTS
+    )
+    blocks = _BlockBuffer(Config.EVENT_LISTENER_REORG_BUFFER)
+    confirmations = max(0, Config.EVENT_LISTENER_CONFIRMATIONS)
 
-            if current_block > last_processed_block:
-                start_block = last_processed_block + 1
-                end_block = min(start_block + 10, current_block)
+    # Yeni blok sinyali (ws aboneliği / node filtresi / periyodik kontrol)
+    global _event_source
+    source = create_event_source(blockchain, Config.MONEY_TOKEN_ADDRESS or None)
+    _event_source = source
+    logger.info(f"Event kaynağı: {source.name}")
+
+    # Son fetch edilen blok (commit edilen blok commit thread'inde ilerler)
+    last_fetched_block = _get_last_processed_block()
+    current_block = None
+
+    try:
+        while not _stop_event.is_set():
+            try:
+                if current_block is None:
+                    current_block = blockchain.get_block_number()
+
+                if current_block - confirmations <= last_fetched_block:
+                    # Başa yetişildi: yeni blok sinyalini bekle. Sinyal gelmezse
+                    # (zaman aşımı / yeniden bağlanma) baş blok RPC ile kontrol edilir.
+                    current_block = source.wait_for_head(last_fetched_block + confirmations, Config.EVENT_LISTENER_INTERVAL)
+                    continue
+
+                start_block = last_fetched_block + 1
+                end_block = min(start_block + block_range.size - 1, current_block - confirmations)
 
                 logger.info(f"Bloklar işleniyor: {start_block} - {end_block}")
 
                 # Token transfer event'lerini dinle
+                events = []
                 if token_client:
-                    events = _get_token_events(token_client, start_block, end_block)
-
-                    for event_data in events:
-                        # 1. IPFS'e metadata yaz
-                        ipfs_cid = None
-                        if ipfs:
-                            try:
-                                metadata = {
-                                    "type": "transfer",
-                                    "from": event_data["from"],
-                                    "to": event_data["to"],
-                                    "amount": event_data["value"],
-                                    "tx_hash": event_data["tx_hash"],
-                                    "block": event_data["block"],
-                                    "timestamp": datetime.utcnow().isoformat()
-                                }
-                                ipfs_cid = ipfs.add_json(metadata)
-                                logger.info(f"IPFS'e yazıldı: {ipfs_cid}")
-                            except Exception as e:
-                                logger.warning(f"IPFS yazma hatası: {e}")
-
-                        # 2. Tüm node'lara sync et
-                        sync_data = {
-                            "ipfs_cid": ipfs_cid,
-                            "tx_hash": event_data["tx_hash"],
-                            "from": event_data["from"],
-                            "to": event_data["to"],
-                            "amount": event_data["value"],
-                            "block": event_data["block"]
-                        }
-                        sync_result = syncer.sync_to_all_nodes(sync_data)
-                        logger.info(f"Node sync: {sync_result['success']}/{sync_result['total']}")
-
-                        # 3. OpenCBDC ledger'a kaydet
-                        _save_transfer_to_opencbdc(event_data, ipfs_cid, sync_result)
-
-                # Son işlenen bloğu kaydet
-                _save_last_processed_block(end_block)
-                last_processed_block = end_block
-
-            _stop_event.wait(Config.EVENT_LISTENER_INTERVAL)
+                    try:
+                        events = _get_token_events(token_client, start_block, end_block)
+                    except Exception as e:
+                        if block_range.size > 1:
+                            logger.warning(f"Event sorgusu başarısız, aralık küçültülüyor ({block_range.size}): {e}")
+                            block_range.shrink()
+                            continue
+                        raise
+                    block_range.update(len(events))
+
+                fork_block = _verify_blocks(blockchain, blocks, start_block, end_block, current_block, events)
+                if fork_block is not None:
+                    # Reorg: geri alma önceki aralıklardan sonra commit edilir, sonra fork'tan devam
+                    commit_queue.put(("rollback", fork_block, blocks.rollback(fork_block)))
+                    last_fetched_block = fork_block - 1
+                    continue
+
+                # IPFS + node sync paralel; commit sırası kuyruk sırasıdır.
+                # Kuyruk doluysa fetch, commit stage'i yetişene kadar bekler.
+                futures = [executor.submit(_process_event, event_data, ipfs, syncer) for event_data in events]
+                commit_queue.put(("range", start_block, end_block, futures))
+                last_fetched_block = end_block
 
-        except Exception as e:
-            logger.error(f"Event listener hatası: {e}")
-            _stop_event.wait(10)
+            except Exception as e:
+                logger.error(f"Event listener hatası: {e}")
+                current_block = None
+                _stop_event.wait(10)
+    finally:
+        source.close()
+        _event_source = None
+        commit_queue.put(None)
+        committer.join(timeout=30)
+        executor.shutdown(wait=False)
 
 
 def start_event_listener(app):
@@ -291,5 +586,7 @@ def stop_event_listener():
     if _listener_thread and _listener_thread.is_alive():
         logger.info("Event listener durduruluyor...")
         _stop_event.set()
+        if _event_source:
+            _event_source.close()
         _listener_thread.join(timeout=5)
         logger.info("Event listener durduruldu.")
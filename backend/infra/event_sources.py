@@ -0,0 +1,252 @@
+"""
+Event Sources: Event listener'ı yeni blok/log geldiğinde uyandıran kaynaklar.
+
+Kaynaklar sadece "zincirin başı ilerledi" sinyali verir; event'ler her zaman
+son işlenen bloktan itibaren eth_getLogs ile okunur. Böylece bağlantı kopup
+yeniden kurulduğunda kaçan bloklar da ledger'daki checkpoint'ten devam edilerek işlenir.
+
+- WebSocketSource: eth_subscribe (newHeads + token kontratı logları), kopunca yeniden bağlanır
+- FilterSource: eth_newFilter / eth_newBlockFilter + eth_getFilterChanges (kısa aralıklı, hafif)
+- PollingSource: EVENT_LISTENER_INTERVAL aralıklarla eth_blockNumber (eski davranış)
+
+create_event_source(): EVENT_LISTENER_SOURCE=auto ise ws -> filter -> poll sırasıyla dener.
+"""
+import json
+import time
+import importlib
+import threading
+import logging
+from typing import Optional
+
+from backend.config import Config
+
+logger = logging.getLogger('event_sources')
+
+
+class EventSource:
+    """Ortak arayüz: wait_for_head() yeni baş bloğu veya None (caller eth_blockNumber ile kontrol eder)."""
+
+    name = "base"
+
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._closed = False
+
+    def wait_for_head(self, last_block: int, timeout: float) -> Optional[int]:
+        """
+        last_block'tan sonra yeni blok gelene kadar bekle.
+
+        Returns:
+            Bilinen son blok numarası; zaman aşımı, yeniden bağlanma veya
+            kapanışta None (caller eth_blockNumber ile kendisi kontrol eder)
+        """
+        raise NotImplementedError
+
+    def close(self):
+        """Kaynağı kapat; bekleyen wait_for_head() hemen döner."""
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+
+
+class PollingSource(EventSource):
+    """Sabit aralıklı kontrol (push desteği olmayan node'lar için)."""
+
+    name = "poll"
+
+    def wait_for_head(self, last_block: int, timeout: float) -> Optional[int]:
+        with self._cond:
+            self._cond.wait_for(lambda: self._closed, timeout)
+        return None
+
+
+class FilterSource(EventSource):
+    """
+    Node tarafında filtre oluşturup değişiklikleri kısa aralıklarla çeker.
+    Token adresi varsa log filtresi (eth_newFilter), yoksa blok filtresi (eth_newBlockFilter).
+    Filtre node'da silinirse (timeout/restart) yeniden oluşturulur.
+    """
+
+    name = "filter"
+
+    def __init__(self, blockchain, address: str = None, poll_interval: float = None):
+        super().__init__()
+        self.blockchain = blockchain
+        self.address = address
+        self.poll_interval = poll_interval or Config.EVENT_LISTENER_FILTER_POLL
+        self._filter = None
+        self._install()
+
+    def _install(self):
+        if self.address:
+            self._filter = self.blockchain.w3.eth.filter({
+                "address": self.blockchain.w3.to_checksum_address(self.address)
+            })
+        else:
+            self._filter = self.blockchain.w3.eth.filter("latest")
+
+    def wait_for_head(self, last_block: int, timeout: float) -> Optional[int]:
+        deadline = time.monotonic() + timeout
+        while True:
+            try:
+                if self._filter is None:
+                    self._install()
+                    # Filtre yokken kaçan değişiklikler için caller kontrol etsin
+                    return None
+                if self._filter.get_new_entries():
+                    return self.blockchain.get_block_number()
+            except Exception as e:
+                logger.warning(f"Filtre okunamadı, yeniden oluşturulacak: {e}")
+                self._filter = None
+
+            remaining = deadline - time.monotonic()
+            with self._cond:
+                if self._closed or remaining <= 0:
+                    return None
+                self._cond.wait(min(self.poll_interval, remaining))
+
+    def close(self):
+        super().close()
+        try:
+            if self._filter is not None:
+                self.blockchain.w3.eth.uninstall_filter(self._filter.filter_id)
+        except Exception:
+            pass
+
+
+class WebSocketSource(EventSource):
+    """
+    eth_subscribe ile push: newHeads (her yeni blok) ve token kontratı logları.
+    Arka plan thread'i bağlantıyı tutar; koparsa artan beklemeyle yeniden bağlanır ve
+    listener'ı uyandırır (listener son işlenen bloktan eth_getLogs ile devam eder).
+    """
+
+    name = "ws"
+
+    def __init__(self, ws_url: str, address: str = None):
+        super().__init__()
+        self.ws_url = ws_url
+        self.address = address
+        self._head = 0
+        self._connected = threading.Event()
+        self._reconnected = False
+        self._ws = None
+        self._thread = threading.Thread(target=self._run, daemon=True, name='EventSource-WS')
+
+    def start(self, timeout: float = 5.0) -> bool:
+        """Bağlantıyı başlat; ilk abonelik timeout içinde kurulursa True."""
+        self._thread.start()
+        return self._connected.wait(timeout)
+
+    def wait_for_head(self, last_block: int, timeout: float) -> Optional[int]:
+        with self._cond:
+            self._cond.wait_for(lambda: self._closed or self._reconnected or self._head > last_block, timeout)
+            if self._reconnected:
+                self._reconnected = False
+                return None
+            return self._head if self._head > last_block else None
+
+    def close(self):
+        super().close()
+        ws = self._ws
+        if ws is not None:
+            try:
+                ws.close()
+            except Exception:
+                pass
+
+    def _notify(self, block_number: int):
+        with self._cond:
+            if block_number > self._head:
+                self._head = block_number
+                self._cond.notify_all()
+
+    def _run(self):
+        try:
+            from websockets.sync.client import connect
+        except ImportError as e:
+            logger.error(f"WebSocket kaynağı kullanılamıyor (websockets>=11 gerekli): {e}")
+            return
+
+        backoff = 1
+        first = True
+        while not self._closed:
+            try:
+                with connect(self.ws_url, open_timeout=5) as ws:
+                    self._ws = ws
+                    self._subscribe(ws)
+                    self._connected.set()
+                    if not first:
+                        logger.info("WebSocket aboneliği yeniden kuruldu")
+                        with self._cond:
+                            self._reconnected = True
+                            self._cond.notify_all()
+                    first = False
+                    backoff = 1
+
+                    for message in ws:
+                        data = json.loads(message)
+                        if data.get("method") != "eth_subscription":
+                            continue
+                        result = data["params"]["result"]
+                        number = result.get("number") or result.get("blockNumber")
+                        if number:
+                            self._notify(int(number, 16))
+            except Exception as e:
+                if not self._closed:
+                    logger.warning(f"WebSocket bağlantısı koptu: {e}")
+            finally:
+                self._ws = None
+                self._connected.clear()
+
+            with self._cond:
+                self._cond.wait_for(lambda: self._closed, backoff)
+            backoff = min(backoff * 2, 30)
+
+    def _subscribe(self, ws):
+        subscriptions = [["newHeads"]]
+        if self.address:
+            subscriptions.append(["logs", {"address": self.address}])
+        for request_id, params in enumerate(subscriptions, start=1):
+            ws.send(json.dumps({"jsonrpc": "2.0", "id": request_id, "method": "eth_subscribe", "params": params}))
+            response = json.loads(ws.recv(timeout=5))
+            if "error" in response:
+                raise ValueError(f"eth_subscribe {params[0]} reddedildi: {response['error']}")
+
+
+def _has_sync_websockets() -> bool:
+    """websockets'in sync client'ı var mı? (10.x ve öncesinde yok)"""
+    try:
+        importlib.import_module("websockets.sync.client")
+        return True
+    except ImportError:
+        return False
+
+
+def create_event_source(blockchain, address: str = None) -> EventSource:
+    """
+    EVENT_LISTENER_SOURCE'a göre kaynak oluştur (auto: ws -> filter -> poll).
+
+    Args:
+        blockchain: BlockchainClient (filter kaynağı için)
+        address: Token kontrat adresi (log aboneliği/filtresi için, opsiyonel)
+    """
+    mode = Config.EVENT_LISTENER_SOURCE
+
+    if mode in ("auto", "ws") and Config.BLOCKCHAIN_WS_URL:
+        if not _has_sync_websockets():
+            logger.warning("websockets>=11 (websockets.sync) bulunamadı, filter polling'e geçiliyor")
+        else:
+            source = WebSocketSource(Config.BLOCKCHAIN_WS_URL, address)
+            if source.start():
+                return source
+            source.close()
+            logger.warning("WebSocket aboneliği kurulamadı, filter polling'e geçiliyor")
+
+    if mode in ("auto", "ws", "filter"):
+        try:
+            return FilterSource(blockchain, address)
+        except Exception as e:
+            logger.warning(f"Node filtre desteklemiyor, periyodik kontrole geçiliyor: {e}")
+
+    return PollingSource()
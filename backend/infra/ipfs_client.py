@@ -1,13 +1,331 @@
 """
 IPFS client: Dosya ekleme, okuma, pin işlemleri.
 IPFS HTTP API ile iletişim.
+
+CID'ler içerik adreslidir (değişmez); okunan ve yazılan içerik CIDCache'te tutulur:
+process içi LRU (IPFS_CACHE_MAX_BYTES ile sınırlı) + opsiyonel Redis katmanı.
+
+- HTTP istekleri process genelinde paylaşılan keep-alive session havuzundan gider.
+- add_files(): birden çok içerik tek multipart /add isteğiyle yüklenir.
+- compute_cid(): `ipfs add --only-hash` ile aynı CIDv0 yerelde hesaplanır; upload_async
+  ile CID hemen döner, yükleme arka planda batch'ler halinde yapılır.
 """
+import os
 import json
+import time
+import queue
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
 import requests
-from typing import Union
+from requests.adapters import HTTPAdapter
+from typing import List, Optional, Tuple, Union
 
 from backend.config import Config
 
+logger = logging.getLogger('ipfs_client')
+
+
+class CIDCache:
+    """
+    İki katmanlı CID -> içerik cache'i.
+    1. Process içi LRU: toplam byte sınırlı, en az kullanılan önce çıkarılır
+    2. Redis (extensions.get_redis() varsa): process'ler/restart'lar arası paylaşılır.
+       Redis client'ı decode_responses=True ile açıldığından sadece UTF-8 içerik yazılır.
+    """
+
+    REDIS_PREFIX = "ipfs:cid:"
+
+    def __init__(self, max_bytes: int, redis_ttl: int = 0):
+        self.max_bytes = max_bytes
+        self.redis_ttl = redis_ttl
+        self._entries: "OrderedDict[str, bytes]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "redis_hits": 0, "misses": 0, "evictions": 0, "redis_errors": 0}
+
+    def get(self, cid: str) -> Optional[bytes]:
+        with self._lock:
+            data = self._entries.get(cid)
+            if data is not None:
+                self._entries.move_to_end(cid)
+                self._stats["hits"] += 1
+                return data
+
+        data = self._redis_get(cid)
+        if data is not None:
+            self._count("redis_hits")
+            self._store(cid, data)
+            return data
+
+        self._count("misses")
+        return None
+
+    def put(self, cid: str, data: bytes):
+        """İçeriği iki katmana da yaz (IPFS'ten okunan veya IPFS'e yazılan)."""
+        self._store(cid, data)
+        self._redis_put(cid, data)
+
+    def stats(self) -> dict:
+        """Hit/miss metrikleri ve LRU doluluğu."""
+        with self._lock:
+            stats = dict(self._stats, entries=len(self._entries), bytes=self._bytes, max_bytes=self.max_bytes)
+        lookups = stats["hits"] + stats["redis_hits"] + stats["misses"]
+        stats["hit_ratio"] = round((stats["hits"] + stats["redis_hits"]) / lookups, 4) if lookups else None
+        return stats
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def _store(self, cid: str, data: bytes):
+        if len(data) > self.max_bytes:
+            return
+        with self._lock:
+            previous = self._entries.pop(cid, None)
+            if previous is not None:
+                self._bytes -= len(previous)
+            self._entries[cid] = data
+            self._bytes += len(data)
+            while self._bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= len(evicted)
+                self._stats["evictions"] += 1
+
+    def _count(self, name: str):
+        with self._lock:
+            self._stats[name] += 1
+
+    def _redis(self):
+        if self.redis_ttl <= 0:
+            return None
+        from backend.extensions import get_redis
+        return get_redis()
+
+    def _redis_get(self, cid: str) -> Optional[bytes]:
+        redis = self._redis()
+        if redis is None:
+            return None
+        try:
+            value = redis.get(self.REDIS_PREFIX + cid)
+        except Exception as e:
+            self._count("redis_errors")
+            logger.debug(f"Redis CID cache okunamadı: {e}")
+            return None
+        if value is None:
+            return None
+        return value.encode('utf-8') if isinstance(value, str) else value
+
+    def _redis_put(self, cid: str, data: bytes):
+        redis = self._redis()
+        if redis is None:
+            return
+        try:
+            redis.set(self.REDIS_PREFIX + cid, data.decode('utf-8'), ex=self.redis_ttl)
+        except UnicodeDecodeError:
+            pass
+        except Exception as e:
+            self._count("redis_errors")
+            logger.debug(f"Redis CID cache yazılamadı: {e}")
+
+
+_cid_cache = CIDCache(Config.IPFS_CACHE_MAX_BYTES, Config.IPFS_CACHE_REDIS_TTL)
+
+
+def get_cid_cache() -> CIDCache:
+    """Process genelinde paylaşılan CID cache'i."""
+    return _cid_cache
+
+
+def _is_immutable(cid: str) -> bool:
+    """/ipns/ yolları değişebilir; cache'lenmez."""
+    return bool(cid) and not cid.startswith('/ipns/')
+
+
+# ==================== YEREL CID HESAPLAMA ====================
+# `ipfs add` varsayılanları: CIDv0, size-262144 chunker, balanced layout (düğüm başına
+# en fazla 174 link), dag-pb yaprakları (raw-leaves kapalı).
+
+_CHUNK_SIZE = 262144
+_MAX_LINKS = 174
+_BASE58_ALPHABET = "123456789ABCDEFGHJKLMNPQRSTUVWXYZabcdefghijkmnopqrstuvwxyz"
+
+
+def _varint(n: int) -> bytes:
+    out = bytearray()
+    while True:
+        byte = n & 0x7f
+        n >>= 7
+        if n:
+            out.append(byte | 0x80)
+        else:
+            out.append(byte)
+            return bytes(out)
+
+
+def _pb_bytes(field: int, data: bytes) -> bytes:
+    return _varint(field << 3 | 2) + _varint(len(data)) + data
+
+
+def _pb_varint(field: int, value: int) -> bytes:
+    return _varint(field << 3) + _varint(value)
+
+
+def _unixfs_file(data: Optional[bytes], filesize: int, blocksizes: List[int] = ()) -> bytes:
+    """UnixFS Data mesajı (Type=File)."""
+    out = _pb_varint(1, 2)
+    if data:
+        out += _pb_bytes(2, data)
+    out += _pb_varint(3, filesize)
+    for size in blocksizes:
+        out += _pb_varint(4, size)
+    return out
+
+
+def _dag_pb_node(data: bytes, links: List[Tuple[bytes, int]] = ()) -> bytes:
+    """dag-pb PBNode: önce Links (isimsiz, Tsize ile), sonra Data."""
+    out = b"".join(
+        _pb_bytes(2, _pb_bytes(1, multihash) + _pb_bytes(2, b"") + _pb_varint(3, tsize))
+        for multihash, tsize in links
+    )
+    return out + _pb_bytes(1, data)
+
+
+def _multihash(block: bytes) -> bytes:
+    return b"\x12\x20" + hashlib.sha256(block).digest()
+
+
+def _base58(data: bytes) -> str:
+    n = int.from_bytes(data, "big")
+    out = ""
+    while n:
+        n, rem = divmod(n, 58)
+        out = _BASE58_ALPHABET[rem] + out
+    return "1" * (len(data) - len(data.lstrip(b"\0"))) + out
+
+
+def compute_cid(data: bytes) -> str:
+    """
+    İçeriğin IPFS'e yüklenince alacağı CID'i (CIDv0) yerelde hesapla.
+    Node varsayılan add ayarlarıyla çalışıyorsa `ipfs add --only-hash` ile aynı sonucu verir.
+    """
+    # (multihash, Tsize: bloğun ve alt bloklarının toplam boyutu, dosya boyutu)
+    level = []
+    for offset in range(0, max(len(data), 1), _CHUNK_SIZE):
+        chunk = data[offset:offset + _CHUNK_SIZE]
+        block = _dag_pb_node(_unixfs_file(chunk, len(chunk)))
+        level.append((_multihash(block), len(block), len(chunk)))
+
+    while len(level) > 1:
+        parents = []
+        for i in range(0, len(level), _MAX_LINKS):
+            children = level[i:i + _MAX_LINKS]
+            sizes = [filesize for _, _, filesize in children]
+            block = _dag_pb_node(
+                _unixfs_file(None, sum(sizes), sizes),
+                [(multihash, tsize) for multihash, tsize, _ in children]
+            )
+            parents.append((_multihash(block), len(block) + sum(tsize for _, tsize, _ in children), sum(sizes)))
+        level = parents
+
+    return _base58(level[0][0])
+
+
+# ==================== HTTP SESSION / ARKA PLAN YÜKLEME ====================
+
+_session: Optional[requests.Session] = None
+_session_pid: Optional[int] = None
+_session_lock = threading.Lock()
+
+
+def _get_session() -> requests.Session:
+    """Process genelinde keep-alive session (fork sonrası yeniden oluşturulur)."""
+    global _session, _session_pid
+    with _session_lock:
+        if _session is None or _session_pid != os.getpid():
+            _session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=4, pool_maxsize=Config.IPFS_HTTP_POOL_SIZE)
+            _session.mount('http://', adapter)
+            _session.mount('https://', adapter)
+            _session_pid = os.getpid()
+        return _session
+
+
+class _BackgroundUploader:
+    """CID'i yerelde hesaplanmış içerikleri arka planda, batch'ler halinde IPFS'e yükler."""
+
+    def __init__(self, batch_size: int, retries: int = 3):
+        self.batch_size = max(1, batch_size)
+        self.retries = retries
+        self._queue: queue.Queue = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    def submit(self, cid: str, data: bytes, filename: str):
+        self._ensure_thread()
+        self._queue.put((cid, data, filename))
+
+    def pending(self) -> int:
+        return self._queue.unfinished_tasks
+
+    def _ensure_thread(self):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, daemon=True, name='IPFSUploader')
+                self._thread.start()
+
+    def _run(self):
+        client = IPFSClient()
+        while True:
+            batch = [self._queue.get()]
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                self._upload(client, batch)
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    def _upload(self, client: "IPFSClient", batch: list):
+        for attempt in range(1, self.retries + 1):
+            try:
+                cids = client.add_files([(data, filename) for _, data, filename in batch])
+                break
+            except Exception as e:
+                if attempt == self.retries:
+                    logger.error(f"IPFS arka plan yüklemesi başarısız ({len(batch)} içerik), outbox'a alınıyor: {e}")
+                    self._to_outbox(batch)
+                    return
+                time.sleep(attempt)
+
+        for (expected, _, _), cid in zip(batch, cids):
+            if cid != expected:
+                logger.error(f"IPFS CID uyuşmazlığı: yerel {expected}, node {cid} (node add ayarları farklı)")
+
+    def _to_outbox(self, batch: list):
+        from backend.infra.ipfs_outbox import get_ipfs_outbox
+
+        outbox = get_ipfs_outbox()
+        for cid, data, _ in batch:
+            try:
+                outbox.enqueue("upload", data, cid=cid)
+            except Exception as e:
+                logger.error(f"IPFS outbox'a yazılamadı ({cid}): {e}")
+
+
+_uploader = _BackgroundUploader(Config.IPFS_UPLOAD_BATCH_SIZE)
+
+
+def _json_bytes(data: Union[str, dict]) -> bytes:
+    if isinstance(data, dict):
+        data = json.dumps(data)
+    return data.encode('utf-8')
+
 
 class IPFSClient:
     """
@@ -23,6 +341,8 @@ class IPFSClient:
         """
         self.api_url = (api_url or Config.IPFS_API_URL).rstrip('/')
         self.timeout = 30  # saniye
+        self.cache = _cid_cache
+        self.session = _get_session()
 
     def get_version(self) -> str:
         """
@@ -31,46 +351,82 @@ class IPFSClient:
         Returns:
             Versiyon string
         """
-        response = requests.post(
+        response = self.session.post(
             f'{self.api_url}/version',
             timeout=self.timeout
         )
         response.raise_for_status()
         return response.json().get('Version')
 
-    def add_file(self, data: bytes, filename: str = 'file') -> str:
+    def add_file(self, data: bytes, filename: str = 'file', only_hash: bool = False, upload_async: bool = False) -> str:
         """
         Dosyayı IPFS'e yükle.
 
         Args:
             data: Dosya içeriği (bytes)
             filename: Dosya adı
+            only_hash: Yükleme yapma, sadece CID'i yerelde hesapla (--only-hash)
+            upload_async: CID'i yerelde hesaplayıp hemen dön, yüklemeyi arka planda yap
 
         Returns:
             CID (Content ID)
         """
-        files = {'file': (filename, data)}
-        response = requests.post(
+        if only_hash:
+            return compute_cid(data)
+        if upload_async:
+            cid = compute_cid(data)
+            # Yükleme bitmeden gelen okumalar cache'ten karşılanır
+            self.cache.put(cid, data)
+            _uploader.submit(cid, data, filename)
+            return cid
+        return self.add_files([(data, filename)])[0]
+
+    def add_files(self, files: List[Tuple[bytes, str]]) -> List[str]:
+        """
+        Birden çok dosyayı tek multipart /add isteğiyle yükle.
+
+        Args:
+            files: [(içerik, dosya adı), ...]
+
+        Returns:
+            CID listesi (aynı sırayla)
+        """
+        if not files:
+            return []
+        response = self.session.post(
             f'{self.api_url}/add',
-            files=files,
+            files=[('file', (filename, data)) for data, filename in files],
             timeout=self.timeout
         )
         response.raise_for_status()
-        return response.json().get('Hash')
 
-    def add_json(self, data: Union[str, dict]) -> str:
+        # Her dosya için bir JSON satırı (NDJSON)
+        cids = [json.loads(line).get('Hash') for line in response.text.splitlines() if line.strip()]
+        if len(cids) != len(files):
+            raise ValueError(f"IPFS add {len(files)} dosya için {len(cids)} sonuç döndürdü")
+        for (data, _), cid in zip(files, cids):
+            # Yazılan içerik hemen okunacaksa (ör. template detayı) IPFS'e gidilmez
+            self.cache.put(cid, data)
+        return cids
+
+    def add_json(self, data: Union[str, dict], only_hash: bool = False, upload_async: bool = False) -> str:
         """
         JSON verisini IPFS'e yükle.
 
         Args:
             data: JSON string veya dict
+            only_hash / upload_async: bkz. add_file
 
         Returns:
             CID (Content ID)
         """
-        if isinstance(data, dict):
-            data = json.dumps(data)
-        return self.add_file(data.encode('utf-8'), 'data.json')
+        return self.add_file(_json_bytes(data), 'data.json', only_hash=only_hash, upload_async=upload_async)
+
+    def add_json_many(self, items: List[Union[str, dict]], upload_async: bool = False) -> List[str]:
+        """Birden çok JSON'u tek /add isteğiyle (veya upload_async ile arka planda) yükle."""
+        if upload_async:
+            return [self.add_json(item, upload_async=True) for item in items]
+        return self.add_files([(_json_bytes(item), 'data.json') for item in items])
 
     def cat_file(self, cid: str) -> bytes:
         """
@@ -82,12 +438,20 @@ class IPFSClient:
         Returns:
             Dosya içeriği (bytes)
         """
-        response = requests.post(
+        cacheable = _is_immutable(cid)
+        if cacheable:
+            data = self.cache.get(cid)
+            if data is not None:
+                return data
+
+        response = self.session.post(
             f'{self.api_url}/cat',
             params={'arg': cid},
             timeout=self.timeout
         )
         response.raise_for_status()
+        if cacheable:
+            self.cache.put(cid, response.content)
         return response.content
 
     def cat_json(self, cid: str) -> dict:
@@ -113,7 +477,7 @@ class IPFSClient:
         Returns:
             Pin sonucu
         """
-        response = requests.post(
+        response = self.session.post(
             f'{self.api_url}/pin/add',
             params={'arg': cid},
             timeout=self.timeout
@@ -131,7 +495,7 @@ class IPFSClient:
         Returns:
             Unpin sonucu
         """
-        response = requests.post(
+        response = self.session.post(
             f'{self.api_url}/pin/rm',
             params={'arg': cid},
             timeout=self.timeout
@@ -146,7 +510,7 @@ class IPFSClient:
         Returns:
             Pin listesi
         """
-        response = requests.post(
+        response = self.session.post(
             f'{self.api_url}/pin/ls',
             timeout=self.timeout
         )
@@ -164,7 +528,7 @@ class IPFSClient:
         Returns:
             Stat bilgileri (size, blocks vs.)
         """
-        response = requests.post(
+        response = self.session.post(
             f'{self.api_url}/object/stat',
             params={'arg': cid},
             timeout=self.timeout
@@ -0,0 +1,298 @@
+"""
+IPFS Outbox: IPFS'e yazılamayan içeriklerin kalıcı yükleme kuyruğu.
+
+IPFS erişilemezken oluşturulan template'ler (pending_ipfs), transfer metadata'sı ve
+arka plan yüklemeleri data/ipfs_outbox.db'ye yazılır; worker'lar kuyruğu üstel
+bekleme (exponential backoff) ile boşaltır ve oluşan CID'i ledger'a işler.
+
+- Kayıt türleri (kind):
+    template    -> templates_index[target].cid (içerik hâlâ _backup_data ise)
+    transaction -> transactions[target].<field> (ipfs_cid / template_snapshot_cid)
+    upload      -> sadece yükleme (CID ledger'a önceden yerelde hesaplanıp yazıldı)
+- Aynı içerik aynı hedefe bir kez kuyruklanır (kind, target, field, cid tekil).
+- Worker sayısı IPFS_OUTBOX_WORKERS ile sınırlıdır; her worker kayıtları lease ile
+  sahiplenir, birden çok process aynı kuyruğu güvenle boşaltabilir.
+- Yükleme ve ledger'a yazma ledger _lock'u dışında yapılır; ledger sadece normal
+  yazma yolları (update_transaction, backfill_template_cid) ile güncellenir.
+"""
+import os
+import json
+import time
+import sqlite3
+import logging
+import threading
+from datetime import datetime
+from typing import List, Optional, Union
+
+from backend.config import Config
+
+logger = logging.getLogger('ipfs_outbox')
+
+OUTBOX_FILE = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'data', 'ipfs_outbox.db')
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS outbox (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    kind TEXT NOT NULL,
+    target TEXT NOT NULL DEFAULT '',
+    field TEXT NOT NULL DEFAULT '',
+    cid TEXT NOT NULL,
+    payload BLOB NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    next_attempt_at REAL NOT NULL,
+    last_error TEXT,
+    created_at TEXT NOT NULL,
+    UNIQUE (kind, target, field, cid)
+);
+CREATE INDEX IF NOT EXISTS idx_outbox_due ON outbox(next_attempt_at);
+"""
+
+
+class IPFSOutbox:
+    """Kalıcı IPFS yükleme kuyruğu ve worker'ları."""
+
+    def __init__(
+        self,
+        db_file: str = None,
+        workers: int = None,
+        batch_size: int = None,
+        base_delay: float = None,
+        max_delay: float = None,
+        poll_interval: float = None
+    ):
+        self.db_file = db_file or OUTBOX_FILE
+        self.workers = max(1, workers or Config.IPFS_OUTBOX_WORKERS)
+        self.batch_size = max(1, batch_size or Config.IPFS_UPLOAD_BATCH_SIZE)
+        self.base_delay = base_delay or Config.IPFS_OUTBOX_BASE_DELAY
+        self.max_delay = max_delay or Config.IPFS_OUTBOX_MAX_DELAY
+        self.poll_interval = poll_interval or Config.IPFS_OUTBOX_POLL
+        # Sahiplenilen kayıt bu süre içinde işlenmezse (process öldüyse) tekrar dağıtılır;
+        # IPFS istek timeout'unun (30 sn) üzerinde olmalı
+        self.lease = 60
+
+        self._conn: Optional[sqlite3.Connection] = None
+        self._pid: Optional[int] = None
+        self._db_lock = threading.Lock()
+        self._wake = threading.Condition()
+        self._threads: List[threading.Thread] = []
+        self._start_lock = threading.Lock()
+        self._stop_event = threading.Event()
+
+    # ==================== KUYRUK ====================
+
+    def enqueue(self, kind: str, payload: Union[bytes, str, dict], target=None, field: str = None, cid: str = None) -> str:
+        """
+        İçeriği yükleme kuyruğuna ekle (aynı kayıt varsa tekrar eklenmez).
+
+        Args:
+            kind: template | transaction | upload
+            payload: Yüklenecek içerik (dict/str JSON olarak yazılır, IPFSClient.add_json ile aynı)
+            target: template_id veya tx_id
+            field: Transaction'da CID'in yazılacağı alan
+            cid: Önceden hesaplanmış CID (yoksa yerelde hesaplanır)
+
+        Returns:
+            İçeriğin CID'i
+        """
+        from backend.infra.ipfs_client import compute_cid, _json_bytes
+
+        data = payload if isinstance(payload, bytes) else _json_bytes(payload)
+        cid = cid or compute_cid(data)
+        with self._db() as conn:
+            conn.execute(
+                "INSERT OR IGNORE INTO outbox (kind, target, field, cid, payload, next_attempt_at, created_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (kind, str(target) if target is not None else '', field or '', cid, data,
+                 time.time(), datetime.utcnow().isoformat())
+            )
+        self.start()
+        with self._wake:
+            self._wake.notify_all()
+        return cid
+
+    def pending(self) -> List[dict]:
+        """Bekleyen kayıtlar (payload hariç)."""
+        with self._db() as conn:
+            rows = conn.execute(
+                "SELECT id, kind, target, field, cid, attempts, next_attempt_at, last_error, created_at "
+                "FROM outbox ORDER BY id"
+            ).fetchall()
+        keys = ("id", "kind", "target", "field", "cid", "attempts", "next_attempt_at", "last_error", "created_at")
+        return [dict(zip(keys, row)) for row in rows]
+
+    def stats(self) -> dict:
+        with self._db() as conn:
+            total, failing = conn.execute("SELECT COUNT(*), COALESCE(SUM(attempts > 0), 0) FROM outbox").fetchone()
+        return {"pending": total, "retrying": failing, "workers": self.workers}
+
+    # ==================== WORKER'LAR ====================
+
+    def start(self):
+        """Worker thread'lerini başlat (process başına bir kez; fork sonrası yeniden)."""
+        with self._start_lock:
+            self._threads = [t for t in self._threads if t.is_alive()]
+            if self._threads:
+                return
+            self._stop_event.clear()
+            for i in range(self.workers):
+                thread = threading.Thread(target=self._run, daemon=True, name=f'IPFSOutbox-{i}')
+                thread.start()
+                self._threads.append(thread)
+
+    def stop(self, timeout: float = 5):
+        self._stop_event.set()
+        with self._wake:
+            self._wake.notify_all()
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+
+    def drain_once(self) -> int:
+        """Vadesi gelen bir batch'i sahiplen, yükle ve ledger'a işle. İşlenen kayıt sayısı."""
+        batch = self._claim()
+        if batch:
+            self._process(batch)
+        return len(batch)
+
+    def _run(self):
+        while not self._stop_event.is_set():
+            try:
+                if self.drain_once():
+                    continue
+            except Exception as e:
+                logger.error(f"IPFS outbox hatası: {e}")
+            with self._wake:
+                self._wake.wait(self.poll_interval)
+
+    def _claim(self) -> list:
+        now = time.time()
+        with self._db("IMMEDIATE") as conn:
+            rows = conn.execute(
+                "SELECT id, kind, target, field, cid, payload, attempts FROM outbox "
+                "WHERE next_attempt_at <= ? ORDER BY next_attempt_at LIMIT ?",
+                (now, self.batch_size)
+            ).fetchall()
+            if rows:
+                conn.executemany(
+                    "UPDATE outbox SET next_attempt_at = ? WHERE id = ?",
+                    [(now + self.lease, row[0]) for row in rows]
+                )
+        return rows
+
+    def _process(self, batch: list):
+        from backend.infra.ipfs_client import IPFSClient
+
+        try:
+            cids = IPFSClient().add_files([(bytes(row[5]), 'data.json') for row in batch])
+        except Exception as e:
+            for row in batch:
+                self._retry(row, f"upload: {e}")
+            logger.warning(f"IPFS outbox: {len(batch)} içerik yüklenemedi, tekrar denenecek: {e}")
+            return
+
+        for row, cid in zip(batch, cids):
+            if cid != row[4]:
+                logger.error(f"IPFS outbox CID uyuşmazlığı: beklenen {row[4]}, node {cid}")
+            try:
+                self._backfill(row, cid)
+            except Exception as e:
+                self._retry(row, f"backfill: {e}")
+                continue
+            with self._db() as conn:
+                conn.execute("DELETE FROM outbox WHERE id = ?", (row[0],))
+
+    def _backfill(self, row, cid: str):
+        """Yüklenen içeriğin CID'ini hedef kayda yaz."""
+        from backend.infra.opencbdc_storage import OpenCBDCLedger
+
+        _, kind, target, field, _, payload, _ = row
+        if kind == "template":
+            result = OpenCBDCLedger.backfill_template_cid(target, cid, json.loads(bytes(payload)))
+        elif kind == "transaction":
+            result = OpenCBDCLedger.update_transaction(int(target), **{field: cid})
+        else:
+            return
+
+        if result.get("status") == "stale":
+            logger.info(f"IPFS outbox: {kind} {target} güncellenmiş, CID yazılmadı")
+        elif "error" in result:
+            raise ValueError(result["error"])
+        else:
+            logger.info(f"IPFS outbox: {kind} {target} {field or 'cid'} = {cid}")
+
+    def _retry(self, row, error: str):
+        attempts = row[6] + 1
+        delay = min(self.max_delay, self.base_delay * (2 ** (attempts - 1)))
+        with self._db() as conn:
+            conn.execute(
+                "UPDATE outbox SET attempts = ?, next_attempt_at = ?, last_error = ? WHERE id = ?",
+                (attempts, time.time() + delay, error[:200], row[0])
+            )
+
+    # ==================== SQLITE ====================
+
+    def _db(self, mode: str = ""):
+        return _Transaction(self, mode)
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None or self._pid != os.getpid():
+            os.makedirs(os.path.dirname(self.db_file), exist_ok=True)
+            conn = sqlite3.connect(self.db_file, timeout=30, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(_SCHEMA)
+            self._conn = conn
+            self._pid = os.getpid()
+        return self._conn
+
+
+class _Transaction:
+    """Process içi lock + SQLite transaction (BEGIN [IMMEDIATE] ... COMMIT/ROLLBACK)."""
+
+    def __init__(self, outbox: IPFSOutbox, mode: str):
+        self.outbox = outbox
+        self.mode = mode
+
+    def __enter__(self) -> sqlite3.Connection:
+        self.outbox._db_lock.acquire()
+        try:
+            self.conn = self.outbox._connect()
+            self.conn.execute(f"BEGIN {self.mode}")
+        except BaseException:
+            self.outbox._db_lock.release()
+            raise
+        return self.conn
+
+    def __exit__(self, exc_type, exc, tb):
+        try:
+            self.conn.execute("ROLLBACK" if exc_type else "COMMIT")
+        finally:
+            self.outbox._db_lock.release()
+
+
+_outbox: Optional[IPFSOutbox] = None
+_outbox_pid: Optional[int] = None
+_outbox_lock = threading.Lock()
+
+
+def get_ipfs_outbox() -> IPFSOutbox:
+    """Process genelinde tek outbox (fork sonrası worker'ları ile birlikte yeniden oluşturulur)."""
+    global _outbox, _outbox_pid
+    with _outbox_lock:
+        if _outbox is None or _outbox_pid != os.getpid():
+            _outbox = IPFSOutbox()
+            _outbox_pid = os.getpid()
+        return _outbox
+
+
+def start_ipfs_outbox():
+    """
+    Worker'ları başlat ve kuyruğa hiç girmemiş pending_ipfs template'lerini ekle
+    (ör. ledger commit'i ile kuyruklama arasında process kapandıysa).
+    """
+    from backend.infra.opencbdc_storage import OpenCBDCLedger
+
+    outbox = get_ipfs_outbox()
+    for template_id, backup in OpenCBDCLedger.get_pending_ipfs_templates().items():
+        outbox.enqueue("template", backup, target=template_id)
+    outbox.start()
+    return outbox
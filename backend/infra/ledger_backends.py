@@ -0,0 +1,739 @@
+"""
+OpenCBDC Ledger Storage Backend'leri.
+OpenCBDCLedger'ın kalıcılık katmanı: bellekteki state ve index'ler
+opencbdc_storage'da kalır; backend ledger'ın yüklenmesinden, commit edilen
+değişiklik kayıtlarının (ops) kalıcı yazılmasından, diğer process'lerin
+commit'lerinin okunmasından ve validator görünümlerinden sorumludur.
+
+- JsonLedgerBackend: JSON snapshot + (opsiyonel) WAL + hardlink validator replikaları
+- SqliteLedgerBackend: WAL modunda gömülü SQLite; accounts/utxos/transactions/
+  templates_index için index'li tablolar ve process'ler arası değişiklik tablosu
+
+Backend Config.LEDGER_BACKEND ile seçilir ("json" | "sqlite").
+"""
+import os
+import json
+import sqlite3
+import threading
+import logging
+from contextlib import contextmanager
+from datetime import datetime
+from decimal import Decimal
+from typing import Dict, List, Optional
+
+from backend.infra.ledger_wal import WriteAheadLog
+from backend.infra.ledger_replication import LedgerReplicator
+from backend.infra.ledger_process_lock import ProcessFileLock
+
+logger = logging.getLogger('ledger_backends')
+
+# UTXO set formatı: çıktılar "unspent"/"spent" durumu taşır, bakiyeler harcanmamış
+# çıktılardan türetilebilir. Bu versiyondan eski ledger'lar açılışta dönüştürülür.
+UTXO_SET_VERSION = 1
+
+
+class DecimalEncoder(json.JSONEncoder):
+    """JSON encoder that handles Decimal types."""
+    def default(self, obj):
+        if isinstance(obj, Decimal):
+            return str(obj)
+        return super().default(obj)
+
+
+def empty_ledger() -> dict:
+    """Boş ledger yapısı."""
+    return {
+        "accounts": {},
+        "utxos": [],
+        "transactions": [],
+        "templates_index": {},
+        "metadata": {
+            "created_at": datetime.utcnow().isoformat(),
+            "version": "2.0",
+            "currency": "DTL",
+            "last_tx_id": 0,
+            "total_supply": "0",
+            "utxo_set_version": UTXO_SET_VERSION
+        }
+    }
+
+
+def ensure_aggregates(ledger: dict) -> dict:
+    """
+    Running aggregate'leri (tx_id sequence, toplam arz) metadata'ya ekle.
+    Eski formattaki ledger'lar için sadece yüklemede bir kez hesaplanır;
+    sonrasında apply_op her mutasyonda günceller.
+    """
+    metadata = ledger.setdefault("metadata", {})
+    if "last_tx_id" not in metadata:
+        metadata["last_tx_id"] = max((tx["tx_id"] for tx in ledger["transactions"]), default=0)
+    if "total_supply" not in metadata:
+        metadata["total_supply"] = str(sum(
+            (Decimal(acc["balance"]) for acc in ledger["accounts"].values()),
+            Decimal("0")
+        ))
+    return ledger
+
+
+def apply_op(ledger: dict, op: list, lookup: Optional["RecordLookup"] = None):
+    """
+    Tek bir değişiklik kaydını bellekteki ledger'a uygula.
+    Canlı commit'lerde, WAL replay'inde ve diğer process'lerin kayıtlarında kullanılır.
+
+    Op formatları:
+        ["acc", address, account]     -> hesabı yaz/güncelle
+        ["utxo", utxo]                -> UTXO (çıktı) ekle
+        ["spend", utxo_id, fields]    -> UTXO'yu harca (fields: status, spent_by_tx, spent_at)
+        ["tx", transaction]           -> transaction ekle
+        ["txupd", tx_id, fields]      -> transaction alanlarını güncelle (pipeline sonuçları)
+        ["tpl", template_id, entry]   -> template index kaydını yaz/güncelle
+        ["meta", key, value]          -> metadata alanı yaz
+
+    metadata.total_supply ve metadata.last_tx_id burada artımlı güncellenir.
+    lookup: ID -> kayıt eşlemeleri ("spend"/"txupd" için; verilmezse liste taranır).
+    Aynı kayıt nesneleri listede ve eşlemede paylaşılır, güncellemeler yerinde yapılır.
+    """
+    kind = op[0]
+    metadata = ledger["metadata"]
+    if kind == "acc":
+        previous = ledger["accounts"].get(op[1])
+        delta = Decimal(op[2]["balance"]) - (Decimal(previous["balance"]) if previous else 0)
+        if delta:
+            metadata["total_supply"] = str(Decimal(metadata["total_supply"]) + delta)
+        ledger["accounts"][op[1]] = op[2]
+    elif kind == "utxo":
+        ledger["utxos"].append(op[1])
+        if lookup is not None:
+            lookup.utxo_by_id[op[1]["utxo_id"]] = op[1]
+    elif kind == "spend":
+        if lookup is not None:
+            utxo = lookup.utxo_by_id[op[1]]
+        else:
+            utxo = next(u for u in reversed(ledger["utxos"]) if u["utxo_id"] == op[1])
+        utxo.update(op[2])
+    elif kind == "tx":
+        ledger["transactions"].append(op[1])
+        metadata["last_tx_id"] = max(metadata["last_tx_id"], op[1]["tx_id"])
+        if lookup is not None:
+            lookup.tx_by_id[op[1]["tx_id"]] = op[1]
+    elif kind == "txupd":
+        if lookup is not None:
+            tx = lookup.tx_by_id[op[1]]
+        else:
+            tx = next(t for t in reversed(ledger["transactions"]) if t["tx_id"] == op[1])
+        tx.update(op[2])
+    elif kind == "tpl":
+        ledger.setdefault("templates_index", {})[op[1]] = op[2]
+    elif kind == "meta":
+        metadata[op[1]] = op[2]
+    else:
+        raise ValueError(f"Bilinmeyen ledger op: {kind}")
+
+
+class RecordLookup:
+    """
+    Replay için UTXO/transaction ID -> kayıt eşlemeleri (bkz. apply_op).
+    opencbdc_storage'daki _LedgerIndex aynı alanları sağlar.
+    """
+
+    def __init__(self, ledger: dict):
+        self.utxo_by_id = {utxo["utxo_id"]: utxo for utxo in ledger["utxos"]}
+        self.tx_by_id = {tx["tx_id"]: tx for tx in ledger["transactions"]}
+
+
+class LedgerBackend:
+    """
+    Ledger kalıcılık arayüzü.
+
+    Çağıran taraf (opencbdc_storage) process içinde kendi _lock'u altında çağırır;
+    write_section()/read_section() process'ler arası sıralamayı sağlar.
+    Sıra numarası bellekteki ledger'da metadata.wal_seq olarak tutulur.
+    """
+
+    def load(self, repair: bool = False) -> dict:
+        """Kalıcı ledger'ı tam olarak oku (repair sadece ilk açılışta)."""
+        raise NotImplementedError
+
+    def changed(self) -> bool:
+        """Son load/poll'dan sonra başka bir process commit yapmış olabilir mi? (ucuz kontrol)"""
+        raise NotImplementedError
+
+    def poll(self, ledger: dict) -> Optional[List[dict]]:
+        """
+        Diğer process'lerin ledger'dan sonraki commit kayıtlarını ({"seq", "ops"}) döndür.
+        None: artımlı okuma mümkün değil (checkpoint/reset), load() ile yeniden yüklenmeli.
+        """
+        raise NotImplementedError
+
+    def write_section(self):
+        """Process'ler arası exclusive commit bölümü (context manager)."""
+        raise NotImplementedError
+
+    def read_section(self):
+        """poll()/load() için tutarlı okuma bölümü (context manager)."""
+        raise NotImplementedError
+
+    def append(self, ledger: dict, ops: list) -> int:
+        """
+        Bellekteki ledger'a uygulanmış op'ları kalıcı yaz (write_section içinde).
+
+        Returns:
+            wait_durable() için log sequence numarası (gerekmiyorsa 0)
+        """
+        raise NotImplementedError
+
+    def wait_durable(self, lsn: int):
+        """append() ile yazılan kayıt kalıcı olana kadar bekle (lock dışında)."""
+
+    def checkpoint(self, ledger: dict, force: bool = False):
+        """Değişiklik log'unu sıkıştır (write_section içinde)."""
+
+    def reset(self, ledger: dict):
+        """Tüm kalıcı veriyi sil ve verilen (boş) ledger'ı yaz (write_section içinde)."""
+        raise NotImplementedError
+
+    def read_validator(self, validator_name: str, min_seq: int = 0) -> Optional[dict]:
+        """
+        Validator'ın ledger görünümü; en az min_seq'e kadarki commit'leri içerir.
+        Ledger _lock'u ve read_section dışında çağrılır (commit'leri bekletmez).
+        """
+        raise NotImplementedError
+
+    def close(self):
+        """Açık dosya/bağlantıları kapat."""
+
+
+def _file_stamp(filepath: str) -> Optional[tuple]:
+    """Dosyanın değişip değişmediğini anlamak için stat damgası (yoksa None)."""
+    try:
+        st = os.stat(filepath)
+    except FileNotFoundError:
+        return None
+    return st.st_ino, st.st_mtime_ns, st.st_size
+
+
+def _atomic_write(filepath: str, content: str, fsync: bool = False):
+    """Dosyayı geçici dosya + rename ile yaz (yarım yazılmış dosya kalmaz)."""
+    tmp_path = f"{filepath}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        f.write(content)
+        if fsync:
+            f.flush()
+            os.fsync(f.fileno())
+    os.replace(tmp_path, filepath)
+
+
+def _read_json_ledger(filepath: str) -> dict:
+    """Ledger JSON dosyasını oku (yoksa/bozuksa boş ledger)."""
+    if not os.path.exists(filepath):
+        return empty_ledger()
+    try:
+        with open(filepath, 'r', encoding='utf-8') as f:
+            return ensure_aggregates(json.load(f))
+    except json.JSONDecodeError:
+        return empty_ledger()
+
+
+class JsonLedgerBackend(LedgerBackend):
+    """
+    JSON dosya tabanlı backend.
+
+    - WAL kapalıyken her commit'te snapshot (ana ledger dosyası) yazılır.
+    - WAL açıkken her commit WAL'a tek satır eklenir; belirli sayıda kayıttan
+      sonra snapshot alınır ve WAL boşaltılır.
+    - Validator replikaları snapshot'tan arka planda hardlink ile oluşturulur.
+    - Process'ler arası sıralama lock dosyası üzerinde flock ile yapılır.
+    """
+
+    def __init__(
+        self,
+        ledger_file: str,
+        validator_files: Dict[str, str],
+        wal_file: str,
+        lock_file: str,
+        wal_enabled: bool = True,
+        group_commit_ms: int = 2,
+        checkpoint_interval: int = 1000
+    ):
+        self.ledger_file = ledger_file
+        self.validator_files = validator_files
+        self.checkpoint_interval = checkpoint_interval
+        self._wal: Optional[WriteAheadLog] = (
+            WriteAheadLog(wal_file, group_commit_ms, encoder=DecimalEncoder)
+            if wal_enabled else None
+        )
+        self._replicator = LedgerReplicator(ledger_file, validator_files)
+        self._process_lock = ProcessFileLock(lock_file)
+
+        # Diskteki durumun bu process'te görülen hali:
+        # snapshot dosyasının stat damgası ve WAL'da okunmuş son byte offset'i
+        self._snapshot_stamp: Optional[tuple] = None
+        self._wal_offset = 0
+
+        # Son checkpoint'ten beri WAL'daki kayıt sayısı ve son checkpoint'in seq'i
+        self._records_since_checkpoint = 0
+        self._checkpoint_seq = 0
+
+    def load(self, repair: bool = False) -> dict:
+        """Son snapshot'ı oku ve WAL'daki sonraki commit'leri üzerine uygula."""
+        os.makedirs(os.path.dirname(self.ledger_file), exist_ok=True)
+        self._snapshot_stamp = _file_stamp(self.ledger_file)
+        ledger = _read_json_ledger(self.ledger_file)
+        if self._wal is None:
+            return ledger
+
+        self._checkpoint_seq = ledger["metadata"].get("wal_seq", 0)
+
+        replayed = 0
+        self._wal_offset = 0
+        lookup = RecordLookup(ledger)
+        for record, end in self._wal.read(repair=repair):
+            self._wal_offset = end
+            if record.get("seq", 0) <= ledger["metadata"].get("wal_seq", 0):
+                continue
+            for op in record["ops"]:
+                apply_op(ledger, op, lookup)
+            ledger["metadata"]["wal_seq"] = record["seq"]
+            replayed += 1
+
+        if replayed and repair:
+            logger.info(f"WAL recovery: {replayed} commit snapshot üzerine uygulandı.")
+        self._records_since_checkpoint = replayed
+        return ledger
+
+    def changed(self) -> bool:
+        if _file_stamp(self.ledger_file) != self._snapshot_stamp:
+            return True
+        if self._wal is None:
+            return False
+        try:
+            return os.path.getsize(self._wal.path) != self._wal_offset
+        except FileNotFoundError:
+            return self._wal_offset != 0
+
+    def poll(self, ledger: dict) -> Optional[List[dict]]:
+        # Snapshot değiştiyse (checkpoint/reset) WAL'ın eski kısmı artık yok
+        if _file_stamp(self.ledger_file) != self._snapshot_stamp:
+            return None
+        if self._wal is None:
+            return []
+
+        records = []
+        last_seq = ledger["metadata"].get("wal_seq", 0)
+        for record, end in self._wal.read(self._wal_offset):
+            self._wal_offset = end
+            if record["seq"] <= last_seq:
+                continue
+            records.append(record)
+            last_seq = record["seq"]
+            self._records_since_checkpoint += 1
+        return records
+
+    def write_section(self):
+        return self._process_lock
+
+    def read_section(self):
+        # Checkpoint (snapshot + WAL truncate) yarıda görülmesin
+        return self._process_lock
+
+    def append(self, ledger: dict, ops: list) -> int:
+        if self._wal is None:
+            self._save(ledger)
+            return 0
+
+        seq = ledger["metadata"].get("wal_seq", 0) + 1
+        ledger["metadata"]["wal_seq"] = seq
+        lsn = self._wal.append({"seq": seq, "ops": ops})
+        self._wal_offset = self._wal.offset
+
+        self._records_since_checkpoint += 1
+        if self._records_since_checkpoint >= self.checkpoint_interval:
+            self.checkpoint(ledger)
+        return lsn
+
+    def wait_durable(self, lsn: int):
+        if self._wal is not None and lsn:
+            self._wal.wait_durable(lsn)
+
+    def checkpoint(self, ledger: dict, force: bool = False):
+        """Snapshot al ve WAL'ı boşalt."""
+        if self._wal is None or not (force or self._records_since_checkpoint):
+            return
+        self._save(ledger, fsync=True)
+        self._wal.truncate()
+        self._wal_offset = 0
+        self._records_since_checkpoint = 0
+        self._checkpoint_seq = ledger["metadata"].get("wal_seq", 0)
+
+    def reset(self, ledger: dict):
+        for filepath in [self.ledger_file] + list(self.validator_files.values()):
+            if os.path.exists(filepath):
+                os.remove(filepath)
+        self._snapshot_stamp = None
+        if self._wal is not None:
+            # Boş snapshot + boş WAL (metadata kaybolmasın)
+            self.checkpoint(ledger, force=True)
+
+    def read_validator(self, validator_name: str, min_seq: int = 0) -> Optional[dict]:
+        """
+        Replika dosyası (son snapshot) okunur; WAL modunda snapshot'tan sonraki
+        commit'ler (delta) ortak WAL'dan replika üzerine uygulanır.
+
+        Lock almadan okunur: okuma sırasında checkpoint alınırsa (WAL kırpıldı,
+        replika eski) delta kesintili kalır; yeni snapshot yayılıp tekrar denenir.
+        """
+        filepath = self.validator_files.get(validator_name)
+        if not filepath:
+            return None
+
+        if self._wal is None:
+            self._replicator.sync()
+            return _read_json_ledger(filepath)
+
+        for _ in range(5):
+            self._replicator.sync()
+            ledger = _read_json_ledger(filepath)
+            if self._apply_wal_delta(ledger, min_seq):
+                return ledger
+            # Checkpoint başka bir process'te alınmış olabilir; replikayı buradan da yay
+            self._replicator.publish()
+
+        # Art arda checkpoint'lerle yarışıldı (çok nadir): checkpoint'leri kısa süre durdurarak oku
+        with self._process_lock:
+            self._replicator.publish()
+            self._replicator.sync()
+            ledger = _read_json_ledger(filepath)
+            self._apply_wal_delta(ledger, min_seq)
+        return ledger
+
+    def _apply_wal_delta(self, ledger: dict, min_seq: int) -> bool:
+        """
+        Snapshot'tan sonraki WAL kayıtlarını uygula.
+
+        Returns:
+            Kayıtlar snapshot'ın hemen arkasından kesintisiz geldi ve min_seq'e ulaşıldıysa True
+        """
+        seq = ledger["metadata"].get("wal_seq", 0)
+        lookup = RecordLookup(ledger)
+        for record in self._wal.replay(after_seq=seq):
+            if record["seq"] != seq + 1:
+                return False
+            for op in record["ops"]:
+                apply_op(ledger, op, lookup)
+            seq = ledger["metadata"]["wal_seq"] = record["seq"]
+        return seq >= min_seq
+
+    def close(self):
+        # Son checkpoint'in snapshot'ı replikalara ulaşmadan (daemon) replikasyon thread'i ölmesin
+        self._replicator.sync()
+        if self._wal is not None:
+            self._wal.close()
+
+    def _save(self, ledger: dict, fsync: bool = False):
+        """
+        Kalıcılık sınırı: ledger'ı ana ledger dosyasına yaz (tek serialize, tek yazma).
+        Validator replikaları _replicator tarafından arka planda güncellenir.
+        """
+        content = json.dumps(ledger, indent=2, ensure_ascii=False, cls=DecimalEncoder)
+        _atomic_write(self.ledger_file, content, fsync=fsync)
+        self._snapshot_stamp = _file_stamp(self.ledger_file)
+        self._replicator.publish()
+
+
+_SQLITE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS accounts (
+    address TEXT PRIMARY KEY,
+    balance TEXT NOT NULL,
+    data TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS utxos (
+    utxo_id TEXT PRIMARY KEY,
+    sender TEXT,
+    receiver TEXT,
+    timestamp TEXT,
+    status TEXT,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_utxos_sender ON utxos(sender);
+CREATE INDEX IF NOT EXISTS idx_utxos_receiver ON utxos(receiver);
+CREATE TABLE IF NOT EXISTS transactions (
+    tx_id INTEGER PRIMARY KEY,
+    sender TEXT,
+    receiver TEXT,
+    created_at TEXT,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_transactions_sender ON transactions(sender);
+CREATE INDEX IF NOT EXISTS idx_transactions_receiver ON transactions(receiver);
+CREATE INDEX IF NOT EXISTS idx_transactions_created_at ON transactions(created_at);
+CREATE TABLE IF NOT EXISTS templates_index (
+    template_id TEXT PRIMARY KEY,
+    owner TEXT,
+    status TEXT,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_templates_owner ON templates_index(owner, status);
+CREATE TABLE IF NOT EXISTS metadata (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS changes (
+    seq INTEGER PRIMARY KEY,
+    ops TEXT NOT NULL
+);
+"""
+
+
+class SqliteLedgerBackend(LedgerBackend):
+    """
+    Gömülü SQLite backend (journal_mode=WAL).
+
+    - Her commit tek SQLite transaction'ıdır (BEGIN IMMEDIATE): tablolar güncellenir
+      ve op'lar changes tablosuna eklenir. Process'ler arası sıralamayı SQLite yapar.
+    - Diğer process'ler changes tablosundan artımlı okur; changes tablosu
+      checkpoint'te son checkpoint_interval kayda kırpılır (daha geride kalan
+      process ledger'ı tablolardan yeniden yükler).
+    - Tüm validator'lar aynı veritabanını okur.
+    """
+
+    def __init__(self, db_file: str, checkpoint_interval: int = 1000, synchronous: str = "NORMAL"):
+        self.db_file = db_file
+        self.checkpoint_interval = checkpoint_interval
+        self.synchronous = synchronous
+        self._conn: Optional[sqlite3.Connection] = None
+        self._pid = None
+        self._generation = 0
+        self._records_since_checkpoint = 0
+
+        # changed() için ayrı bağlantı (process içi _lock dışında çağrılır)
+        self._probe: Optional[sqlite3.Connection] = None
+        self._probe_lock = threading.Lock()
+        self._data_version = None
+
+    def _connect(self) -> sqlite3.Connection:
+        # fork sonrası bağlantılar paylaşılamaz; her process kendi bağlantısını açar
+        if self._conn is None or self._pid != os.getpid():
+            os.makedirs(os.path.dirname(self.db_file), exist_ok=True)
+            conn = sqlite3.connect(self.db_file, timeout=30, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(f"PRAGMA synchronous={self.synchronous}")
+            conn.executescript(_SQLITE_SCHEMA)
+            self._upgrade_schema(conn)
+            self._conn = conn
+            self._probe = None
+            self._pid = os.getpid()
+        return self._conn
+
+    def _upgrade_schema(self, conn: sqlite3.Connection):
+        """Eski şemayla oluşturulmuş veritabanlarına eksik kolon/index'leri ekle."""
+        columns = {row[1] for row in conn.execute("PRAGMA table_info(utxos)")}
+        if "status" not in columns:
+            conn.execute("ALTER TABLE utxos ADD COLUMN status TEXT")
+            conn.execute("UPDATE utxos SET status = json_extract(data, '$.status')")
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_utxos_unspent ON utxos(receiver, status)")
+
+    @contextmanager
+    def _transaction(self, mode: str = ""):
+        """Açık transaction yoksa başlat (BEGIN [IMMEDIATE]), sonunda commit/rollback."""
+        conn = self._connect()
+        if conn.in_transaction:
+            yield conn
+            return
+        conn.execute(f"BEGIN {mode}")
+        try:
+            yield conn
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+
+    def _read_metadata(self, conn: sqlite3.Connection) -> dict:
+        return {key: json.loads(value) for key, value in conn.execute("SELECT key, value FROM metadata")}
+
+    def _write_metadata(self, conn: sqlite3.Connection, metadata: dict):
+        conn.executemany(
+            "INSERT OR REPLACE INTO metadata (key, value) VALUES (?, ?)",
+            [(key, json.dumps(value, cls=DecimalEncoder)) for key, value in metadata.items()]
+        )
+
+    def _export(self, conn: sqlite3.Connection) -> dict:
+        """Tablolardan ledger dict'ini oluştur (açık transaction içinde)."""
+        metadata = self._read_metadata(conn)
+        metadata.pop("generation", None)
+        ledger = {
+            "accounts": {
+                address: json.loads(data)
+                for address, data in conn.execute("SELECT address, data FROM accounts")
+            },
+            "utxos": [json.loads(data) for (data,) in conn.execute("SELECT data FROM utxos ORDER BY rowid")],
+            "transactions": [
+                json.loads(data) for (data,) in conn.execute("SELECT data FROM transactions ORDER BY tx_id")
+            ],
+            "templates_index": {
+                template_id: json.loads(data)
+                for template_id, data in conn.execute("SELECT template_id, data FROM templates_index")
+            },
+            "metadata": metadata or empty_ledger()["metadata"],
+        }
+        return ensure_aggregates(ledger)
+
+    def load(self, repair: bool = False) -> dict:
+        with self._transaction("IMMEDIATE") as conn:
+            metadata = self._read_metadata(conn)
+            if not metadata:
+                # İlk açılış: metadata (created_at vb.) tüm process'lerde aynı olsun
+                self._write_metadata(conn, dict(empty_ledger()["metadata"], generation=0))
+                metadata = self._read_metadata(conn)
+            self._generation = metadata.get("generation", 0)
+            ledger = self._export(conn)
+        self._records_since_checkpoint = 0
+        return ledger
+
+    def changed(self) -> bool:
+        with self._probe_lock:
+            if self._probe is None or self._pid != os.getpid():
+                self._probe = sqlite3.connect(self.db_file, timeout=30, check_same_thread=False)
+                self._data_version = None
+            version = self._probe.execute("PRAGMA data_version").fetchone()[0]
+            changed = version != self._data_version
+            self._data_version = version
+            return changed
+
+    def poll(self, ledger: dict) -> Optional[List[dict]]:
+        with self._transaction() as conn:
+            metadata = self._read_metadata(conn)
+            if metadata.get("generation", 0) != self._generation:
+                return None
+
+            last_seq = ledger["metadata"].get("wal_seq", 0)
+            if metadata.get("wal_seq", 0) <= last_seq:
+                return []
+
+            rows = conn.execute("SELECT seq, ops FROM changes WHERE seq > ? ORDER BY seq", (last_seq,)).fetchall()
+            if not rows or rows[0][0] != last_seq + 1:
+                # Aradaki kayıtlar checkpoint'te kırpılmış
+                return None
+
+        self._records_since_checkpoint += len(rows)
+        return [{"seq": seq, "ops": json.loads(ops)} for seq, ops in rows]
+
+    def write_section(self):
+        return self._transaction("IMMEDIATE")
+
+    def read_section(self):
+        return self._transaction()
+
+    def append(self, ledger: dict, ops: list) -> int:
+        conn = self._connect()
+        for op in ops:
+            self._write_op(conn, op)
+
+        seq = ledger["metadata"].get("wal_seq", 0) + 1
+        ledger["metadata"]["wal_seq"] = seq
+        self._write_metadata(conn, ledger["metadata"])
+        conn.execute(
+            "INSERT INTO changes (seq, ops) VALUES (?, ?)",
+            (seq, json.dumps(ops, separators=(',', ':'), ensure_ascii=False, cls=DecimalEncoder))
+        )
+
+        self._records_since_checkpoint += 1
+        if self._records_since_checkpoint >= self.checkpoint_interval:
+            self.checkpoint(ledger)
+        # Kalıcılık transaction commit'inde (write_section sonu) sağlanır
+        return 0
+
+    def checkpoint(self, ledger: dict, force: bool = False):
+        """changes tablosunu son checkpoint_interval kayda kırp."""
+        if not (force or self._records_since_checkpoint):
+            return
+        keep_after = ledger["metadata"].get("wal_seq", 0) - self.checkpoint_interval
+        self._connect().execute("DELETE FROM changes WHERE seq <= ?", (keep_after,))
+        self._records_since_checkpoint = 0
+
+    def reset(self, ledger: dict):
+        conn = self._connect()
+        generation = self._read_metadata(conn).get("generation", 0) + 1
+        for table in ("accounts", "utxos", "transactions", "templates_index", "metadata", "changes"):
+            conn.execute(f"DELETE FROM {table}")
+        self._write_metadata(conn, dict(ledger["metadata"], generation=generation))
+        self._generation = generation
+        self._records_since_checkpoint = 0
+
+    def import_ledger(self, ledger: dict):
+        """Tam bir ledger'ı (ör. JSON dosyasından) veritabanına aktar; mevcut veri silinir."""
+        ledger = ensure_aggregates(ledger)
+        with self._transaction("IMMEDIATE") as conn:
+            self.reset(ledger)
+            ops = [["acc", address, account] for address, account in ledger["accounts"].items()]
+            ops += [["utxo", utxo] for utxo in ledger["utxos"]]
+            ops += [["tx", tx] for tx in ledger["transactions"]]
+            ops += [["tpl", template_id, entry] for template_id, entry in ledger.get("templates_index", {}).items()]
+            for op in ops:
+                self._write_op(conn, op)
+
+    def read_validator(self, validator_name: str, min_seq: int = 0) -> Optional[dict]:
+        """
+        Validator'lar ortak veritabanını okur; güncel ledger tablolardan oluşturulur.
+        Yazan bağlantı lock altında paylaşıldığı için ayrı bir okuma bağlantısı açılır
+        (WAL modunda okuma transaction'ı tutarlı bir görüntü görür, yazanları bekletmez).
+        """
+        conn = sqlite3.connect(self.db_file, timeout=30, isolation_level=None)
+        try:
+            conn.execute("BEGIN")
+            try:
+                return self._export(conn)
+            finally:
+                conn.execute("ROLLBACK")
+        finally:
+            conn.close()
+
+    def close(self):
+        if self._conn is not None and self._pid == os.getpid():
+            self._conn.close()
+        self._conn = None
+
+    def _patched(self, conn: sqlite3.Connection, query: str, key, fields: dict) -> dict:
+        """Satırın JSON verisini oku ve alanları güncelle (apply_op'taki update ile aynı)."""
+        data = json.loads(conn.execute(query, (key,)).fetchone()[0])
+        data.update(fields)
+        return data
+
+    def _write_op(self, conn: sqlite3.Connection, op: list):
+        """Op'u ilgili tabloya yaz (apply_op'un tablo karşılığı)."""
+        kind = op[0]
+        if kind == "acc":
+            conn.execute(
+                "INSERT OR REPLACE INTO accounts (address, balance, data) VALUES (?, ?, ?)",
+                (op[1], op[2]["balance"], json.dumps(op[2], cls=DecimalEncoder))
+            )
+        elif kind == "utxo":
+            utxo = op[1]
+            conn.execute(
+                "INSERT OR REPLACE INTO utxos (utxo_id, sender, receiver, timestamp, status, data) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (utxo["utxo_id"], utxo.get("sender"), utxo.get("receiver"), utxo.get("timestamp"),
+                 utxo.get("status"), json.dumps(utxo, cls=DecimalEncoder))
+            )
+        elif kind == "spend":
+            data = self._patched(conn, "SELECT data FROM utxos WHERE utxo_id = ?", op[1], op[2])
+            conn.execute("UPDATE utxos SET status = ?, data = ? WHERE utxo_id = ?", (data["status"], json.dumps(data, cls=DecimalEncoder), op[1]))
+        elif kind == "meta":
+            # Metadata her append'te ledger'dan tümüyle yazılır
+            pass
+        elif kind == "tx":
+            tx = op[1]
+            conn.execute(
+                "INSERT OR REPLACE INTO transactions (tx_id, sender, receiver, created_at, data) VALUES (?, ?, ?, ?, ?)",
+                (tx["tx_id"], tx.get("sender"), tx.get("receiver"), tx.get("created_at"),
+                 json.dumps(tx, cls=DecimalEncoder))
+            )
+        elif kind == "txupd":
+            data = self._patched(conn, "SELECT data FROM transactions WHERE tx_id = ?", op[1], op[2])
+            conn.execute("UPDATE transactions SET data = ? WHERE tx_id = ?", (json.dumps(data, cls=DecimalEncoder), op[1]))
+        elif kind == "tpl":
+            conn.execute(
+                "INSERT OR REPLACE INTO templates_index (template_id, owner, status, data) VALUES (?, ?, ?, ?)",
+                (op[1], op[2].get("owner"), op[2].get("status"), json.dumps(op[2], cls=DecimalEncoder))
+            )
+        else:
+            raise ValueError(f"Bilinmeyen ledger op: {kind}")
@@ -0,0 +1,114 @@
+"""
+Ledger Migration.
+Mevcut JSON ledger dosyalarını (data/*.json + WAL) SQLite backend'ine aktarır.
+
+Kullanım:
+    python -m backend.infra.ledger_migrate [--data-dir DIR] [--target FILE] [--force]
+
+- Kaynak: ana ledger snapshot'ı (opencbdc_ledger.json) + varsa WAL'daki commit'ler
+- Validator dosyaları (opencbdc_validator*.json) ana ledger'ın replikasıdır;
+  aktarılmaz, sadece ana ledger ile tutarlılıkları raporlanır.
+- Uygulama çalışmıyorken çalıştırılmalıdır.
+"""
+import os
+import sys
+import json
+import argparse
+import logging
+import tempfile
+
+from backend.infra.ledger_backends import JsonLedgerBackend, SqliteLedgerBackend
+
+logger = logging.getLogger('ledger_migrate')
+
+DEFAULT_DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'data')
+
+
+def _read_json(filepath: str) -> dict:
+    try:
+        with open(filepath, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return {}
+
+
+def migrate_json_to_sqlite(data_dir: str, target: str, force: bool = False) -> dict:
+    """
+    JSON ledger'ı SQLite veritabanına aktar.
+
+    Args:
+        data_dir: JSON ledger dosyalarının bulunduğu dizin
+        target: SQLite veritabanı dosyası
+        force: Hedef veritabanında veri varsa üzerine yaz
+
+    Returns:
+        Aktarım özeti (sayılar ve validator tutarlılık raporu)
+    """
+    ledger_file = os.path.join(data_dir, 'opencbdc_ledger.json')
+    wal_file = os.path.join(data_dir, 'opencbdc_ledger.wal')
+    validator_files = {
+        name[len('opencbdc_'):-len('.json')]: os.path.join(data_dir, name)
+        for name in sorted(os.listdir(data_dir))
+        if name.startswith('opencbdc_validator') and name.endswith('.json')
+    }
+
+    if not os.path.exists(ledger_file):
+        return {"error": "ledger file not found", "path": ledger_file}
+
+    # Snapshot + WAL replay (JSON backend'in açılıştaki recovery'si ile aynı)
+    source = JsonLedgerBackend(
+        ledger_file,
+        validator_files,
+        wal_file,
+        os.path.join(tempfile.gettempdir(), 'opencbdc_ledger_migrate.lock'),
+        wal_enabled=os.path.exists(wal_file)
+    )
+    ledger = source.load()
+
+    target_backend = SqliteLedgerBackend(target)
+    with target_backend.read_section() as conn:
+        existing = conn.execute("SELECT COUNT(*) FROM accounts").fetchone()[0]
+    if existing and not force:
+        return {"error": "target database is not empty (use --force)", "path": target}
+
+    target_backend.import_ledger(ledger)
+    imported = target_backend.read_validator("validator1")
+    target_backend.close()
+
+    validators = {}
+    for name, filepath in validator_files.items():
+        replica = _read_json(filepath)
+        in_sync = (
+            len(replica.get("transactions", [])) == len(ledger["transactions"])
+            and replica.get("accounts", {}) == ledger["accounts"]
+        )
+        validators[name] = "in sync" if in_sync else "stale (replica of main ledger, not imported)"
+
+    return {
+        "status": "success",
+        "target": target,
+        "accounts": len(imported["accounts"]),
+        "utxos": len(imported["utxos"]),
+        "transactions": len(imported["transactions"]),
+        "templates": len(imported["templates_index"]),
+        "total_supply": imported["metadata"]["total_supply"],
+        "validators": validators
+    }
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="JSON ledger dosyalarını SQLite backend'ine aktar.")
+    parser.add_argument('--data-dir', default=DEFAULT_DATA_DIR, help="JSON ledger dizini")
+    parser.add_argument('--target', default=None, help="SQLite dosyası (varsayılan: <data-dir>/opencbdc_ledger.db)")
+    parser.add_argument('--force', action='store_true', help="Hedefte veri varsa üzerine yaz")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s [%(name)s] %(levelname)s: %(message)s')
+    target = args.target or os.path.join(args.data_dir, 'opencbdc_ledger.db')
+    result = migrate_json_to_sqlite(args.data_dir, target, force=args.force)
+    print(json.dumps(result, indent=2, ensure_ascii=False))
+    return 0 if result.get("status") == "success" else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,74 @@
+"""
+Ledger Process Lock.
+Aynı ledger dosyalarını paylaşan process'ler (gunicorn worker'ları) arasında
+commit bölümünü sıralamak için dosya tabanlı exclusive lock.
+
+- POSIX'te fcntl.flock kullanılır; process ölürse lock kernel tarafından bırakılır.
+- fcntl olmayan platformlarda lock no-op'tur (tek process varsayılır).
+"""
+import os
+import logging
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+logger = logging.getLogger('ledger_process_lock')
+
+
+class ProcessFileLock:
+    """
+    Process'ler arası exclusive lock.
+    Reentrant değildir; process içinde ledger _lock'u altında alınmalıdır
+    (aynı anda tek thread tutar).
+    """
+
+    def __init__(self, path: str):
+        """
+        Args:
+            path: Lock dosyası yolu (içeriği kullanılmaz)
+        """
+        self.path = path
+        self._fd = None
+        self._pid = None
+
+    def _open(self) -> int:
+        # fork sonrası (gunicorn --preload) miras kalan fd aynı open file
+        # description'ı paylaşır ve flock'u ayırmaz; her process kendi fd'sini açar.
+        if self._fd is None or self._pid != os.getpid():
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            self._fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+            self._pid = os.getpid()
+        return self._fd
+
+    def acquire(self):
+        if fcntl is not None:
+            fcntl.flock(self._open(), fcntl.LOCK_EX)
+
+    def try_acquire(self) -> bool:
+        """Lock'u beklemeden almayı dene; başka bir process tutuyorsa False."""
+        if fcntl is None:
+            return True
+        try:
+            fcntl.flock(self._open(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            return False
+        return True
+
+    def release(self):
+        if fcntl is not None and self._fd is not None and self._pid == os.getpid():
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+
+    def close(self):
+        """Dosyayı kapat (tutuluyorsa lock da bırakılır)."""
+        if self._fd is not None and self._pid == os.getpid():
+            os.close(self._fd)
+        self._fd = None
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.release()
@@ -0,0 +1,99 @@
+"""
+Validator Ledger Replication.
+Ana ledger snapshot'ını validator replika dosyalarına arka planda kopyalar.
+
+- Snapshot sadece bir kez (ana ledger dosyasına) serialize edilip yazılır.
+- Replikalar hardlink ile oluşturulur (link + rename); hardlink desteklenmeyen
+  dosya sistemlerinde dosya kopyalanır.
+- Commit eden thread sadece publish() çağırır, validator sayısından bağımsızdır.
+- Snapshot'tan sonraki değişiklikler (delta) ortak WAL'dan okunur.
+"""
+import os
+import shutil
+import threading
+import logging
+from typing import Dict, Optional
+
+logger = logging.getLogger('ledger_replication')
+
+
+class LedgerReplicator:
+    """
+    Asenkron snapshot replikatörü.
+    publish() ile yeni snapshot versiyonu bildirilir, arka plan thread'i
+    en güncel snapshot'ı tüm replika dosyalarına linkler (ara versiyonlar birleştirilir).
+    """
+
+    def __init__(self, source_path: str, replica_paths: Dict[str, str]):
+        """
+        Replikatörü başlat.
+
+        Args:
+            source_path: Ana ledger snapshot dosyası
+            replica_paths: {validator_name -> replika dosya yolu}
+        """
+        self.source_path = source_path
+        self.replica_paths = replica_paths
+        self._cond = threading.Condition()
+        self._published = 0
+        self._replicated = 0
+        self._thread: Optional[threading.Thread] = None
+
+    def publish(self) -> int:
+        """
+        Yeni snapshot yazıldığını bildir (ledger _lock altında çağrılabilir, O(1)).
+
+        Returns:
+            Snapshot versiyonu
+        """
+        with self._cond:
+            self._published += 1
+            self._ensure_thread()
+            self._cond.notify_all()
+            return self._published
+
+    def sync(self, timeout: float = 5.0) -> bool:
+        """Yayınlanan son snapshot tüm replikalara ulaşana kadar bekle."""
+        with self._cond:
+            return self._cond.wait_for(lambda: self._replicated >= self._published, timeout=timeout)
+
+    def _ensure_thread(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(
+                target=self._run,
+                daemon=True,
+                name='LedgerReplicator'
+            )
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                self._cond.wait_for(lambda: self._published > self._replicated)
+                target = self._published
+
+            for validator_name, replica_path in self.replica_paths.items():
+                try:
+                    self._replicate(replica_path)
+                except FileNotFoundError:
+                    # Snapshot bu arada silinmiş olabilir (reset); sonraki publish'te tekrar denenir
+                    pass
+                except OSError as e:
+                    logger.warning(f"{validator_name} replikası güncellenemedi: {e}")
+
+            with self._cond:
+                self._replicated = max(self._replicated, target)
+                self._cond.notify_all()
+
+    def _replicate(self, replica_path: str):
+        """Snapshot'ı replika yoluna atomik olarak yerleştir."""
+        tmp_path = f"{replica_path}.tmp"
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        try:
+            os.link(self.source_path, tmp_path)
+        except FileNotFoundError:
+            raise
+        except (OSError, NotImplementedError):
+            shutil.copyfile(self.source_path, tmp_path)
+        os.replace(tmp_path, replica_path)
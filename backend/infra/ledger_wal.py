@@ -0,0 +1,158 @@
+"""
+Ledger Write-Ahead Log (WAL).
+OpenCBDC ledger mutasyonlarını append-only log dosyasına yazar.
+
+- Her commit tek satırlık kompakt bir JSON kaydıdır: {"seq": n, "ops": [...]}
+- fsync'ler gruplanır (group commit): aynı anda bekleyen tüm commit'ler
+  tek bir fsync ile kalıcı hale gelir.
+- Checkpoint sonrası log truncate edilir; açılışta snapshot + WAL replay yapılır.
+- Dosya birden çok process tarafından paylaşılabilir (O_APPEND); diğer
+  process'lerin kayıtları read() ile byte offset'ten itibaren okunur.
+"""
+import os
+import json
+import time
+import threading
+import logging
+from typing import Iterator, Optional, Tuple
+
+logger = logging.getLogger('ledger_wal')
+
+
+class WriteAheadLog:
+    """
+    Append-only, satır bazlı WAL dosyası.
+    Thread-safe: append() çağıranlar kendi aralarında (ledger _lock'u ile)
+    sıralanır, wait_durable() ise lock dışında çağrılarak fsync'ler gruplanır.
+    """
+
+    def __init__(self, path: str, group_commit_ms: int = 2, encoder: Optional[type] = None):
+        """
+        WAL'ı başlat.
+
+        Args:
+            path: WAL dosya yolu
+            group_commit_ms: fsync öncesi diğer commit'leri toplamak için bekleme süresi
+            encoder: Kayıtları serialize etmek için JSONEncoder sınıfı
+        """
+        self.path = path
+        self.group_commit_ms = group_commit_ms
+        self.encoder = encoder
+        self._file = None
+        self._cond = threading.Condition()
+        self._written_lsn = 0   # Dosyaya yazılan son kayıt
+        self._synced_lsn = 0    # fsync ile kalıcı olan son kayıt
+        self._syncing = False
+        self.offset = 0         # Son append sonrası dosya sonu (byte)
+
+    def _open(self):
+        if self._file is None:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            self._file = open(self.path, 'ab')
+        return self._file
+
+    def append(self, record: dict) -> int:
+        """
+        Kaydı log sonuna ekle (OS buffer'ına kadar yazar, fsync yapmaz).
+
+        Returns:
+            Kaydın log sequence numarası (wait_durable için)
+        """
+        line = json.dumps(record, separators=(',', ':'), ensure_ascii=False, cls=self.encoder)
+        f = self._open()
+        f.write((line + "\n").encode('utf-8'))
+        f.flush()
+        self.offset = f.tell()
+        with self._cond:
+            self._written_lsn += 1
+            return self._written_lsn
+
+    def wait_durable(self, lsn: int):
+        """
+        Verilen kayıt fsync ile diske yazılana kadar bekle.
+        İlk gelen thread lider olur ve o ana kadar yazılan tüm kayıtları
+        tek fsync ile kalıcı yapar; diğerleri sonucu bekler.
+        """
+        with self._cond:
+            while self._synced_lsn < lsn:
+                if self._syncing:
+                    self._cond.wait()
+                    continue
+
+                self._syncing = True
+                self._cond.release()
+                try:
+                    if self.group_commit_ms > 0:
+                        time.sleep(self.group_commit_ms / 1000)
+                    target = self._written_lsn
+                    if self._file is not None:
+                        os.fsync(self._file.fileno())
+                finally:
+                    self._cond.acquire()
+                    self._syncing = False
+                self._synced_lsn = max(self._synced_lsn, target)
+                self._cond.notify_all()
+
+    def replay(self, after_seq: int = 0, repair: bool = False) -> Iterator[dict]:
+        """
+        Log kayıtlarını sırayla döndür (seq > after_seq olanlar).
+        Yarım yazılmış son satır (crash) atlanır; repair=True ise (sadece açılışta)
+        dosya son sağlam kayda kırpılır.
+        """
+        for record, _ in self.read(repair=repair):
+            if record.get("seq", 0) > after_seq:
+                yield record
+
+    def read(self, offset: int = 0, repair: bool = False) -> Iterator[Tuple[dict, int]]:
+        """
+        Verilen byte offset'ten itibaren kayıtları (kayıt, kayıt sonu offset'i) olarak döndür.
+        Diğer process'lerin eklediği kayıtları artımlı okumak için kullanılır.
+        """
+        if not os.path.exists(self.path):
+            return
+
+        good_offset = offset
+        torn = False
+        with open(self.path, 'rb') as f:
+            f.seek(offset)
+            for raw in f:
+                if not raw.endswith(b"\n"):
+                    torn = True
+                    break
+                try:
+                    record = json.loads(raw.decode('utf-8'))
+                except (UnicodeDecodeError, json.JSONDecodeError):
+                    torn = True
+                    break
+                good_offset += len(raw)
+                yield record, good_offset
+
+        if torn and repair:
+            logger.warning(f"WAL sonunda yarım kayıt bulundu, {good_offset}. byte'a kırpılıyor.")
+            with open(self.path, 'r+b') as f:
+                f.truncate(good_offset)
+
+    def truncate(self):
+        """Checkpoint sonrası log'u boşalt."""
+        with self._cond:
+            while self._syncing:
+                self._cond.wait()
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+            with open(self.path, 'wb'):
+                pass
+            self._synced_lsn = self._written_lsn
+            self.offset = 0
+
+    def close(self):
+        """Bekleyen kayıtları fsync'le ve dosyayı kapat."""
+        with self._cond:
+            while self._syncing:
+                self._cond.wait()
+            if self._file is not None:
+                self._file.flush()
+                os.fsync(self._file.fileno())
+                self._file.close()
+                self._file = None
+            self._synced_lsn = self._written_lsn
@@ -0,0 +1,114 @@
+"""
+Nonce Manager.
+Deployer hesabının nonce'larını process içinde dağıtır; her transfer için
+get_transaction_count RPC'si yapılmaz ve paralel gönderimler aynı nonce'u almaz.
+
+- İlk allocate()'te (ve resync()'te) zincirdeki "pending" nonce okunur.
+- Gönderilemeyen nonce'lar boşluk (gap) olarak saklanır ve sonraki allocate()
+  önce en küçük boşluğu verir; böylece sonraki nonce'lu tx'ler takılı kalmaz.
+- resync() (hata durumunda ve periyodik): zincirin pending nonce'u ile yereli
+  karşılaştırır; hiç gönderilmemiş veya düşmüş (drop) nonce'lar boşluk olarak
+  yeniden dağıtılır.
+- Aynı hesabı kullanan başka process'ler varsa "nonce too low" alınabilir;
+  BlockchainClient.send_transfer bu durumda resync edip yeni nonce ile tekrar dener.
+"""
+import time
+import heapq
+import threading
+import logging
+from typing import Callable, Dict, Optional, Set, Tuple
+
+logger = logging.getLogger('nonce_manager')
+
+
+class NonceManager:
+    """Tek hesap için nonce dağıtıcı (thread-safe)."""
+
+    def __init__(self, fetch_pending_nonce: Callable[[], int], resync_interval: float = 60.0):
+        """
+        Args:
+            fetch_pending_nonce: Zincirdeki pending nonce'u döndüren fonksiyon
+                                 (get_transaction_count(address, 'pending'))
+            resync_interval: Zincirle periyodik eşitleme aralığı (saniye)
+        """
+        self._fetch = fetch_pending_nonce
+        self.resync_interval = resync_interval
+        self._lock = threading.Lock()
+        self._next: Optional[int] = None
+        self._synced_at = 0.0
+        self._gaps: list = []  # min-heap
+        self._reserved: Set[int] = set()  # dağıtılmış, gönderimi henüz sonuçlanmamış
+        self._sent: Set[int] = set()  # node'a kabul edilmiş, zincirin pending nonce'u henüz geçmemiş
+
+    def allocate(self) -> int:
+        """Gönderilecek tx için nonce ayır (sonra mark_sent veya release çağrılmalı)."""
+        with self._lock:
+            if self._next is None or time.monotonic() - self._synced_at >= self.resync_interval:
+                self._resync()
+            if self._gaps:
+                nonce = heapq.heappop(self._gaps)
+            else:
+                nonce = self._next
+                self._next += 1
+            self._reserved.add(nonce)
+            return nonce
+
+    def mark_sent(self, nonce: int):
+        """Tx node'a kabul edildi; nonce kullanıldı."""
+        with self._lock:
+            self._reserved.discard(nonce)
+            self._sent.add(nonce)
+
+    def release(self, nonce: int):
+        """Tx gönderilemedi; nonce boşluk olarak sonraki tx'e verilir."""
+        with self._lock:
+            self._reserved.discard(nonce)
+            if self._next is not None and nonce < self._next and nonce not in self._gaps:
+                heapq.heappush(self._gaps, nonce)
+
+    def resync(self):
+        """
+        Yerel durumu zincirin pending nonce'u ile eşitle.
+        Zincirin gerisinde kalan boşluklar atılır; zincirde görünmeyen
+        (düşmüş) nonce'lar boşluk olarak yeniden dağıtılır.
+        """
+        with self._lock:
+            self._resync()
+
+    def _resync(self):
+        chain_nonce = self._fetch()
+        self._synced_at = time.monotonic()
+        self._sent = {n for n in self._sent if n >= chain_nonce}
+        if self._next is None or chain_nonce >= self._next:
+            self._next = chain_nonce
+            self._gaps = []
+            return
+
+        # Hiç gönderilmemiş nonce'lar boşluktur; zincirin beklediği nonce gönderilmiş
+        # görünüyorsa o tx düşmüştür (sonrakiler node'da sırada bekler)
+        missing = set(range(chain_nonce, self._next)) - self._reserved - self._sent
+        if chain_nonce in self._sent:
+            self._sent.discard(chain_nonce)
+            missing.add(chain_nonce)
+        self._gaps = sorted(missing)
+        if missing:
+            logger.info(f"Nonce resync: {len(missing)} boşluk yeniden dağıtılacak (zincir: {chain_nonce}, yerel: {self._next})")
+
+
+_managers: Dict[Tuple[str, str], NonceManager] = {}
+_managers_lock = threading.Lock()
+
+
+def get_nonce_manager(
+    rpc_url: str,
+    address: str,
+    fetch_pending_nonce: Callable[[], int],
+    resync_interval: float = 60.0
+) -> NonceManager:
+    """(RPC URL, adres) başına process genelinde tek NonceManager."""
+    key = (rpc_url, address.lower())
+    with _managers_lock:
+        manager = _managers.get(key)
+        if manager is None:
+            manager = _managers[key] = NonceManager(fetch_pending_nonce, resync_interval)
+        return manager
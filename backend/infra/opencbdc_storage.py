@@ -3,22 +3,64 @@ OpenCBDC Storage - UTXO-based ledger storage.
 PostgreSQL yerine JSON file-based storage.
 
 Her validator için ayrı ledger dosyası tutulur.
-Transfer yapıldığında TÜM validator ledger'ları güncellenir.
+Transfer yapıldığında TÜM validator ledger'ları güncellenir: snapshot bir kez
+ana ledger'a yazılır, validator replikaları arka planda hardlink ile oluşturulur.
+Ledger process başına bir kez yüklenir ve bellekte tutulur; okumalar bellekten,
+yazmalar bellekteki state üzerinden yapılıp kalıcılık backend'ine yansıtılır
+(bkz. ledger_backends; LEDGER_BACKEND=json|sqlite).
+
+WAL modu (LEDGER_WAL_ENABLED): Her mutasyon değişiklik kayıtları (ops) olarak
+opencbdc_ledger.wal dosyasına tek satır halinde eklenir. Belirli sayıda kayıttan
+sonra snapshot (checkpoint) alınır ve WAL boşaltılır. Açılışta son snapshot
+üzerine WAL replay edilir.
+
+Çoklu process (gunicorn worker'ları): Commit bölümü backend tarafından
+process'ler arası sıralanır (JSON: opencbdc_ledger.lock üzerinde flock, SQLite:
+BEGIN IMMEDIATE). Her process commit öncesi ve okumalarda (değişiklik varsa)
+diğer process'lerin commit'lerini kendi state'ine uygular; artımlı okuma
+mümkün değilse state'i yeniden yükler. Doğrulanan hesaplar bu arada dışarıdan değiştiyse işlem yeniden doğrulanır.
+
+Değişiklik akışı: Bu process'in ve diğer process'lerin commit'leri sıra numarasıyla
+_change_feed'e eklenir; tüketiciler (scheduler) get_changes(cursor) ile sadece yeni
+commit'leri okur ve commit anında uyandırılır.
 
 Veri Yapısı:
 - accounts: {address -> {name, balance, created_at, updated_at}}
-- utxos: [{utxo_id, sender, receiver, amount, timestamp, status}]
-- transactions: [{tx_id, sender, receiver, amount, tx_hash, ipfs_cid, status, created_at}]
+- utxos: [{utxo_id, sender, receiver, amount, timestamp, status, type}]
+  (status: unspent/spent; receiver çıktının sahibidir. Transfer girdileri harcar,
+  alıcıya ve para üstü için göndericiye yeni çıktılar üretir.)
+- transactions: [{tx_id, sender, receiver, amount, tx_hash, ipfs_cid, utxo_id, inputs, status, created_at}]
+  (blockchain event'inden gelenlerde event_key = "tx_hash:log_index"; aynı event iki kez uygulanmaz.
+  Reorg'da geri alınan transfer "reverted" olur, ters transfer kaydı "reverts" alanını taşır.)
 - templates_index: {tmpl_id -> {owner, template_name, cid, status, ...}}
+  (Template JSON'u IPFS'e ledger lock'u dışında yazılır; lock sadece index commit'i
+  için alınır. IPFS'e yazılamayan içerik pending_ipfs olur ve ipfs_outbox ile tamamlanır.)
 """
 import os
-import json
 import threading
+from contextlib import contextmanager
 from datetime import datetime
 from decimal import Decimal
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Tuple
 import hashlib
 import time
+import atexit
+import bisect
+import itertools
+from collections import deque
+import logging
+
+from backend.config import Config
+from backend.infra.ledger_backends import (
+    LedgerBackend,
+    JsonLedgerBackend,
+    SqliteLedgerBackend,
+    UTXO_SET_VERSION,
+    empty_ledger as _empty_ledger,
+    apply_op as _apply_op,
+)
+
+logger = logging.getLogger('opencbdc_storage')
 
 # Storage directory
 STORAGE_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'data')
@@ -34,78 +76,519 @@ VALIDATOR_LEDGER_FILES = {
 # Ana ledger (tüm validator'ların ortak referansı)
 LEDGER_FILE = os.path.join(STORAGE_DIR, 'opencbdc_ledger.json')
 
-# Thread lock for concurrent access
+# Ledger mutasyonları için write-ahead log
+WAL_FILE = os.path.join(STORAGE_DIR, 'opencbdc_ledger.wal')
+
+# Process'ler arası commit lock dosyası
+LOCK_FILE = os.path.join(STORAGE_DIR, 'opencbdc_ledger.lock')
+
+# SQLite backend veritabanı (LEDGER_BACKEND=sqlite)
+SQLITE_FILE = os.path.join(STORAGE_DIR, 'opencbdc_ledger.db')
+
+# Commit lock: sadece seq/tx_id tahsisi, state'e uygulama ve backend'e yazma için
+# kısa süreli tutulur. Hesap bazlı doğrulamalar _account_locks ile yapılır.
+# Lock sırası: _account_locks (stripe index'e göre artan) -> _lock -> backend section.
 _lock = threading.Lock()
 
+# Process içinde tutulan ledger state'i.
+# Backend'den sadece ilk erişimde bir kez okunur, okumalar bellekten yapılır.
+_state: Optional[dict] = None
+_state_load_lock = threading.Lock()
 
-class DecimalEncoder(json.JSONEncoder):
-    """JSON encoder that handles Decimal types."""
-    def default(self, obj):
-        if isinstance(obj, Decimal):
-            return str(obj)
-        return super().default(obj)
+# Bellekteki state için ikincil index'ler (bkz. _LedgerIndex)
+_index: Optional["_LedgerIndex"] = None
 
+# Aynı anda üretilen UTXO ID'lerinin çakışmaması için sayaç
+_utxo_nonce = itertools.count()
 
-def _ensure_storage():
-    """Storage dizinini oluştur."""
-    os.makedirs(STORAGE_DIR, exist_ok=True)
+# Diğer process'lerden alınan değişikliklerin versiyonu; doğrulama ile commit
+# arasında dışarıdan değişen hesapları tespit etmek için (bkz. _mutate)
+_sync_version = 0
+_reload_version = 0
+_touched_version: Dict[str, int] = {}
 
 
-def _empty_ledger() -> dict:
-    """Boş ledger yapısı."""
-    return {
-        "accounts": {},
-        "utxos": [],
-        "transactions": [],
-        "templates_index": {},
-        "metadata": {
-            "created_at": datetime.utcnow().isoformat(),
-            "version": "2.0",
-            "currency": "DTL"
-        }
-    }
+class _AccountLocks:
+    """
+    Hesap bazlı, stripe'lanmış lock'lar.
+    Her adres hash'ine göre bir stripe'a düşer; birden çok adres gerektiren
+    işlemler stripe'ları artan index sırasıyla alır (deadlock olmaz).
+    Farklı hesaplar arasındaki transferler birbirini beklemez.
+    """
+
+    def __init__(self, stripes: int):
+        self._locks = [threading.Lock() for _ in range(max(1, stripes))]
+
+    def _stripes(self, addresses) -> List[int]:
+        return sorted({
+            int.from_bytes(hashlib.blake2b(a.encode(), digest_size=8).digest(), 'big') % len(self._locks)
+            for a in addresses
+        })
+
+    @contextmanager
+    def hold(self, addresses):
+        """Verilen adreslerin stripe'larını sıralı olarak al."""
+        acquired = []
+        try:
+            for i in self._stripes(addresses):
+                self._locks[i].acquire()
+                acquired.append(i)
+            yield
+        finally:
+            for i in reversed(acquired):
+                self._locks[i].release()
+
+    @contextmanager
+    def hold_all(self):
+        """Tüm stripe'ları al (reset gibi ledger genelindeki işlemler için)."""
+        for lock in self._locks:
+            lock.acquire()
+        try:
+            yield
+        finally:
+            for lock in reversed(self._locks):
+                lock.release()
+
+
+_account_locks = _AccountLocks(Config.LEDGER_LOCK_STRIPES)
+
+
+def _create_backend() -> LedgerBackend:
+    """Config.LEDGER_BACKEND'e göre kalıcılık backend'ini oluştur."""
+    if Config.LEDGER_BACKEND == 'sqlite':
+        return SqliteLedgerBackend(
+            SQLITE_FILE,
+            checkpoint_interval=Config.LEDGER_CHECKPOINT_INTERVAL,
+            synchronous=Config.LEDGER_SQLITE_SYNCHRONOUS
+        )
+    if Config.LEDGER_BACKEND != 'json':
+        logger.warning(f"Bilinmeyen LEDGER_BACKEND '{Config.LEDGER_BACKEND}', json kullanılıyor.")
+    return JsonLedgerBackend(
+        LEDGER_FILE,
+        VALIDATOR_LEDGER_FILES,
+        WAL_FILE,
+        LOCK_FILE,
+        wal_enabled=Config.LEDGER_WAL_ENABLED,
+        group_commit_ms=Config.LEDGER_WAL_GROUP_COMMIT_MS,
+        checkpoint_interval=Config.LEDGER_CHECKPOINT_INTERVAL
+    )
+
+
+_backend: LedgerBackend = _create_backend()
 
 
 def _load_ledger() -> dict:
-    """Ana ledger dosyasından veri oku."""
-    _ensure_storage()
-    if not os.path.exists(LEDGER_FILE):
-        return _empty_ledger()
+    """
+    Bellekteki ledger state'ini döndür.
+    Backend sadece process içindeki ilk erişimde okunur; sonraki çağrılar
+    aynı state'i döndürür (başka bir process commit yaptıysa önce _catch_up).
+    Hesap doğrulamaları ilgili hesap lock'ları altında, state'e uygulama ise
+    _commit() ile _lock altında yapılır.
+    """
+    global _state, _index
+    if _state is None:
+        with _state_load_lock:
+            if _state is None:
+                with _lock, _backend.write_section():
+                    ledger = _backend.load(repair=True)
+                    _index = _LedgerIndex.build(ledger)
+                    _state = ledger
+                    lsn = _migrate_utxo_set()
+                _wait_durable(lsn)
+    elif _backend.changed():
+        with _lock, _backend.read_section():
+            _catch_up()
+    return _state
+
+
+def _catch_up():
+    """
+    Diğer process'lerin commit'lerini bellekteki state'e uygula.
+    _lock ve backend section'ı altında çağrılır.
 
-    try:
-        with open(LEDGER_FILE, 'r', encoding='utf-8') as f:
-            return json.load(f)
-    except json.JSONDecodeError:
-        return _empty_ledger()
+    Artımlı okuma mümkün değilse (checkpoint/reset) state backend'den yeniden kurulur.
+    """
+    global _index, _sync_version, _reload_version
+
+    records = _backend.poll(_state)
+    if records is None:
+        # State nesnesi yerinde güncellenir; elinde referans tutan thread'ler
+        # _reload_version ile değişikliği görüp yeniden doğrular
+        last_tx_id = _state["metadata"]["last_tx_id"]
+        known_utxos = _index.utxo_by_id.keys()
+        ledger = _backend.load()
+        # Değişiklik akışı için yeni kayıtlar (op'lar artık okunamıyor; eklenenler state'ten bulunur)
+        inserted = [["utxo", utxo] for utxo in ledger["utxos"] if utxo["utxo_id"] not in known_utxos]
+        inserted += [["tx", tx] for tx in ledger["transactions"] if tx["tx_id"] > last_tx_id]
+        _state.clear()
+        _state.update(ledger)
+        _index = _LedgerIndex.build(_state)
+        _sync_version += 1
+        _reload_version = _sync_version
+        _change_feed.append(inserted, reload=True)
+        return
+
+    if not records:
+        return
+
+    _sync_version += 1
+    for record in records:
+        for op in record["ops"]:
+            _apply_op(_state, op, _index)
+            _index.apply(op)
+            key = _op_key(op)
+            if key:
+                _touched_version[key] = _sync_version
+        _state["metadata"]["wal_seq"] = record["seq"]
+        _change_feed.append(record["ops"])
+
+
+def _op_key(op: list) -> Optional[str]:
+    """Op'un değiştirdiği kaydın lock/çakışma anahtarı (hesap adresi, template veya transaction)."""
+    if op[0] == "acc":
+        return op[1]
+    if op[0] == "tpl":
+        return _template_key(op[1])
+    if op[0] == "txupd":
+        return _transaction_key(op[1])
+    return None
+
+
+def _template_key(template_id: str) -> str:
+    return f"tpl:{template_id}"
+
+
+def _transaction_key(tx_id: int) -> str:
+    return f"tx:{tx_id}"
+
+
+def _event_key(tx_hash: Optional[str], log_index) -> Optional[str]:
+    """Blockchain event'inin ledger'daki tekil anahtarı (tx_hash + log_index)."""
+    if not tx_hash or log_index is None:
+        return None
+    return f"{tx_hash.lower()}:{int(log_index)}"
+
+
+def _changed_since(version: int, keys) -> bool:
+    """version'dan sonra diğer process'ler bu anahtarlardan birini değiştirdi mi?"""
+    if _reload_version > version:
+        return True
+    return any(_touched_version.get(key, 0) > version for key in keys)
+
+
+def _ledger_index() -> "_LedgerIndex":
+    """Ledger index'ini döndür (gerekirse ledger'ı yükle)."""
+    _load_ledger()
+    return _index
+
+
+class _LedgerIndex:
+    """
+    Transaction ve UTXO sorguları için ikincil index'ler.
+    Diske yazılmaz; açılışta ledger'dan bir kez kurulur, sonra her commit'te
+    _commit() tarafından artımlı güncellenir (_lock altında).
+
+    - tx_by_id / utxo_by_id: ID -> kayıt (O(1) lookup)
+    - txs_by_address / utxos_by_address: adres -> ID listesi (zaman sıralı)
+    - txs_by_time / utxos_by_time: tüm ID'ler zaman sıralı ("son N" için sort gerekmez)
+    - unspent_by_address: sahip adres -> {utxo_id -> harcanmamış UTXO} (coin selection, bakiye)
+    - tx_by_event: event_key -> tx_id (event listener replay'lerinde dedup; geri alınanlar hariç)
+    - revert_failed: tx_id -> transaction (reorg'da geri alınamayan, sonradan telafi edilecek transferler)
+    """
+
+    def __init__(self):
+        self.tx_by_id: Dict[int, dict] = {}
+        self.utxo_by_id: Dict[str, dict] = {}
+        self.txs_by_address: Dict[str, List[int]] = {}
+        self.utxos_by_address: Dict[str, List[str]] = {}
+        self.txs_by_time: List[int] = []
+        self.utxos_by_time: List[str] = []
+        self.unspent_by_address: Dict[str, Dict[str, dict]] = {}
+        self.tx_by_event: Dict[str, int] = {}
+        self.revert_failed: Dict[int, dict] = {}
+
+    @classmethod
+    def build(cls, ledger: dict) -> "_LedgerIndex":
+        index = cls()
+        for tx in sorted(ledger["transactions"], key=lambda x: x["created_at"]):
+            index.add_transaction(tx)
+        for utxo in sorted(ledger["utxos"], key=lambda x: x["timestamp"]):
+            index.add_utxo(utxo)
+        return index
+
+    def apply(self, op: list):
+        """Commit edilen bir op'u index'e yansıt."""
+        if op[0] == "tx":
+            self.add_transaction(op[1])
+        elif op[0] == "utxo":
+            self.add_utxo(op[1])
+        elif op[0] == "spend":
+            utxo = self.utxo_by_id[op[1]]
+            self.unspent_by_address.get(utxo["receiver"], {}).pop(op[1], None)
+        elif op[0] == "txupd" and "status" in op[2]:
+            if op[2]["status"] == "revert_failed":
+                self.revert_failed[op[1]] = self.tx_by_id[op[1]]
+            else:
+                self.revert_failed.pop(op[1], None)
+            if op[2]["status"] == "reverted":
+                # Geri alınan event yeni zincirde tekrar görülürse yeniden uygulanabilsin
+                event_key = self.tx_by_id[op[1]].get("event_key")
+                if self.tx_by_event.get(event_key) == op[1]:
+                    del self.tx_by_event[event_key]
+
+    def add_transaction(self, tx: dict):
+        tx_id = tx["tx_id"]
+        self.tx_by_id[tx_id] = tx
+        if tx.get("event_key") and tx.get("status") != "reverted":
+            self.tx_by_event[tx["event_key"]] = tx_id
+        if tx.get("status") == "revert_failed":
+            self.revert_failed[tx_id] = tx
+        time_key = lambda i: self.tx_by_id[i]["created_at"]
+        _insert_sorted(self.txs_by_time, tx_id, time_key)
+        for address in {tx["sender"], tx["receiver"]}:
+            _insert_sorted(self.txs_by_address.setdefault(address, []), tx_id, time_key)
+
+    def add_utxo(self, utxo: dict):
+        utxo_id = utxo["utxo_id"]
+        self.utxo_by_id[utxo_id] = utxo
+        time_key = lambda i: self.utxo_by_id[i]["timestamp"]
+        _insert_sorted(self.utxos_by_time, utxo_id, time_key)
+        for address in {utxo["sender"], utxo["receiver"]}:
+            _insert_sorted(self.utxos_by_address.setdefault(address, []), utxo_id, time_key)
+        if utxo.get("status") == "unspent":
+            self.unspent_by_address.setdefault(utxo["receiver"], {})[utxo_id] = utxo
+
+
+def _insert_sorted(ids: list, new_id, key):
+    """
+    ID'yi zaman sıralı listeye ekle. Kayıtlar commit sırasıyla geldiği için
+    normalde O(1) append; saat geri giderse O(log n) arama ile araya eklenir.
+    """
+    if not ids or key(ids[-1]) <= key(new_id):
+        ids.append(new_id)
+    else:
+        bisect.insort(ids, new_id, key=key)
+
+
+class _ChangeFeed:
+    """
+    Commit edilen op'ların sıra numaralı akışı (process içinde, son Config.LEDGER_CHANGE_FEED_SIZE commit).
+    Kayıtlar _commit() ve _catch_up() tarafından _lock altında eklenir; okuyucular
+    condition üzerinde bekler. Op'lar state'teki kayıtlarla paylaşılır, salt okunurdur.
+
+    Kayıt: {"seq", "ops"}; state yeniden yüklendiyse (checkpoint/reset) "reload": True
+    ve ops sadece yeni eklenen UTXO/transaction kayıtlarıdır (güncellemeler görülemez).
+    """
+
+    def __init__(self, size: int):
+        self._entries = deque(maxlen=max(1, size))
+        self._seq = 0
+        self._cond = threading.Condition()
+
+    @property
+    def seq(self) -> int:
+        return self._seq
+
+    def append(self, ops: list, reload: bool = False):
+        with self._cond:
+            self._seq += 1
+            entry = {"seq": self._seq, "ops": ops}
+            if reload:
+                entry["reload"] = True
+            self._entries.append(entry)
+            self._cond.notify_all()
 
+    def read(self, cursor: int, limit: Optional[int]) -> Tuple[List[dict], bool]:
+        """cursor'dan sonraki kayıtlar ve aradaki kayıtların düşüp düşmediği (truncated)."""
+        with self._cond:
+            if not self._entries or self._entries[-1]["seq"] <= cursor:
+                return [], False
+            first = self._entries[0]["seq"]
+            start = max(0, cursor + 1 - first)
+            stop = len(self._entries) if limit is None else min(len(self._entries), start + limit)
+            return list(itertools.islice(self._entries, start, stop)), cursor + 1 < first
 
-def _save_ledger(data: dict):
-    """Ana ledger + TÜM validator ledger dosyalarına yaz."""
-    _ensure_storage()
-    content = json.dumps(data, indent=2, ensure_ascii=False, cls=DecimalEncoder)
+    def wait(self, cursor: int, timeout: float) -> bool:
+        """cursor'dan sonra kayıt gelene kadar bekle (en fazla timeout)."""
+        with self._cond:
+            return self._cond.wait_for(lambda: self._seq > cursor, timeout)
 
-    # Ana ledger
-    with open(LEDGER_FILE, 'w', encoding='utf-8') as f:
-        f.write(content)
 
-    # Her validator'a da aynı veriyi yaz
-    for validator_name, filepath in VALIDATOR_LEDGER_FILES.items():
-        with open(filepath, 'w', encoding='utf-8') as f:
-            f.write(content)
+_change_feed = _ChangeFeed(Config.LEDGER_CHANGE_FEED_SIZE)
+
+
+def _commit(ledger: dict, ops: list) -> int:
+    """
+    Değişiklik kayıtlarını state'e uygula ve backend'e kalıcı yaz.
+    _lock ve backend write_section'ı altında (_catch_up sonrası) çağrılır.
+    Dönen LSN ile lock dışında _wait_durable() çağrılmalıdır.
+
+    Returns:
+        Backend log sequence numarası (gerekmiyorsa 0)
+    """
+    for op in ops:
+        if ledger is _state:
+            _apply_op(ledger, op, _index)
+            _index.apply(op)
+        else:
+            _apply_op(ledger, op)
+
+    lsn = _backend.append(ledger, ops)
+    if ledger is _state:
+        _change_feed.append(ops)
+    return lsn
+
+
+def _wait_durable(lsn: int):
+    """Commit kalıcı olana kadar bekle (lock dışında çağrılır)."""
+    if lsn:
+        _backend.wait_durable(lsn)
 
 
 def _generate_utxo_id(sender: str, receiver: str, amount: str) -> str:
     """Benzersiz UTXO ID oluştur."""
-    data = f"{sender}{receiver}{amount}{time.time()}"
+    data = f"{sender}{receiver}{amount}{time.time()}{os.getpid()}{next(_utxo_nonce)}"
     return f"utxo_{hashlib.sha256(data.encode()).hexdigest()[:16]}"
 
 
 def _generate_tx_id() -> int:
-    """Benzersiz transaction ID oluştur."""
-    ledger = _load_ledger()
-    if not ledger["transactions"]:
-        return 1
-    return max(tx["tx_id"] for tx in ledger["transactions"]) + 1
+    """
+    Sıradaki transaction ID (persist edilen monoton sequence, O(1)).
+    Tahsis edilen ID'nin kullanılması için _lock altında (_catch_up sonrası) çağrılmalı.
+    """
+    return _state["metadata"]["last_tx_id"] + 1
+
+
+def _assign_tx_ids(built: List[Tuple[dict, list]]):
+    """
+    Hazırlanan transferlere sequence'tan sırayla tx_id ata (_lock altında).
+    Transferin çıktıları (tx_id) ve harcadığı girdiler (spent_by_tx) de işaretlenir.
+    """
+    next_tx_id = _generate_tx_id()
+    for result, ops in built:
+        if not any(op[0] == "tx" for op in ops):
+            continue
+        for op in ops:
+            if op[0] == "tx" or (op[0] == "utxo" and "tx_id" in op[1]):
+                op[1]["tx_id"] = next_tx_id
+            elif op[0] == "spend":
+                op[2]["spent_by_tx"] = next_tx_id
+        result["tx_id"] = next_tx_id
+        next_tx_id += 1
+
+
+def _new_output(sender: str, owner: str, amount, now: str, utxo_type: str, **fields) -> dict:
+    """Harcanabilir yeni UTXO (çıktı) kaydı. owner: çıktıyı harcayabilecek adres (receiver)."""
+    utxo = {
+        "utxo_id": _generate_utxo_id(sender, owner, str(amount)),
+        "sender": sender,
+        "receiver": owner,
+        "amount": str(amount),
+        "timestamp": now,
+        "status": "unspent",
+        "type": utxo_type
+    }
+    utxo.update(fields)
+    return utxo
+
+
+def _spend_op(utxo_id: str, now: str) -> list:
+    return ["spend", utxo_id, {"status": "spent", "spent_at": now, "spent_by_tx": None}]
+
+
+def _unspent_outputs(address: str, pending: Optional[dict] = None) -> List[dict]:
+    """
+    Adresin harcanmamış çıktıları, O(#unspent).
+    pending: aynı batch içinde henüz commit edilmemiş harcama/çıktılar.
+    """
+    outputs = list(_index.unspent_by_address.get(address, {}).values())
+    if pending:
+        outputs = [u for u in outputs if u["utxo_id"] not in pending["spent"]]
+        outputs += pending["outputs"].get(address, [])
+    return outputs
+
+
+def _select_coins(outputs: List[dict], amount: Decimal) -> Optional[List[dict]]:
+    """
+    Coin selection: girdi sayısını en aza indir.
+    1. Tutarı tek başına karşılayan en küçük çıktı (tam eşleşme dahil, tek girdi)
+    2. Yoksa büyükten küçüğe toplayarak (en az sayıda girdi)
+
+    Returns:
+        Seçilen çıktılar (yetersiz bakiyede None)
+    """
+    by_amount = sorted(outputs, key=lambda u: Decimal(u["amount"]), reverse=True)
+
+    single = None
+    for utxo in by_amount:
+        if Decimal(utxo["amount"]) < amount:
+            break
+        single = utxo
+    if single is not None:
+        return [single]
+
+    selected = []
+    total = Decimal("0")
+    for utxo in by_amount:
+        selected.append(utxo)
+        total += Decimal(utxo["amount"])
+        if total >= amount:
+            return selected
+    return None
+
+
+def _migrate_utxo_set() -> int:
+    """
+    Eski formattaki ledger'ı UTXO set modeline dönüştür (_lock ve write_section altında).
+    Eski UTXO kayıtları ("confirmed") geçmiş kaydı olarak kalır; bakiyesi olan her
+    hesap için bakiyesi kadar bir açılış çıktısı ("opening") oluşturulur.
+
+    Returns:
+        Commit LSN'i (dönüşüm gerekmediyse 0)
+    """
+    if _state["metadata"].get("utxo_set_version", 0) >= UTXO_SET_VERSION:
+        return 0
+
+    now = datetime.utcnow().isoformat()
+    ops = [
+        ["utxo", _new_output("opening", address, account["balance"], now, "opening")]
+        for address, account in _state["accounts"].items()
+        if Decimal(account["balance"]) > 0
+    ]
+    ops.append(["meta", "utxo_set_version", UTXO_SET_VERSION])
+    logger.info(f"UTXO set dönüşümü: {len(ops) - 1} hesap için açılış çıktısı oluşturuldu.")
+    return _commit(_state, ops)
+
+
+def _mutate(keys, build):
+    """
+    Ortak yazma yolu: ilgili hesap lock'ları altında op'ları hazırla ve commit et.
+
+    build(ledger) -> (yanıt, [(sonuç, op listesi), ...]); commit edilecek bir şey
+    yoksa boş liste döner. Commit anında diğer process'lerin commit'leri önce
+    state'e uygulanır (_catch_up); bu anahtarlardan biri dışarıdan değiştiyse
+    doğrulama güncel state ile tekrarlanır.
+
+    Returns:
+        build'in döndürdüğü yanıt
+    """
+    while True:
+        with _account_locks.hold(keys):
+            ledger = _load_ledger()
+            seen = _sync_version
+            response, built = build(ledger)
+            if not built:
+                return response
+
+            with _lock, _backend.write_section():
+                _catch_up()
+                if _changed_since(seen, keys):
+                    continue
+                _assign_tx_ids(built)
+                lsn = _commit(ledger, [op for _, ops in built for op in ops])
+
+        _wait_durable(lsn)
+        return response
 
 
 # Varsayılan kullanıcılar (isim -> adres eşlemesi)
@@ -120,10 +603,154 @@ DEFAULT_USERS = {
 }
 
 
+def _new_pending() -> dict:
+    """Batch içinde henüz commit edilmemiş değişiklikler (bkz. _build_transfer)."""
+    return {"accounts": {}, "spent": set(), "outputs": {}}
+
+
+def _build_transfer(
+    ledger: dict,
+    pending: dict,
+    now: str,
+    sender_address: str,
+    receiver_address: str,
+    amount: Decimal,
+    **tx_fields
+) -> Tuple[dict, Optional[list]]:
+    """
+    Tek bir transferi doğrula ve commit edilecek op'ları üret.
+    Gönderen ve alıcının _account_locks stripe'ları tutulurken çağrılır; tx_id
+    commit sırasında _assign_tx_ids ile atanır.
+
+    Gönderenin harcanmamış çıktılarından coin selection ile girdiler seçilir ve
+    harcanır; alıcıya tutar kadar, göndericiye artan kadar (change) çıktı üretilir.
+    State'i değiştirmez; pending (_new_pending) aynı batch içinde henüz commit
+    edilmemiş hesap/UTXO değişikliklerini tutar ve başarılı transferde güncellenir.
+
+    Returns:
+        (sonuç dict'i, op listesi) - hata durumunda op listesi None
+    """
+    sender_address = sender_address.lower()
+    receiver_address = receiver_address.lower()
+
+    if amount <= 0:
+        return {"error": "amount must be positive"}, None
+
+    def current(address):
+        return pending["accounts"].get(address) or ledger["accounts"].get(address)
+
+    # Gönderen kontrolü
+    sender_account = current(sender_address)
+    if not sender_account:
+        return {"error": "sender not found", "address": sender_address}, None
+
+    # Girdi seçimi (harcanmamış çıktılardan)
+    available = _unspent_outputs(sender_address, pending)
+    inputs = _select_coins(available, amount)
+    if inputs is None:
+        return {
+            "error": "insufficient balance",
+            "available": str(sum((Decimal(u["amount"]) for u in available), Decimal("0"))),
+            "requested": str(amount)
+        }, None
+    change = sum((Decimal(u["amount"]) for u in inputs), Decimal("0")) - amount
+
+    # Bakiyeleri güncelle
+    sender_balance = Decimal(sender_account["balance"])
+    new_sender = dict(sender_account)
+    new_sender["balance"] = str(sender_balance - amount)
+    new_sender["updated_at"] = now
+
+    # Alıcı kontrolü - yoksa oluştur
+    if receiver_address == sender_address:
+        receiver_account = new_sender
+    else:
+        receiver_account = current(receiver_address) or {
+            "address": receiver_address,
+            "name": DEFAULT_USERS.get(receiver_address, "Unknown"),
+            "balance": "0",
+            "created_at": now,
+            "updated_at": now
+        }
+    receiver_balance = Decimal(receiver_account["balance"])
+
+    new_receiver = dict(receiver_account)
+    new_receiver["balance"] = str(receiver_balance + amount)
+    new_receiver["updated_at"] = now
+    if receiver_address == sender_address:
+        new_sender = new_receiver
+
+    # Çıktılar: alıcıya tutar, göndericiye para üstü
+    input_ids = [u["utxo_id"] for u in inputs]
+    utxo = _new_output(sender_address, receiver_address, amount, now, "transfer", tx_id=None, inputs=input_ids)
+    outputs = [utxo]
+    change_utxo = None
+    if change > 0:
+        change_utxo = _new_output(sender_address, sender_address, change, now, "change", tx_id=None)
+        outputs.append(change_utxo)
+
+    # Transaction kaydı
+    transaction = {
+        "tx_id": None,
+        "sender": sender_address,
+        "receiver": receiver_address,
+        "amount": str(amount),
+        "tx_hash": tx_fields.get("tx_hash"),
+        "ipfs_cid": tx_fields.get("ipfs_cid"),
+        "utxo_id": utxo["utxo_id"],
+        "inputs": input_ids,
+        "change_utxo_id": change_utxo["utxo_id"] if change_utxo else None,
+        "template_id": tx_fields.get("template_id"),
+        "template_cid": tx_fields.get("template_cid"),
+        "template_snapshot_cid": tx_fields.get("template_snapshot_cid"),
+        "status": "confirmed",
+        "created_at": now
+    }
+    if tx_fields.get("pipeline_status"):
+        transaction["pipeline_status"] = tx_fields["pipeline_status"]
+        # Pipeline yeniden başlatılınca job'ı kurmak için
+        transaction["validator"] = tx_fields.get("validator")
+        transaction["metadata"] = tx_fields.get("metadata")
+        transaction["pipeline_owner"] = tx_fields.get("pipeline_owner")
+    if tx_fields.get("event_key"):
+        transaction["event_key"] = tx_fields["event_key"]
+    if tx_fields.get("reverts") is not None:
+        transaction["reverts"] = tx_fields["reverts"]
+
+    pending["accounts"][sender_address] = new_sender
+    pending["accounts"][receiver_address] = new_receiver
+    pending["spent"].update(input_ids)
+    for output in outputs:
+        pending["outputs"].setdefault(output["receiver"], []).append(output)
+
+    ops = [["acc", sender_address, new_sender]]
+    if receiver_address != sender_address:
+        ops.append(["acc", receiver_address, new_receiver])
+    ops += [_spend_op(utxo_id, now) for utxo_id in input_ids]
+    ops += [["utxo", output] for output in outputs]
+    ops.append(["tx", transaction])
+    result = {
+        "status": "success",
+        "tx_id": None,
+        "utxo_id": utxo["utxo_id"],
+        "inputs": input_ids,
+        "change_utxo_id": transaction["change_utxo_id"],
+        "sender": sender_address,
+        "receiver": receiver_address,
+        "amount": str(amount),
+        "sender_new_balance": new_sender["balance"],
+        "receiver_new_balance": new_receiver["balance"],
+        "created_at": now
+    }
+    return result, ops
+
+
 class OpenCBDCLedger:
     """
     OpenCBDC UTXO-based Ledger.
     Thread-safe operations for account management and transfers.
+    Hesap işlemleri sadece ilgili hesapları kilitler (_account_locks);
+    global _lock yalnızca tx_id tahsisi ve commit için kısa süre tutulur.
     Tüm yazma işlemleri ana ledger + tüm validator ledger'larına yazılır.
     """
 
@@ -144,11 +771,9 @@ class OpenCBDCLedger:
         """
         address = address.lower()
 
-        with _lock:
-            ledger = _load_ledger()
-
+        def build(ledger):
             if address in ledger["accounts"]:
-                return {"error": "account already exists", "address": address}
+                return {"error": "account already exists", "address": address}, []
 
             now = datetime.utcnow().isoformat()
             account = {
@@ -158,66 +783,59 @@ class OpenCBDCLedger:
                 "created_at": now,
                 "updated_at": now
             }
+            ops = [["acc", address, account]]
 
-            ledger["accounts"][address] = account
-
-            # Initial balance için UTXO oluştur (mint)
+            # Initial balance için harcanabilir UTXO oluştur (mint)
             if initial_balance > 0:
-                utxo = {
-                    "utxo_id": _generate_utxo_id("mint", address, str(initial_balance)),
-                    "sender": "mint",
-                    "receiver": address,
-                    "amount": str(initial_balance),
-                    "timestamp": now,
-                    "status": "confirmed",
-                    "type": "mint"
-                }
-                ledger["utxos"].append(utxo)
+                ops.append(["utxo", _new_output("mint", address, initial_balance, now, "mint")])
 
-            _save_ledger(ledger)
+            response = {"status": "success", "account": dict(account)}
+            return response, [(response, ops)]
 
-        return {"status": "success", "account": account}
+        return _mutate([address], build)
 
     @staticmethod
     def get_account(address: str) -> Optional[dict]:
         """Hesap bilgisini getir."""
         address = address.lower()
-        ledger = _load_ledger()
-        return ledger["accounts"].get(address)
+        account = _load_ledger()["accounts"].get(address)
+        return dict(account) if account else None
 
     @staticmethod
     def get_all_accounts() -> List[dict]:
         """Tüm hesapları listele."""
-        ledger = _load_ledger()
-        return list(ledger["accounts"].values())
+        return [dict(acc) for acc in list(_load_ledger()["accounts"].values())]
 
     @staticmethod
     def get_balance(address: str) -> Decimal:
-        """Hesap bakiyesini getir."""
+        """Hesap bakiyesini getir (harcanmamış çıktıların toplamı, O(#unspent))."""
         address = address.lower()
-        ledger = _load_ledger()
-        account = ledger["accounts"].get(address)
-        if account:
-            return Decimal(account["balance"])
-        return Decimal("0")
+        _load_ledger()
+        return sum((Decimal(utxo["amount"]) for utxo in _unspent_outputs(address)), Decimal("0"))
 
     @staticmethod
     def update_balance(address: str, new_balance: Decimal) -> bool:
         """Hesap bakiyesini güncelle."""
         address = address.lower()
 
-        with _lock:
-            ledger = _load_ledger()
-
+        def build(ledger):
             if address not in ledger["accounts"]:
-                return False
+                return False, []
 
-            ledger["accounts"][address]["balance"] = str(new_balance)
-            ledger["accounts"][address]["updated_at"] = datetime.utcnow().isoformat()
+            now = datetime.utcnow().isoformat()
+            account = dict(ledger["accounts"][address])
+            account["balance"] = str(new_balance)
+            account["updated_at"] = now
 
-            _save_ledger(ledger)
+            # Bakiye UTXO set'ten türetildiği için eski çıktılar harcanır,
+            # yeni bakiye tek bir düzeltme çıktısı olarak yazılır
+            ops = [["acc", address, account]]
+            ops += [_spend_op(utxo["utxo_id"], now) for utxo in _unspent_outputs(address)]
+            if new_balance > 0:
+                ops.append(["utxo", _new_output("adjustment", address, new_balance, now, "adjustment")])
+            return True, [({}, ops)]
 
-        return True
+        return _mutate([address], build)
 
     # ==================== TRANSFER OPERATIONS ====================
 
@@ -230,161 +848,339 @@ class OpenCBDCLedger:
         ipfs_cid: str = None,
         template_id: str = None,
         template_cid: str = None,
-        template_snapshot_cid: str = None
+        template_snapshot_cid: str = None,
+        pipeline_status: str = None,
+        validator: str = None,
+        metadata: dict = None,
+        pipeline_owner: str = None
     ) -> dict:
         """
         Transfer işlemi yap.
         UTXO oluşturur ve bakiyeleri günceller.
         Tüm validator ledger'ları otomatik güncellenir.
+
+        pipeline_status verilirse blockchain/IPFS adımları arka planda tamamlanacak
+        demektir (bkz. transfer_pipeline); sonuçları update_transaction ile yazılır.
+        validator, metadata ve pipeline_owner (işi yürüten process) bu durumda
+        transaction'a yazılır; process ölürse iş başka process'te devam ettirilir.
+
+        Sadece gönderen/alıcı hesaplarının lock'ları tutulur; ilgisiz hesaplar
+        arasındaki transferler paralel doğrulanır, global _lock sadece commit anında alınır.
         """
         sender_address = sender_address.lower()
         receiver_address = receiver_address.lower()
 
-        if amount <= 0:
-            return {"error": "amount must be positive"}
+        def build(ledger):
+            now = datetime.utcnow().isoformat()
 
-        with _lock:
-            ledger = _load_ledger()
+            result, ops = _build_transfer(
+                ledger, _new_pending(), now,
+                sender_address, receiver_address, amount,
+                tx_hash=tx_hash,
+                ipfs_cid=ipfs_cid,
+                template_id=template_id,
+                template_cid=template_cid,
+                template_snapshot_cid=template_snapshot_cid,
+                pipeline_status=pipeline_status,
+                validator=validator,
+                metadata=metadata,
+                pipeline_owner=pipeline_owner
+            )
+            return result, [(result, ops)] if ops else []
+
+        return _mutate([sender_address, receiver_address], build)
+
+    @staticmethod
+    def update_transaction(tx_id: int, **fields) -> dict:
+        """
+        Commit edilmiş bir transaction'ın ek alanlarını güncelle
+        (tx_hash, block_number, ipfs_cid, pipeline_status ...).
+        Hesap bakiyeleri ve UTXO'lar değişmez.
+        """
+        protected = {"tx_id", "sender", "receiver", "amount", "utxo_id", "inputs", "change_utxo_id", "event_key", "reverts"}
+        if protected & fields.keys():
+            return {"error": "immutable transaction fields", "fields": sorted(protected & fields.keys())}
+
+        def build(ledger):
+            if tx_id not in _index.tx_by_id:
+                return {"error": "transaction not found", "tx_id": tx_id}, []
+            result = {"status": "success", "tx_id": tx_id}
+            return result, [(result, [["txupd", tx_id, fields]])]
+
+        return _mutate([_transaction_key(tx_id)], build)
+
+    @staticmethod
+    def claim_pipeline_transaction(tx_id: int, expected_owner: Optional[str], owner: str) -> dict:
+        """
+        Yarım kalan pipeline işini sahiplen (compare-and-set).
+        pipeline_owner hâlâ expected_owner ise owner yazılır; başka bir process
+        arada sahiplendiyse veya iş bittiyse hata döner.
+        """
+        def build(ledger):
+            tx = _index.tx_by_id.get(tx_id)
+            if tx is None:
+                return {"error": "transaction not found", "tx_id": tx_id}, []
+            if tx.get("pipeline_owner") != expected_owner or tx.get("pipeline_status") in ("completed", "failed"):
+                return {"error": "already claimed", "tx_id": tx_id}, []
+            result = {"status": "success", "tx_id": tx_id}
+            return result, [(result, [["txupd", tx_id, {"pipeline_owner": owner}]])]
+
+        return _mutate([_transaction_key(tx_id)], build)
 
-            # Gönderen kontrolü
-            if sender_address not in ledger["accounts"]:
-                return {"error": "sender not found", "address": sender_address}
-
-            sender_account = ledger["accounts"][sender_address]
-            sender_balance = Decimal(sender_account["balance"])
-
-            if sender_balance < amount:
-                return {
-                    "error": "insufficient balance",
-                    "available": str(sender_balance),
-                    "requested": str(amount)
-                }
-
-            # Alıcı kontrolü - yoksa oluştur
-            if receiver_address not in ledger["accounts"]:
-                now = datetime.utcnow().isoformat()
-                ledger["accounts"][receiver_address] = {
-                    "address": receiver_address,
-                    "name": DEFAULT_USERS.get(receiver_address, "Unknown"),
-                    "balance": "0",
-                    "created_at": now,
-                    "updated_at": now
-                }
-
-            receiver_account = ledger["accounts"][receiver_address]
-            receiver_balance = Decimal(receiver_account["balance"])
-
-            # Bakiyeleri güncelle
+    @staticmethod
+    def transfer_batch(transfers: List[dict], checkpoint: Dict[str, Any] = None) -> dict:
+        """
+        Birden çok transferi tek lock alımı ve tek kalıcı yazma (tek WAL kaydı) ile uygula.
+        Batch'teki tüm hesapların lock'ları sıralı olarak bir kez alınır.
+        Transferler sırayla doğrulanır; önceki başarılı transferlerin bakiye etkisi
+        sonrakiler için geçerlidir. Başarısız olanlar diğerlerini engellemez.
+
+        tx_hash + log_index verilen transferler (blockchain event'leri) ledger'da
+        zaten varsa tekrar uygulanmaz ("duplicate" sonucu, mevcut tx_id ile).
+
+        Args:
+            transfers: transfer() parametreleriyle aynı anahtarlara sahip dict listesi
+                       (sender_address, receiver_address, amount, tx_hash, log_index, ipfs_cid, ...)
+            checkpoint: Transferlerle aynı commit'te metadata'ya yazılacak alanlar
+                        (ör. event listener'ın son işlenen bloğu); transfer olmasa da yazılır
+
+        Returns:
+            {"status", "results": [her transfer için sonuç], "succeeded", "duplicates", "failed"}
+        """
+        addresses = set()
+        for item in transfers:
+            addresses.add(str(item.get("sender_address") or "").lower())
+            addresses.add(str(item.get("receiver_address") or "").lower())
+        repeats = []
+
+        def build(ledger):
+            results = []
+            built = []
             now = datetime.utcnow().isoformat()
+            pending = _new_pending()
+            batch_events = {}
+            repeats.clear()
+
+            for i, item in enumerate(transfers):
+                sender = item.get("sender_address") or ""
+                receiver = item.get("receiver_address") or ""
+                if not sender or not receiver:
+                    results.append({"index": i, "error": "sender_address and receiver_address required"})
+                    continue
+                event_key = _event_key(item.get("tx_hash"), item.get("log_index"))
+                if event_key in _index.tx_by_event or event_key in batch_events:
+                    # Aynı event daha önce (veya bu batch'te) uygulandı: replay
+                    results.append({
+                        "index": i,
+                        "status": "duplicate",
+                        "tx_id": _index.tx_by_event.get(event_key),
+                        "event_key": event_key
+                    })
+                    if event_key in batch_events:
+                        repeats.append((results[-1], batch_events[event_key]))
+                    continue
+                try:
+                    amount = Decimal(str(item.get("amount")))
+                except ArithmeticError:
+                    amount = None
+                if amount is None or not amount.is_finite():
+                    results.append({"index": i, "error": "invalid amount"})
+                    continue
+
+                result, item_ops = _build_transfer(
+                    ledger, pending, now,
+                    sender, receiver, amount,
+                    tx_hash=item.get("tx_hash"),
+                    ipfs_cid=item.get("ipfs_cid"),
+                    template_id=item.get("template_id"),
+                    template_cid=item.get("template_cid"),
+                    template_snapshot_cid=item.get("template_snapshot_cid"),
+                    pipeline_status=item.get("pipeline_status"),
+                    validator=item.get("validator"),
+                    metadata=item.get("metadata"),
+                    pipeline_owner=item.get("pipeline_owner"),
+                    event_key=event_key
+                )
+                result["index"] = i
+                results.append(result)
+
+                if item_ops:
+                    built.append((result, item_ops))
+                    if event_key:
+                        batch_events[event_key] = result
+
+            if checkpoint:
+                # Checkpoint transferlerle aynı kayıtta commit edilir (crash'te ikisi birlikte kalır/kaybolur)
+                built.append(({}, [["meta", key, value] for key, value in checkpoint.items()]))
+
+            return results, built
+
+        results = _mutate(addresses, build)
+        # Batch içindeki tekrarlar: ilk uygulamanın tx_id'si commit'te atandı
+        for duplicate, original in repeats:
+            duplicate["tx_id"] = original["tx_id"]
+        succeeded = sum(1 for r in results if r.get("status") == "success")
+        duplicates = sum(1 for r in results if r.get("status") == "duplicate")
+        return {
+            "status": "success" if succeeded or duplicates else "failed",
+            "results": results,
+            "succeeded": succeeded,
+            "duplicates": duplicates,
+            "failed": len(results) - succeeded - duplicates
+        }
 
-            ledger["accounts"][sender_address]["balance"] = str(sender_balance - amount)
-            ledger["accounts"][sender_address]["updated_at"] = now
+    @staticmethod
+    def revert_events(events: List[Tuple[str, int]], checkpoint: Dict[str, Any] = None) -> dict:
+        """
+        Blockchain reorg'unda geçersiz kalan event transferlerini geri al.
+        Her transfer için alıcıdan göndericiye ters transfer ("reverts": tx_id) yazılır
+        ve orijinal transaction "reverted" işaretlenir; event yeni zincirde tekrar
+        görülürse transfer_batch ile yeniden uygulanır. En son uygulanan önce geri
+        alınır. Ledger'da olmayan (hiç uygulanmamış) event'ler atlanır.
 
-            ledger["accounts"][receiver_address]["balance"] = str(receiver_balance + amount)
-            ledger["accounts"][receiver_address]["updated_at"] = now
+        Ters transfer yapılamazsa (ör. alıcı tutarı harcamış) orijinal transaction
+        aynı commit'te "revert_failed" (+ revert_error) işaretlenir; bu kayıtlar
+        get_stats / get_revert_failed_transactions ile raporlanır ve elle telafi edilir.
 
-            # UTXO oluştur
-            utxo_id = _generate_utxo_id(sender_address, receiver_address, str(amount))
-            utxo = {
-                "utxo_id": utxo_id,
-                "sender": sender_address,
-                "receiver": receiver_address,
-                "amount": str(amount),
-                "timestamp": now,
-                "status": "confirmed",
-                "type": "transfer"
-            }
-            ledger["utxos"].append(utxo)
+        Args:
+            events: [(tx_hash, log_index), ...]
+            checkpoint: Geri almayla aynı commit'te metadata'ya yazılacak alanlar
 
-            # Transaction kaydı
-            tx_id = max((tx["tx_id"] for tx in ledger["transactions"]), default=0) + 1
-            transaction = {
-                "tx_id": tx_id,
-                "sender": sender_address,
-                "receiver": receiver_address,
-                "amount": str(amount),
-                "tx_hash": tx_hash,
-                "ipfs_cid": ipfs_cid,
-                "utxo_id": utxo_id,
-                "template_id": template_id,
-                "template_cid": template_cid,
-                "template_snapshot_cid": template_snapshot_cid,
-                "status": "confirmed",
-                "created_at": now
-            }
-            ledger["transactions"].append(transaction)
+        Returns:
+            {"status", "results": [geri alınan her transaction için sonuç], "reverted", "failed"}
+        """
+        event_keys = {_event_key(tx_hash, log_index) for tx_hash, log_index in events} - {None}
+        index = _ledger_index()
+        keys = set()
+        for event_key in event_keys:
+            tx = index.tx_by_id.get(index.tx_by_event.get(event_key))
+            if tx:
+                keys.update((tx["sender"], tx["receiver"], _transaction_key(tx["tx_id"])))
+
+        def build(ledger):
+            results = []
+            built = []
+            now = datetime.utcnow().isoformat()
+            pending = _new_pending()
+
+            tx_ids = sorted({_index.tx_by_event[k] for k in event_keys if k in _index.tx_by_event}, reverse=True)
+            for tx_id in tx_ids:
+                tx = _index.tx_by_id[tx_id]
+                result, ops = _build_transfer(
+                    ledger, pending, now,
+                    tx["receiver"], tx["sender"], Decimal(tx["amount"]),
+                    reverts=tx_id
+                )
+                result["reverts"] = tx_id
+                results.append(result)
+                if ops:
+                    ops.append(["txupd", tx_id, {"status": "reverted", "reverted_at": now}])
+                    built.append((result, ops))
+                else:
+                    built.append((result, [["txupd", tx_id, {
+                        "status": "revert_failed",
+                        "revert_error": result.get("error"),
+                        "revert_failed_at": now
+                    }]]))
+
+            if checkpoint:
+                built.append(({}, [["meta", key, value] for key, value in checkpoint.items()]))
+
+            return results, built
+
+        results = _mutate(keys, build)
+        reverted = sum(1 for r in results if r.get("status") == "success")
+        return {
+            "status": "success" if reverted == len(results) else "partial",
+            "results": results,
+            "reverted": reverted,
+            "failed": len(results) - reverted
+        }
+
+    # ==================== CHANGE FEED ====================
 
-            _save_ledger(ledger)
+    @staticmethod
+    def get_change_cursor() -> int:
+        """Değişiklik akışının şu anki sonu (get_changes ile buradan sonrası okunur)."""
+        _load_ledger()
+        return _change_feed.seq
+
+    @staticmethod
+    def get_changes(cursor: int, limit: int = None, timeout: float = 0) -> dict:
+        """
+        cursor'dan sonra commit edilen değişiklikler, O(yeni kayıt).
+        Yeni kayıt yoksa timeout saniyeye kadar bekler: bu process'teki commit'ler
+        hemen uyandırır, diğer process'lerinkiler LEDGER_CHANGE_FEED_POLL aralığıyla görülür.
+
+        Returns:
+            {"cursor": sonraki çağrıda verilecek değer,
+             "changes": [{"seq", "ops"[, "reload"]}, ...],
+             "truncated": aradaki kayıtlar akıştan düştüyse True (tüketici yeniden senkronize olmalı)}
+        """
+        deadline = time.monotonic() + (timeout or 0)
+        while True:
+            # Diğer process'lerin commit'lerini akışa al
+            _load_ledger()
+            changes, truncated = _change_feed.read(cursor, limit)
+            remaining = deadline - time.monotonic()
+            if changes or remaining <= 0:
+                break
+            _change_feed.wait(cursor, min(remaining, Config.LEDGER_CHANGE_FEED_POLL))
 
         return {
-            "status": "success",
-            "tx_id": tx_id,
-            "utxo_id": utxo_id,
-            "sender": sender_address,
-            "receiver": receiver_address,
-            "amount": str(amount),
-            "sender_new_balance": str(sender_balance - amount),
-            "receiver_new_balance": str(receiver_balance + amount),
-            "created_at": now
+            "cursor": changes[-1]["seq"] if changes else cursor,
+            "changes": changes,
+            "truncated": truncated
         }
 
+    @staticmethod
+    def get_metadata(key: str, default=None):
+        """Ledger metadata alanı (ör. transfer_batch checkpoint'i)."""
+        return _load_ledger()["metadata"].get(key, default)
+
     # ==================== TRANSACTION/UTXO QUERIES ====================
 
     @staticmethod
     def get_transaction(tx_id: int) -> Optional[dict]:
         """Transaction ID ile sorgula."""
-        ledger = _load_ledger()
-        for tx in ledger["transactions"]:
-            if tx["tx_id"] == tx_id:
-                return tx
-        return None
+        tx = _ledger_index().tx_by_id.get(tx_id)
+        return dict(tx) if tx else None
 
     @staticmethod
     def get_transactions_by_address(address: str, limit: int = 50) -> List[dict]:
         """Adrese ait transaction'ları getir."""
         address = address.lower()
-        ledger = _load_ledger()
-
-        txs = [
-            tx for tx in ledger["transactions"]
-            if tx["sender"] == address or tx["receiver"] == address
-        ]
-
-        txs.sort(key=lambda x: x["created_at"], reverse=True)
-        return txs[:limit]
+        index = _ledger_index()
+        tx_ids = index.txs_by_address.get(address, [])[-limit:] if limit > 0 else []
+        return [dict(index.tx_by_id[tx_id]) for tx_id in reversed(tx_ids)]
 
     @staticmethod
     def get_all_transactions(limit: int = 50) -> List[dict]:
-        """Tüm transaction'ları getir."""
-        ledger = _load_ledger()
-        txs = sorted(
-            ledger["transactions"],
-            key=lambda x: x["created_at"],
-            reverse=True
-        )
-        return txs[:limit]
+        """Tüm transaction'ları getir (en yeniden eskiye)."""
+        index = _ledger_index()
+        tx_ids = index.txs_by_time[-limit:] if limit > 0 else []
+        return [dict(index.tx_by_id[tx_id]) for tx_id in reversed(tx_ids)]
 
     @staticmethod
     def get_utxos_by_address(address: str) -> List[dict]:
         """Adrese ait UTXO'ları getir."""
         address = address.lower()
-        ledger = _load_ledger()
+        index = _ledger_index()
+        return [dict(index.utxo_by_id[utxo_id]) for utxo_id in list(index.utxos_by_address.get(address, []))]
 
-        return [
-            utxo for utxo in ledger["utxos"]
-            if utxo["sender"] == address or utxo["receiver"] == address
-        ]
+    @staticmethod
+    def get_unspent_utxos(address: str) -> List[dict]:
+        """Adresin harcanabilir (unspent) UTXO'ları."""
+        address = address.lower()
+        _load_ledger()
+        return [dict(utxo) for utxo in _unspent_outputs(address)]
 
     @staticmethod
     def get_all_utxos(limit: int = 100) -> List[dict]:
-        """Tüm UTXO'ları getir."""
-        ledger = _load_ledger()
-        utxos = sorted(
-            ledger["utxos"],
-            key=lambda x: x["timestamp"],
-            reverse=True
-        )
-        return utxos[:limit]
+        """Tüm UTXO'ları getir (en yeniden eskiye)."""
+        index = _ledger_index()
+        utxo_ids = index.utxos_by_time[-limit:] if limit > 0 else []
+        return [dict(index.utxo_by_id[utxo_id]) for utxo_id in reversed(utxo_ids)]
 
     # ==================== MINT (Para basma) ====================
 
@@ -396,136 +1192,153 @@ class OpenCBDCLedger:
         if amount <= 0:
             return {"error": "amount must be positive"}
 
-        with _lock:
-            ledger = _load_ledger()
-
+        def build(ledger):
             now = datetime.utcnow().isoformat()
-            if receiver_address not in ledger["accounts"]:
-                ledger["accounts"][receiver_address] = {
-                    "address": receiver_address,
-                    "name": DEFAULT_USERS.get(receiver_address, "Unknown"),
-                    "balance": "0",
-                    "created_at": now,
-                    "updated_at": now
-                }
-
-            current = Decimal(ledger["accounts"][receiver_address]["balance"])
-            ledger["accounts"][receiver_address]["balance"] = str(current + amount)
-            ledger["accounts"][receiver_address]["updated_at"] = now
-
-            utxo_id = _generate_utxo_id("mint", receiver_address, str(amount))
-            utxo = {
+            account = ledger["accounts"].get(receiver_address) or {
+                "address": receiver_address,
+                "name": DEFAULT_USERS.get(receiver_address, "Unknown"),
+                "balance": "0",
+                "created_at": now,
+                "updated_at": now
+            }
+
+            current = Decimal(account["balance"])
+            account = dict(account)
+            account["balance"] = str(current + amount)
+            account["updated_at"] = now
+
+            utxo = _new_output("mint", receiver_address, amount, now, "mint", reason=reason)
+            utxo_id = utxo["utxo_id"]
+
+            response = {
+                "status": "success",
                 "utxo_id": utxo_id,
-                "sender": "mint",
                 "receiver": receiver_address,
                 "amount": str(amount),
-                "timestamp": now,
-                "status": "confirmed",
-                "type": "mint",
-                "reason": reason
+                "new_balance": str(current + amount)
             }
-            ledger["utxos"].append(utxo)
-
-            _save_ledger(ledger)
+            return response, [(response, [["acc", receiver_address, account], ["utxo", utxo]])]
 
-        return {
-            "status": "success",
-            "utxo_id": utxo_id,
-            "receiver": receiver_address,
-            "amount": str(amount),
-            "new_balance": str(current + amount)
-        }
+        return _mutate([receiver_address], build)
 
     # ==================== LEDGER STATS ====================
 
     @staticmethod
     def get_stats() -> dict:
-        """Ledger istatistikleri."""
+        """Ledger istatistikleri (running aggregate'lerden, O(1))."""
         ledger = _load_ledger()
 
-        total_supply = sum(
-            Decimal(acc["balance"])
-            for acc in ledger["accounts"].values()
-        )
-
         return {
             "total_accounts": len(ledger["accounts"]),
             "total_utxos": len(ledger["utxos"]),
             "total_transactions": len(ledger["transactions"]),
-            "total_supply": str(total_supply),
+            "total_supply": ledger["metadata"]["total_supply"],
             "currency": "DTL",
-            "created_at": ledger["metadata"].get("created_at")
+            "created_at": ledger["metadata"].get("created_at"),
+            # Reorg'da geri alınamayan (telafi bekleyen) transfer sayısı; liste
+            # get_revert_failed_transactions ile
+            "revert_failed": len(_index.revert_failed)
         }
 
+    @staticmethod
+    def get_unfinished_pipeline_transactions() -> List[dict]:
+        """Arka plan pipeline'ı tamamlanmamış (completed/failed olmayan) transaction'lar."""
+        return [
+            dict(tx) for _, tx in sorted(_ledger_index().tx_by_id.items())
+            if tx.get("pipeline_status") and tx["pipeline_status"] not in ("completed", "failed")
+        ]
+
+    @staticmethod
+    def get_revert_failed_transactions() -> List[dict]:
+        """Reorg'da ters transferi yapılamamış, telafi bekleyen transaction'lar."""
+        return [dict(tx) for _, tx in sorted(_ledger_index().revert_failed.items())]
+
     @staticmethod
     def reset_ledger():
         """Ledger'ı sıfırla (TEST AMAÇLI). Ana + tüm validator ledger'ları silinir."""
-        with _lock:
-            for filepath in [LEDGER_FILE] + list(VALIDATOR_LEDGER_FILES.values()):
-                if os.path.exists(filepath):
-                    os.remove(filepath)
+        global _state, _index
+        _load_ledger()
+        with _account_locks.hold_all(), _lock, _backend.write_section():
+            _index = _LedgerIndex()
+            _state = _empty_ledger()
+            _backend.reset(_state)
+            _change_feed.append([], reload=True)
+
+    @staticmethod
+    def checkpoint():
+        """
+        Açık kalıcılık sınırı: JSON+WAL modunda snapshot yazılır ve WAL boşaltılır,
+        SQLite modunda değişiklik tablosu kırpılır.
+        """
+        if _state is None:
+            return
+        with _lock, _backend.write_section():
+            _catch_up()
+            _backend.checkpoint(_state)
 
     @staticmethod
     def get_validator_ledger(validator_name: str) -> dict:
-        """Belirli bir validator'ın ledger dosyasını oku."""
-        filepath = VALIDATOR_LEDGER_FILES.get(validator_name)
-        if not filepath or not os.path.exists(filepath):
-            return _empty_ledger()
-        try:
-            with open(filepath, 'r', encoding='utf-8') as f:
-                return json.load(f)
-        except json.JSONDecodeError:
-            return _empty_ledger()
+        """
+        Belirli bir validator'ın ledger'ını getir.
+        JSON modunda replika dosyası (son snapshot) okunur ve snapshot'tan sonraki
+        commit'ler (delta) ortak WAL'dan üzerine uygulanır; SQLite modunda
+        validator'lar ortak veritabanını okur.
+        """
+        _load_ledger()
+        # Lock sadece okunacak son commit'i belirlemek için tutulur; dosya okuma,
+        # replikasyon beklemesi ve WAL replay lock dışında yapılır
+        with _lock, _backend.read_section():
+            _catch_up()
+            seq = _state["metadata"].get("wal_seq", 0)
+        ledger = _backend.read_validator(validator_name, seq)
+        return ledger if ledger is not None else _empty_ledger()
 
     # ==================== TEMPLATE OPERATIONS (IPFS) ====================
 
     @staticmethod
     def create_template(owner: str, template_data: dict) -> dict:
-        """Yeni şablon oluştur. IPFS'e yaz -> CID al -> Index'e kaydet."""
+        """
+        Yeni şablon oluştur.
+        prepare: IPFS'e yaz -> CID al (lock dışında), commit: index'e kaydet (kısa lock),
+        reconcile: IPFS'e yazılamadıysa outbox'a al (CID sonradan index'e işlenir).
+        """
         owner = owner.lower()
+        now = datetime.utcnow().isoformat()
+
+        raw = f"{owner}{template_data.get('template_name', '')}{now}"
+        t_hash = hashlib.sha256(raw.encode()).hexdigest()[:16]
+        template_id = f"tpl_{t_hash}"
+
+        full_data = template_data.copy()
+        full_data["owner_address"] = owner
+        full_data["created_at"] = now
+        full_data["updated_at"] = now
+
+        cid, pending_ipfs = _upload_template(full_data)
+
+        entry = {
+            "owner": owner,
+            "template_name": template_data.get("template_name"),
+            "payee_name": template_data.get("payee_name"),
+            "payee_account": template_data.get("payee_account"),
+            "default_amount": template_data.get("default_amount"),
+            "description": template_data.get("description"),
+            "cid": cid,
+            "status": "active",
+            "pending_ipfs": pending_ipfs,
+            "created_at": now,
+            "updated_at": now,
+            "_backup_data": full_data if pending_ipfs else None
+        }
 
-        with _lock:
-            ledger = _load_ledger()
-            if "templates_index" not in ledger:
-                ledger["templates_index"] = {}
-
-            now = datetime.utcnow().isoformat()
-
-            raw = f"{owner}{template_data.get('template_name', '')}{now}"
-            t_hash = hashlib.sha256(raw.encode()).hexdigest()[:16]
-            template_id = f"tpl_{t_hash}"
-
-            full_data = template_data.copy()
-            full_data["owner_address"] = owner
-            full_data["created_at"] = now
-            full_data["updated_at"] = now
-
-            cid = None
-            pending_ipfs = False
-            try:
-                from backend.infra.ipfs_client import IPFSClient
-                ipfs = IPFSClient()
-                cid = ipfs.add_json(full_data)
-            except Exception:
-                pending_ipfs = True
-
-            ledger["templates_index"][template_id] = {
-                "owner": owner,
-                "template_name": template_data.get("template_name"),
-                "payee_name": template_data.get("payee_name"),
-                "payee_account": template_data.get("payee_account"),
-                "default_amount": template_data.get("default_amount"),
-                "description": template_data.get("description"),
-                "cid": cid,
-                "status": "active",
-                "pending_ipfs": pending_ipfs,
-                "created_at": now,
-                "updated_at": now,
-                "_backup_data": full_data if pending_ipfs else None
-            }
-
-            _save_ledger(ledger)
+        _load_ledger()
+        with _lock, _backend.write_section():
+            _catch_up()
+            lsn = _commit(_state, [["tpl", template_id, entry]])
 
+        _wait_durable(lsn)
+        if pending_ipfs:
+            _enqueue_ipfs("template", full_data, template_id)
         return {
             "status": "success",
             "template_id": template_id,
@@ -569,7 +1382,7 @@ class OpenCBDCLedger:
         templates_index = ledger.get("templates_index", {})
 
         result = []
-        for t_id, entry in templates_index.items():
+        for t_id, entry in list(templates_index.items()):
             if entry.get("owner") == owner_address and entry.get("status") == "active":
                 item = entry.copy()
                 item["template_id"] = t_id
@@ -581,41 +1394,40 @@ class OpenCBDCLedger:
 
     @staticmethod
     def update_template(template_id: str, owner: str, new_data: dict) -> dict:
-        """Template güncelle (Yeni JSON -> Yeni CID)."""
+        """
+        Template güncelle (Yeni JSON -> Yeni CID).
+        create_template gibi IPFS'e lock dışında yazılır; commit anında template
+        tekrar kontrol edilir (bu arada silindiyse güncelleme yapılmaz).
+        """
         owner = owner.lower()
 
-        with _lock:
-            ledger = _load_ledger()
-            if "templates_index" not in ledger:
-                return {"error": "ledger corrupted"}
-
-            entry = ledger["templates_index"].get(template_id)
-            if not entry:
-                return {"error": "template not found"}
+        entry = _load_ledger().get("templates_index", {}).get(template_id)
+        error = _check_template_owner(entry, owner)
+        if error:
+            return error
 
-            if entry["owner"] != owner:
-                return {"error": "permission denied"}
+        now = datetime.utcnow().isoformat()
 
-            if entry.get("status") == "deleted":
-                 return {"error": "template deleted"}
+        full_data = new_data.copy()
+        full_data["owner_address"] = owner
+        full_data["created_at"] = entry["created_at"]
+        full_data["updated_at"] = now
 
-            now = datetime.utcnow().isoformat()
+        cid, pending_ipfs = _upload_template(full_data)
 
-            full_data = new_data.copy()
-            full_data["owner_address"] = owner
-            full_data["created_at"] = entry["created_at"]
-            full_data["updated_at"] = now
+        with _lock, _backend.write_section():
+            _catch_up()
+            ledger = _state
+            if "templates_index" not in ledger:
+                return {"error": "ledger corrupted"}
 
-            cid = None
-            pending_ipfs = False
-            try:
-                from backend.infra.ipfs_client import IPFSClient
-                ipfs = IPFSClient()
-                cid = ipfs.add_json(full_data)
-            except Exception:
-                pending_ipfs = True
+            entry = ledger["templates_index"].get(template_id)
+            error = _check_template_owner(entry, owner)
+            if error:
+                return error
 
-            ledger["templates_index"][template_id].update({
+            entry = dict(entry)
+            entry.update({
                 "template_name": new_data.get("template_name", entry["template_name"]),
                 "payee_name": new_data.get("payee_name", entry.get("payee_name")),
                 "payee_account": new_data.get("payee_account", entry.get("payee_account")),
@@ -627,8 +1439,11 @@ class OpenCBDCLedger:
                 "_backup_data": full_data if pending_ipfs else None
             })
 
-            _save_ledger(ledger)
+            lsn = _commit(ledger, [["tpl", template_id, entry]])
 
+        _wait_durable(lsn)
+        if pending_ipfs:
+            _enqueue_ipfs("template", full_data, template_id)
         return {
             "status": "success",
             "template_id": template_id,
@@ -641,8 +1456,10 @@ class OpenCBDCLedger:
         """Template sil (soft delete)."""
         owner = owner.lower()
 
-        with _lock:
-            ledger = _load_ledger()
+        _load_ledger()
+        with _lock, _backend.write_section():
+            _catch_up()
+            ledger = _state
             entry = ledger.get("templates_index", {}).get(template_id)
 
             if not entry:
@@ -651,9 +1468,120 @@ class OpenCBDCLedger:
             if entry["owner"] != owner:
                 return {"error": "permission denied"}
 
-            ledger["templates_index"][template_id]["status"] = "deleted"
-            ledger["templates_index"][template_id]["updated_at"] = datetime.utcnow().isoformat()
+            entry = dict(entry)
+            entry["status"] = "deleted"
+            entry["updated_at"] = datetime.utcnow().isoformat()
 
-            _save_ledger(ledger)
+            lsn = _commit(ledger, [["tpl", template_id, entry]])
 
+        _wait_durable(lsn)
         return {"status": "success", "message": "template deleted"}
+
+    @staticmethod
+    def backfill_template_cid(template_id: str, cid: str, content: dict) -> dict:
+        """
+        IPFS outbox'ın sonradan yüklediği template içeriğinin CID'ini index'e yaz.
+        Template bu arada güncellendiyse/silindiyse (bekleyen içerik farklıysa) yazılmaz.
+        """
+        _load_ledger()
+        with _lock, _backend.write_section():
+            _catch_up()
+            ledger = _state
+            entry = ledger.get("templates_index", {}).get(template_id)
+
+            if not entry:
+                return {"error": "template not found"}
+
+            if not entry.get("pending_ipfs") or entry.get("_backup_data") != content:
+                return {"status": "stale", "template_id": template_id}
+
+            entry = dict(entry)
+            entry.update({"cid": cid, "pending_ipfs": False, "_backup_data": None})
+
+            lsn = _commit(ledger, [["tpl", template_id, entry]])
+
+        _wait_durable(lsn)
+        return {"status": "success", "template_id": template_id, "cid": cid}
+
+    @staticmethod
+    def set_template_snapshot(template_id: str, snapshot_cid: str) -> dict:
+        """
+        Template'in IPFS'e yazılmış son snapshot'ının CID'ini index'e kaydet.
+        Snapshot içerik adreslidir; transfer pipeline'ı template içeriği aynı kaldıkça
+        bu CID'i tekrar yüklemeden kullanır.
+        """
+        _load_ledger()
+        with _lock, _backend.write_section():
+            _catch_up()
+            ledger = _state
+            entry = ledger.get("templates_index", {}).get(template_id)
+
+            if not entry or entry.get("status") == "deleted":
+                return {"error": "template not found"}
+
+            if entry.get("snapshot_cid") == snapshot_cid:
+                return {"status": "success", "template_id": template_id, "snapshot_cid": snapshot_cid}
+
+            entry = dict(entry)
+            entry["snapshot_cid"] = snapshot_cid
+
+            lsn = _commit(ledger, [["tpl", template_id, entry]])
+
+        _wait_durable(lsn)
+        return {"status": "success", "template_id": template_id, "snapshot_cid": snapshot_cid}
+
+    @staticmethod
+    def get_pending_ipfs_templates() -> Dict[str, dict]:
+        """IPFS'e henüz yazılamamış template içerikleri: {template_id -> _backup_data}."""
+        templates_index = _load_ledger().get("templates_index", {})
+        return {
+            t_id: entry["_backup_data"]
+            for t_id, entry in list(templates_index.items())
+            if entry.get("pending_ipfs") and entry.get("_backup_data")
+        }
+
+
+def _check_template_owner(entry: Optional[dict], owner: str) -> Optional[dict]:
+    """Template güncellenebilir mi? Değilse hata yanıtı."""
+    if not entry:
+        return {"error": "template not found"}
+    if entry["owner"] != owner:
+        return {"error": "permission denied"}
+    if entry.get("status") == "deleted":
+        return {"error": "template deleted"}
+    return None
+
+
+def _upload_template(full_data: dict) -> Tuple[Optional[str], bool]:
+    """
+    Template JSON'unu IPFS'e yaz; ledger lock'u alınmadan önce çağrılır, böylece
+    yavaş/erişilemeyen IPFS node'u transferleri bekletmez.
+
+    Returns:
+        (cid, pending_ipfs)
+    """
+    try:
+        from backend.infra.ipfs_client import IPFSClient
+        return IPFSClient().add_json(full_data, upload_async=Config.IPFS_ASYNC_UPLOAD), False
+    except Exception as e:
+        logger.warning(f"Template IPFS'e yazılamadı, outbox'a alınacak: {e}")
+        return None, True
+
+
+def _enqueue_ipfs(kind: str, payload: dict, target, field: str = None):
+    """İçeriği kalıcı IPFS outbox'ına ekle; CID yüklenince hedef kayda yazılır."""
+    try:
+        from backend.infra.ipfs_outbox import get_ipfs_outbox
+        get_ipfs_outbox().enqueue(kind, payload, target=target, field=field)
+    except Exception as e:
+        logger.error(f"IPFS outbox'a eklenemedi ({kind} {target}): {e}")
+
+
+@atexit.register
+def _close_backend():
+    """Process kapanırken checkpoint al ve backend'i kapat."""
+    try:
+        OpenCBDCLedger.checkpoint()
+        _backend.close()
+    except Exception as e:
+        logger.warning(f"Ledger backend kapatılamadı: {e}")
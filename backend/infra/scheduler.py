@@ -61,15 +61,67 @@ def write_utxo_log(utxo: dict):
         f.write(f"{utxo['amount']} DTL\n")
 
 
+def _template_info(tx: dict) -> str:
+    """Transfer log'u için template bilgisi (snapshot/template CID'den isim)."""
+    t_id = tx.get("template_id")
+    if not t_id:
+        return ""
+
+    cid = tx.get("template_snapshot_cid") or tx.get("template_cid")
+    try:
+        if cid:
+            from backend.infra.ipfs_client import IPFSClient
+            ipfs = IPFSClient()
+            content = ipfs.cat_json(cid)
+            name = content.get("template_name", "Unknown")
+            payee = content.get("payee_name")
+            if payee:
+                return f"[template: {name} / {payee}]"
+            return f"[template: {name}]"
+        return f"[template: {t_id}]"
+    except:
+        return f"[template: {t_id}]"
+
+
+def _process_change(ops: list):
+    """Bir commit'in op'larından yeni transferleri logla (transaction + alıcı çıktısı)."""
+    utxos = {op[1]["utxo_id"]: op[1] for op in ops if op[0] == "utxo"}
+    for op in ops:
+        if op[0] != "tx":
+            continue
+        tx = op[1]
+        utxo = utxos.get(tx.get("utxo_id"))
+        if not utxo or utxo.get("type") != "transfer":
+            continue
+
+        # Transfer log'u yaz
+        write_transfer_log(
+            sender=utxo["sender"],
+            receiver=utxo["receiver"],
+            amount=Decimal(utxo["amount"]),
+            utxo_id=utxo["utxo_id"],
+            template_info=_template_info(tx)
+        )
+
+        # UTXO log'u yaz
+        write_utxo_log(utxo)
+
+        logger.info(
+            f"Yeni transfer işlendi: {utxo['sender'][:10]}... -> "
+            f"{utxo['receiver'][:10]}... : {utxo['amount']} DTL"
+        )
+
+
 def scheduler_task(app):
     """
     Scheduler - OpenCBDC ledger'ı izler, blockchain'e sync eder.
     PostgreSQL KULLANMIYOR.
+
+    Ledger'ın değişiklik akışını (get_changes) cursor ile okur: commit olunca
+    uyanır ve sadece yeni commit'lerin transferlerini işler.
     """
     logger.info("Scheduler başlatılıyor (OpenCBDC mode)...")
 
-    last_processed_utxo_count = 0
-
     # Başlangıç logu
     os.makedirs(LOGS_DIR, exist_ok=True)
     with open(TRANSFERS_FILE, 'a') as f:
@@ -82,80 +134,29 @@ def scheduler_task(app):
         f.write(f"[{datetime.now().isoformat()}] OpenCBDC LEDGER - SESSION START\n")
         f.write(f"{'='*50}\n")
 
-    # İlk UTXO sayısını al
-    try:
-        from backend.infra.opencbdc_storage import OpenCBDCLedger
-        stats = OpenCBDCLedger.get_stats()
-        last_processed_utxo_count = stats["total_utxos"]
-        logger.info(f"Mevcut UTXO sayısı: {last_processed_utxo_count}")
-    except Exception as e:
-        logger.error(f"Ledger okunamadı: {e}")
+    from backend.infra.opencbdc_storage import OpenCBDCLedger
+
+    # Mevcut kayıtlar işlenmiş sayılır, akış buradan itibaren okunur
+    cursor = None
+    while cursor is None and not _stop_event.is_set():
+        try:
+            cursor = OpenCBDCLedger.get_change_cursor()
+            logger.info(f"Değişiklik akışı cursor: {cursor}")
+        except Exception as e:
+            logger.error(f"Ledger okunamadı: {e}")
+            _stop_event.wait(5)
 
     while not _stop_event.is_set():
         try:
-            from backend.infra.opencbdc_storage import OpenCBDCLedger
-
-            # Yeni UTXO'ları kontrol et
-            stats = OpenCBDCLedger.get_stats()
-            current_utxo_count = stats["total_utxos"]
-
-            if current_utxo_count > last_processed_utxo_count:
-                # Yeni UTXO'lar var
-                all_utxos = OpenCBDCLedger.get_all_utxos(limit=100)
-                new_count = current_utxo_count - last_processed_utxo_count
-
-                # Son N UTXO'yu işle
-                new_utxos = all_utxos[:new_count]
-
-                for utxo in reversed(new_utxos):  # Eski'den yeni'ye
-                    if utxo.get("type") == "transfer":
-                        # İlgili transaction'ı bul (Template bilgisi için)
-                        txs = OpenCBDCLedger.get_all_transactions(limit=50)
-                        tx = next((t for t in txs if t.get("utxo_id") == utxo["utxo_id"]), None)
-                        
-                        tpl_info = ""
-                        if tx and tx.get("template_id"):
-                            t_id = tx["template_id"]
-                            cid = tx.get("template_snapshot_cid") or tx.get("template_cid")
-                            
-                            try:
-                                if cid:
-                                    from backend.infra.ipfs_client import IPFSClient
-                                    ipfs = IPFSClient()
-                                    content = ipfs.cat_json(cid)
-                                    name = content.get("template_name", "Unknown")
-                                    payee = content.get("payee_name")
-                                    if payee:
-                                        tpl_info = f"[template: {name} / {payee}]"
-                                    else:
-                                        tpl_info = f"[template: {name}]"
-                                else:
-                                    tpl_info = f"[template: {t_id}]"
-                            except:
-                                tpl_info = f"[template: {t_id}]"
-
-                        # Transfer log'u yaz
-                        write_transfer_log(
-                            sender=utxo["sender"],
-                            receiver=utxo["receiver"],
-                            amount=Decimal(utxo["amount"]),
-                            utxo_id=utxo["utxo_id"],
-                            template_info=tpl_info
-                        )
-
-                        # UTXO log'u yaz
-                        write_utxo_log(utxo)
-
-                        logger.info(
-                            f"Yeni transfer işlendi: {utxo['sender'][:10]}... -> "
-                            f"{utxo['receiver'][:10]}... : {utxo['amount']} DTL"
-                        )
-
-                last_processed_utxo_count = current_utxo_count
-
-            # Periyodik istatistik logu
-            if _stop_event.wait(5):  # 5 saniyede bir kontrol
-                break
+            # Commit gelene kadar bekler (stop kontrolü için en fazla 1 saniye)
+            feed = OpenCBDCLedger.get_changes(cursor, timeout=1)
+            if feed["truncated"]:
+                logger.warning("Değişiklik akışında kayıp var (tüketici geride kaldı), atlanan commit'ler loglanmadı")
+
+            for change in feed["changes"]:
+                _process_change(change["ops"])
+
+            cursor = feed["cursor"]
 
         except Exception as e:
             logger.error(f"Scheduler hatası: {e}")
@@ -0,0 +1,203 @@
+"""
+Template / Transfer Benchmark.
+Yavaş IPFS node'u altında template işlemlerinin transferleri bekletip bekletmediğini ölçer.
+
+Kullanım:
+    python -m backend.infra.template_bench [--ipfs-delay 2] [--transfers 400] [--templates 8] [--output FILE]
+
+- Geçici bir data dizininde boş ledger ve her /add isteğini --ipfs-delay kadar
+  geciktiren sahte bir IPFS API'si kullanılır (gerçek ledger'a dokunulmaz).
+- Önce sadece transferler (baseline), sonra aynı transferler eşzamanlı template
+  create/update ile çalıştırılır; transfer gecikmeleri ve ledger _lock'unun
+  tutulma süreleri raporlanır. IPFS lock dışında olduğu sürece iki ölçüm
+  birbirine yakın, max lock süresi IPFS gecikmesinden bağımsız olmalıdır.
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import logging
+import tempfile
+import threading
+from decimal import Decimal
+from email.parser import BytesParser
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from backend.config import Config
+
+logger = logging.getLogger('template_bench')
+
+
+class _TimedLock:
+    """threading.Lock yerine geçen, her tutulma süresini kaydeden lock."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._acquired_at = 0.0
+        self.holds = []
+
+    def __enter__(self):
+        self._lock.acquire()
+        self._acquired_at = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.holds.append(time.perf_counter() - self._acquired_at)
+        self._lock.release()
+
+
+def _start_slow_ipfs(delay: float) -> ThreadingHTTPServer:
+    """Her /add isteğine delay saniye sonra yerel CID ile cevap veren sahte IPFS API'si."""
+    from backend.infra.ipfs_client import compute_cid
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, *args):
+            pass
+
+        def do_POST(self):
+            body = self.rfile.read(int(self.headers.get('Content-Length') or 0))
+            time.sleep(delay)
+            if self.path.startswith('/api/v0/add'):
+                header = f"Content-Type: {self.headers['Content-Type']}\r\n\r\n".encode()
+                parts = BytesParser().parsebytes(header + body).get_payload()
+                out = "".join(
+                    json.dumps({"Name": part.get_filename(), "Hash": compute_cid(part.get_payload(decode=True))}) + "\n"
+                    for part in parts
+                ).encode()
+            else:
+                out = b"{}"
+            self.send_response(200)
+            self.send_header("Content-Length", str(len(out)))
+            self.end_headers()
+            self.wfile.write(out)
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True, name='SlowIPFS').start()
+    return server
+
+
+def _use_data_dir(data_dir: str):
+    """Ledger ve IPFS outbox'ı geçici dizine yönlendir."""
+    from backend.infra import opencbdc_storage as storage
+    from backend.infra import ipfs_outbox
+
+    storage.STORAGE_DIR = data_dir
+    storage.LEDGER_FILE = os.path.join(data_dir, 'opencbdc_ledger.json')
+    storage.VALIDATOR_LEDGER_FILES = {
+        f"validator{i}": os.path.join(data_dir, f'opencbdc_validator{i}.json') for i in range(1, 5)
+    }
+    storage.WAL_FILE = os.path.join(data_dir, 'opencbdc_ledger.wal')
+    storage.LOCK_FILE = os.path.join(data_dir, 'opencbdc_ledger.lock')
+    storage.SQLITE_FILE = os.path.join(data_dir, 'opencbdc_ledger.db')
+    storage._backend = storage._create_backend()
+    ipfs_outbox.OUTBOX_FILE = os.path.join(data_dir, 'ipfs_outbox.db')
+
+
+def _percentile(values: list, pct: float) -> float:
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * pct / 100))]
+
+
+def _summary(values: list) -> dict:
+    return {
+        "count": len(values),
+        "p50_ms": round(_percentile(values, 50) * 1000, 2),
+        "p99_ms": round(_percentile(values, 99) * 1000, 2),
+        "max_ms": round(max(values, default=0) * 1000, 2)
+    }
+
+
+def _run_phase(ledger, addresses: list, transfers: int, threads: int, templates: int) -> dict:
+    """Transfer thread'lerini (ve templates > 0 ise template thread'lerini) çalıştır."""
+    from backend.infra import opencbdc_storage as storage
+
+    lock = _TimedLock()
+    storage._lock = lock
+    transfer_latencies, template_latencies = [], []
+    owner = addresses[0]
+
+    def transfer_worker(k: int):
+        for j in range(transfers // threads):
+            sender = addresses[(k + j) % len(addresses)]
+            receiver = addresses[(k * 7 + j + 1) % len(addresses)]
+            started = time.perf_counter()
+            ledger.transfer(sender, receiver, Decimal(1))
+            transfer_latencies.append(time.perf_counter() - started)
+
+    def template_worker(k: int):
+        started = time.perf_counter()
+        result = ledger.create_template(owner, {"template_name": f"bench {k}", "default_amount": 1})
+        template_latencies.append(time.perf_counter() - started)
+        started = time.perf_counter()
+        ledger.update_template(result["template_id"], owner, {"template_name": f"bench {k} v2"})
+        template_latencies.append(time.perf_counter() - started)
+
+    workers = [threading.Thread(target=transfer_worker, args=(k,)) for k in range(threads)]
+    workers += [threading.Thread(target=template_worker, args=(k,)) for k in range(templates)]
+    started = time.perf_counter()
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+
+    return {
+        "elapsed_s": round(time.perf_counter() - started, 3),
+        "transfers": _summary(transfer_latencies),
+        "templates": _summary(template_latencies),
+        "lock_hold": _summary(lock.holds)
+    }
+
+
+def run_benchmark(ipfs_delay: float, transfers: int, threads: int, templates: int) -> dict:
+    server = _start_slow_ipfs(ipfs_delay)
+    Config.IPFS_API_URL = f"http://127.0.0.1:{server.server_port}/api/v0"
+
+    with tempfile.TemporaryDirectory() as data_dir:
+        _use_data_dir(data_dir)
+        from backend.infra.opencbdc_storage import OpenCBDCLedger
+
+        OpenCBDCLedger.reset_ledger()
+        addresses = [f"0x{i:040x}" for i in range(1, 17)]
+        for address in addresses:
+            OpenCBDCLedger.create_account(address, Decimal(100000))
+
+        baseline = _run_phase(OpenCBDCLedger, addresses, transfers, threads, 0)
+        slow_ipfs = _run_phase(OpenCBDCLedger, addresses, transfers, threads, templates)
+
+    server.shutdown()
+    return {
+        "ipfs_delay_s": ipfs_delay,
+        "ledger_backend": Config.LEDGER_BACKEND,
+        "baseline": baseline,
+        "slow_ipfs": slow_ipfs,
+        # Template işlemleri sırasında transferlerin en kötü gecikmesindeki artış
+        "transfer_max_stall_ms": round(slow_ipfs["transfers"]["max_ms"] - baseline["transfers"]["max_ms"], 2)
+    }
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Yavaş IPFS altında template işlemlerinin transferlere etkisini ölç.")
+    parser.add_argument('--ipfs-delay', type=float, default=2.0, help="Sahte IPFS /add gecikmesi (saniye)")
+    parser.add_argument('--transfers', type=int, default=400, help="Her aşamadaki transfer sayısı")
+    parser.add_argument('--threads', type=int, default=8, help="Transfer thread sayısı")
+    parser.add_argument('--templates', type=int, default=8, help="Eşzamanlı template create+update sayısı")
+    parser.add_argument('--output', default=None, help="Sonucu ayrıca bu dosyaya yaz")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.WARNING, format='%(asctime)s [%(name)s] %(levelname)s: %(message)s')
+    result = run_benchmark(args.ipfs_delay, args.transfers, max(1, args.threads), args.templates)
+    output = json.dumps(result, indent=2, ensure_ascii=False)
+    print(output)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(output + "\n")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
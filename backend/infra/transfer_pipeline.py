@@ -0,0 +1,464 @@
+"""
+Asenkron Transfer Pipeline.
+POST /transactions/transfer sadece OpenCBDC ledger commit'ini bekler ve tx_id'yi
+hemen döndürür; blockchain, IPFS ve validator log adımları arka planda çalışır.
+
+Aşamalar (transaction.pipeline_status):
+    queued -> chain_submitted -> chain_confirmed -> ipfs_pinned -> completed
+
+- Blockchain'e bağlanılamazsa mock tx_hash ile devam edilir (chain_skipped).
+- Receipt zaman aşımına uğrarsa block_number olmadan devam edilir (pipeline_error).
+- Her aşamanın sonucu ledger'daki transaction kaydına yazılır (update_transaction),
+  GET /transactions/<tx_id>/status ile sorgulanabilir.
+- Template snapshot'ı içerik adreslidir; aynı template ile yapılan transferler
+  aynı snapshot CID'ini paylaşır. Yazılan snapshot'ın CID'i templates_index
+  kaydında (snapshot_cid) tutulur, snapshot sadece template değiştiğinde yazılır.
+- Kuyruklar bellektedir; her transaction işi yürüten process'i (pipeline_owner)
+  taşır. Process ölürse (restart, gunicorn worker değişimi) başlatılan pipeline
+  completed/failed olmayan ve sahibi yaşamayan transaction'ları ledger'dan
+  sahiplenip kaldıkları aşamadan devam ettirir (resume). tx_hash'i olan
+  transaction blockchain'e tekrar gönderilmez, receipt sorgusundan devam eder.
+- Sahibin yaşadığı, process ömrü boyunca tutulan lock dosyasından
+  (data/transfer_pipeline/<owner>.lock) anlaşılır.
+"""
+import os
+import json
+import time
+import uuid
+import queue
+import logging
+import threading
+from datetime import datetime
+from typing import Dict, Optional, Tuple
+
+from backend.config import Config
+from backend.infra.blockchain import get_blockchain_client
+
+logger = logging.getLogger('transfer_pipeline')
+
+OWNER_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'data', 'transfer_pipeline')
+
+
+class TransferPipeline:
+    """
+    Arka plan aşamaları:
+    - chain: birden çok worker; nonce'lar process içinde dağıtılır (nonce_manager),
+      receipt beklenmeden gönderilir, böylece birçok tx aynı anda yolda olabilir
+    - receipt: bekleyen tüm tx_hash'leri tek thread'de periyodik, tek batch istekle sorgular
+    - ipfs: birden çok worker (template snapshot + transfer metadata)
+    - log: validator log dosyalarına yazar
+    """
+
+    def __init__(
+        self,
+        chain_workers: int = None,
+        ipfs_workers: int = None,
+        receipt_timeout: float = None,
+        poll_interval: float = None
+    ):
+        self.chain_workers = max(1, chain_workers or Config.TRANSFER_PIPELINE_CHAIN_WORKERS)
+        self.ipfs_workers = max(1, ipfs_workers or Config.TRANSFER_PIPELINE_IPFS_WORKERS)
+        self.receipt_timeout = receipt_timeout or Config.TRANSFER_RECEIPT_TIMEOUT
+        self.poll_interval = poll_interval or Config.TRANSFER_RECEIPT_POLL_INTERVAL
+
+        self._chain_queue: queue.Queue = queue.Queue()
+        self._ipfs_queue: queue.Queue = queue.Queue()
+        self._log_queue: queue.Queue = queue.Queue()
+
+        # tx_hash -> (job, deadline)
+        self._receipts: Dict[str, Tuple[dict, float]] = {}
+        self._receipts_lock = threading.Lock()
+        self._receipts_added = threading.Event()
+
+        self._start_lock = threading.Lock()
+        self._threads = []
+
+        # Pipeline'da olan tx_id'ler (submit ve resume aynı işi iki kez almasın)
+        self._active = set()
+        self._active_lock = threading.Lock()
+
+        self._owner: Optional[str] = None
+        self._owner_lock = None
+        self._owner_pid: Optional[int] = None
+
+    @property
+    def owner(self) -> str:
+        """
+        Bu process'in pipeline kimliği (transaction.pipeline_owner).
+        Kimliğin lock dosyası process ömrü boyunca tutulur; fork sonrası yenilenir.
+        """
+        from backend.infra.ledger_process_lock import ProcessFileLock
+
+        with self._start_lock:
+            if self._owner is None or self._owner_pid != os.getpid():
+                owner = f"{os.getpid()}-{uuid.uuid4().hex[:12]}"
+                lock = ProcessFileLock(os.path.join(OWNER_DIR, f"{owner}.lock"))
+                lock.acquire()
+                self._owner, self._owner_lock, self._owner_pid = owner, lock, os.getpid()
+            return self._owner
+
+    def submit(self, job: dict):
+        """
+        Ledger'a commit edilmiş transferi arka plan aşamalarına gönder.
+
+        Args:
+            job: {"tx_id", "from", "to", "amount", "validator", "template_id",
+                  "template", "metadata"}
+        """
+        self._ensure_started()
+        if self._activate(job["tx_id"]):
+            self._chain_queue.put(job)
+
+    def resume(self) -> int:
+        """
+        Sahibi ölmüş process'lerde yarım kalan transferleri sahiplen ve kaldıkları
+        aşamadan devam ettir. Devam ettirilen transfer sayısını döndürür.
+        """
+        from backend.infra.opencbdc_storage import OpenCBDCLedger
+
+        owner = self.owner
+        alive = {owner: True}
+        resumed = 0
+        for tx in OpenCBDCLedger.get_unfinished_pipeline_transactions():
+            previous = tx.get("pipeline_owner")
+            if previous not in alive:
+                alive[previous] = _owner_alive(previous)
+            if alive[previous]:
+                continue
+            claim = OpenCBDCLedger.claim_pipeline_transaction(tx["tx_id"], previous, owner)
+            if "error" in claim or not self._activate(tx["tx_id"]):
+                continue
+            try:
+                self._requeue(tx)
+                resumed += 1
+            except Exception as e:
+                logger.exception(f"tx {tx['tx_id']} devam ettirilemedi: {e}")
+                self._fail({"tx_id": tx["tx_id"]}, f"resume: {e}")
+
+        # Ölü sahiplerin lock dosyaları artık gerekmez
+        for previous, is_alive in alive.items():
+            if previous and not is_alive:
+                try:
+                    os.remove(os.path.join(OWNER_DIR, f"{previous}.lock"))
+                except OSError:
+                    pass
+
+        if resumed:
+            logger.info(f"{resumed} yarım kalan transfer pipeline'a geri alındı")
+        return resumed
+
+    def _requeue(self, tx: dict):
+        """Ledger'daki transaction'dan job'ı kur ve pipeline_status'una göre kuyruğa koy."""
+        from decimal import Decimal
+        from backend.infra.opencbdc_storage import OpenCBDCLedger
+
+        tpl = OpenCBDCLedger.get_template(tx["template_id"]) if tx.get("template_id") else None
+        job = {
+            "tx_id": tx["tx_id"],
+            "from": tx["sender"],
+            "to": tx["receiver"],
+            "amount": Decimal(tx["amount"]),
+            "validator": tx.get("validator") or "validator1",
+            "template_id": tx.get("template_id"),
+            "template": tpl,
+            "metadata": tx.get("metadata"),
+            "tx_hash": tx.get("tx_hash"),
+            "block_number": tx.get("block_number"),
+            "ipfs_cid": tx.get("ipfs_cid"),
+            "template_snapshot_cid": tx.get("template_snapshot_cid")
+        }
+
+        status = tx["pipeline_status"]
+        if status in ("ipfs_pinned", "ipfs_skipped"):
+            self._log_queue.put(job)
+        elif status in ("chain_confirmed", "chain_skipped"):
+            self._ipfs_queue.put(job)
+        else:
+            # queued / chain_submitted: tx_hash varsa _submit_to_chain receipt'e geçer
+            self._chain_queue.put(job)
+
+    def _ensure_started(self):
+        with self._start_lock:
+            if self._threads and all(t.is_alive() for t in self._threads):
+                return
+            targets = [("receipt", self._receipt_worker), ("log", self._log_worker)]
+            targets += [(f"chain-{i}", self._chain_worker) for i in range(self.chain_workers)]
+            targets += [(f"ipfs-{i}", self._ipfs_worker) for i in range(self.ipfs_workers)]
+            self._threads = [
+                threading.Thread(target=target, daemon=True, name=f"TransferPipeline-{name}")
+                for name, target in targets
+            ]
+            for thread in self._threads:
+                thread.start()
+
+    # ==================== STAGES ====================
+
+    def _chain_worker(self):
+        while True:
+            job = self._chain_queue.get()
+            try:
+                self._submit_to_chain(job)
+            except Exception as e:
+                logger.exception(f"tx {job['tx_id']} chain aşaması hatası: {e}")
+                self._fail(job, f"chain: {e}")
+
+    def _submit_to_chain(self, job: dict):
+        if job.get("tx_hash"):
+            # Daha önce gönderilmiş (restart): tekrar gönderme, receipt'i bekle
+            self._await_receipt(job, job["tx_hash"])
+            return
+
+        tx_hash = None
+        try:
+            # Native ETH transfer (1 DTL = 1 wei, demo için ölçeklenir)
+            tx_hash = get_blockchain_client().send_transfer(
+                from_addr=Config.DEPLOYER_ADDRESS,
+                to_addr=job["to"],
+                amount_ether=str(job["amount"] / 1000000),
+                private_key=Config.DEPLOYER_PRIVATE_KEY,
+                gas_limit=21000
+            )
+        except Exception as e:
+            logger.warning(f"tx {job['tx_id']} blockchain'e gönderilemedi, mock mode: {e}")
+            tx_hash = None
+
+        if not tx_hash:
+            # Blockchain hatası durumunda devam et (mock mode)
+            job["tx_hash"] = f"0x{datetime.utcnow().strftime('%Y%m%d%H%M%S%f')}"
+            job["block_number"] = None
+            self._update(job, tx_hash=job["tx_hash"], pipeline_status="chain_skipped")
+            self._ipfs_queue.put(job)
+            return
+
+        job["tx_hash"] = tx_hash
+        self._update(job, tx_hash=tx_hash, pipeline_status="chain_submitted")
+        self._await_receipt(job, tx_hash)
+
+    def _await_receipt(self, job: dict, tx_hash: str):
+        with self._receipts_lock:
+            self._receipts[tx_hash] = (job, time.monotonic() + self.receipt_timeout)
+        self._receipts_added.set()
+
+    def _receipt_worker(self):
+        while True:
+            self._receipts_added.wait()
+            with self._receipts_lock:
+                pending = list(self._receipts.items())
+                if not pending:
+                    self._receipts_added.clear()
+                    continue
+
+            try:
+                receipts = get_blockchain_client().get_transaction_receipts([tx_hash for tx_hash, _ in pending])
+            except Exception as e:
+                # Geçici RPC hatası; zaman aşımı kontrolü yine yapılır
+                logger.warning(f"Receipt sorgusu başarısız: {e}")
+                receipts = {}
+
+            for tx_hash, (job, deadline) in pending:
+                receipt = receipts.get(tx_hash)
+                if receipt:
+                    job["block_number"] = receipt.get("blockNumber")
+                    self._update(job, block_number=job["block_number"], pipeline_status="chain_confirmed")
+                elif time.monotonic() >= deadline:
+                    # Tx düşmüş olabilir; nonce boşluğu sonraki gönderimde doldurulsun
+                    job["block_number"] = None
+                    self._update(job, pipeline_error="receipt timeout")
+                    self._resync_nonces()
+                else:
+                    continue
+
+                with self._receipts_lock:
+                    self._receipts.pop(tx_hash, None)
+                self._ipfs_queue.put(job)
+
+            time.sleep(self.poll_interval)
+
+    def _ipfs_worker(self):
+        from backend.infra.ipfs_client import IPFSClient
+
+        ipfs = IPFSClient()
+        while True:
+            job = self._ipfs_queue.get()
+            try:
+                self._pin_metadata(ipfs, job)
+            except Exception as e:
+                logger.exception(f"tx {job['tx_id']} IPFS aşaması hatası: {e}")
+                self._fail(job, f"ipfs: {e}")
+
+    def _pin_metadata(self, ipfs, job: dict):
+        """
+        Template snapshot'ı ve transfer metadata'sını tek /add isteğiyle yaz.
+        IPFS_ASYNC_UPLOAD açıksa CID'ler yerelde hesaplanıp hemen ledger'a yazılır,
+        yükleme arka planda tamamlanır.
+
+        Snapshot içerik adreslidir: template değişmediyse CID'i template kaydındaki
+        snapshot_cid ile aynıdır ve tekrar yüklenmez (CID cache'i sadece ipucudur).
+        Yazılan snapshot'ın CID'i template kaydına işlenir. Transfer zamanı
+        snapshot'ta değil transfer metadata'sında tutulur.
+        """
+        from backend.infra.ipfs_client import compute_cid
+        from backend.infra.opencbdc_storage import OpenCBDCLedger
+
+        fields = {"pipeline_status": "ipfs_pinned"}
+        documents = []
+
+        # Template snapshot
+        tpl = job.get("template")
+        job["template_snapshot_cid"] = None
+        snapshot_cid = None
+        if tpl:
+            snapshot = _snapshot_json(tpl)
+            snapshot_cid = compute_cid(snapshot.encode('utf-8'))
+            if tpl.get("snapshot_cid") != snapshot_cid and ipfs.cache.get(snapshot_cid) is None:
+                documents.append(("template_snapshot_cid", snapshot))
+            else:
+                job["template_snapshot_cid"] = snapshot_cid
+                fields["template_snapshot_cid"] = snapshot_cid
+
+        # Transfer metadata
+        job["ipfs_cid"] = None
+        documents.append(("ipfs_cid", {
+            "type": "transfer",
+            "tx_id": job["tx_id"],
+            "from": job["from"],
+            "to": job["to"],
+            "amount": str(job["amount"]),
+            "tx_hash": job["tx_hash"],
+            "block_number": job["block_number"],
+            "validator": job["validator"],
+            "timestamp": datetime.utcnow().isoformat(),
+            "template_id": job.get("template_id"),
+            "template_snapshot_cid": snapshot_cid,
+            "custom": job.get("metadata") or {}
+        }))
+
+        # IPFS hatası transfer'i engellemez
+        try:
+            cids = ipfs.add_json_many([data for _, data in documents], upload_async=Config.IPFS_ASYNC_UPLOAD)
+            for (field, _), cid in zip(documents, cids):
+                job[field] = cid
+                fields[field] = cid
+        except Exception as e:
+            logger.warning(f"tx {job['tx_id']} metadata IPFS'e yazılamadı, outbox'a alındı: {e}")
+            fields["pipeline_status"] = "ipfs_skipped"
+            self._enqueue_documents(job, documents)
+
+        if job["template_snapshot_cid"] and tpl.get("snapshot_cid") != job["template_snapshot_cid"]:
+            OpenCBDCLedger.set_template_snapshot(job["template_id"], job["template_snapshot_cid"])
+
+        self._update(job, **fields)
+        self._log_queue.put(job)
+
+    def _enqueue_documents(self, job: dict, documents: list):
+        """Yazılamayan dokümanları outbox'a al; CID'ler yüklenince transaction'a işlenir."""
+        from backend.infra.ipfs_outbox import get_ipfs_outbox
+
+        try:
+            outbox = get_ipfs_outbox()
+            for field, data in documents:
+                outbox.enqueue("transaction", data, target=job["tx_id"], field=field)
+        except Exception as e:
+            logger.error(f"tx {job['tx_id']} IPFS outbox'a eklenemedi: {e}")
+
+    def _log_worker(self):
+        from backend.infra.validator_logger import log_transfer_to_all_validators
+
+        while True:
+            job = self._log_queue.get()
+            tpl = job.get("template") or {}
+            try:
+                log_transfer_to_all_validators(
+                    tx_hash=job["tx_hash"] or "pending",
+                    sender=job["from"],
+                    receiver=job["to"],
+                    amount=job["amount"],
+                    ipfs_cid=job["ipfs_cid"],
+                    block_number=job["block_number"],
+                    source_validator=job["validator"],
+                    template_id=job.get("template_id"),
+                    template_cid=tpl.get("cid"),
+                    template_snapshot_cid=job["template_snapshot_cid"],
+                    template_name=tpl.get("template_name")
+                )
+            except Exception as e:
+                logger.warning(f"tx {job['tx_id']} validator loglarına yazılamadı: {e}")
+            self._update(job, pipeline_status="completed")
+            self._deactivate(job["tx_id"])
+
+    # ==================== HELPERS ====================
+
+    def _resync_nonces(self):
+        try:
+            get_blockchain_client().nonce_manager(Config.DEPLOYER_ADDRESS).resync()
+        except Exception as e:
+            logger.warning(f"Nonce resync başarısız: {e}")
+
+    def _update(self, job: dict, **fields):
+        from backend.infra.opencbdc_storage import OpenCBDCLedger
+
+        result = OpenCBDCLedger.update_transaction(job["tx_id"], **fields)
+        if "error" in result:
+            logger.warning(f"tx {job['tx_id']} güncellenemedi: {result['error']}")
+
+    def _activate(self, tx_id: int) -> bool:
+        with self._active_lock:
+            if tx_id in self._active:
+                return False
+            self._active.add(tx_id)
+            return True
+
+    def _deactivate(self, tx_id: int):
+        with self._active_lock:
+            self._active.discard(tx_id)
+
+    def _fail(self, job: dict, error: str):
+        try:
+            self._update(job, pipeline_status="failed", pipeline_error=error)
+        except Exception:
+            logger.exception(f"tx {job['tx_id']} hata durumu yazılamadı")
+        self._deactivate(job["tx_id"])
+
+
+def _owner_alive(owner: Optional[str]) -> bool:
+    """Sahip process'in lock dosyası hâlâ tutuluyor mu (eski kayıtlarda sahip yok)."""
+    from backend.infra.ledger_process_lock import ProcessFileLock
+
+    path = os.path.join(OWNER_DIR, f"{owner}.lock")
+    if not owner or not os.path.exists(path):
+        return False
+    lock = ProcessFileLock(path)
+    try:
+        return not lock.try_acquire()
+    finally:
+        lock.close()
+
+
+# Snapshot içeriğine girmeyen index alanları (snapshot_cid girerse CID her seferinde değişir)
+_SNAPSHOT_EXCLUDED = ("_backup_data", "snapshot_cid")
+
+
+def _snapshot_json(tpl: dict) -> str:
+    """Template snapshot'ının kanonik JSON'u (aynı içerik -> aynı CID)."""
+    return json.dumps({k: v for k, v in tpl.items() if k not in _SNAPSHOT_EXCLUDED}, sort_keys=True)
+
+
+_pipeline: Optional[TransferPipeline] = None
+_pipeline_lock = threading.Lock()
+
+
+def get_transfer_pipeline() -> TransferPipeline:
+    """Process genelinde tek pipeline (worker thread'leri ilk submit'te başlar)."""
+    global _pipeline
+    with _pipeline_lock:
+        if _pipeline is None:
+            _pipeline = TransferPipeline()
+        return _pipeline
+
+
+def start_transfer_pipeline() -> TransferPipeline:
+    """Worker'ları başlat ve ölmüş process'lerden yarım kalan transferleri devam ettir."""
+    pipeline = get_transfer_pipeline()
+    pipeline._ensure_started()
+    pipeline.resume()
+    return pipeline
@@ -0,0 +1,139 @@
+"""
+Validator Client: Tüm validator node'lara paralel JSON-RPC istekleri.
+
+- İstekler ortak thread havuzunda aynı anda gönderilir; toplam süre
+  node'ların toplamı değil en yavaş node kadardır (en fazla deadline).
+- Her node'a çağrılar tek HTTP isteğinde (JSON-RPC batch) gider.
+- Keep-alive session havuzu process genelinde paylaşılır.
+"""
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from typing import Dict, List, Optional, Tuple
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from backend.config import Config
+
+_executor: Optional[ThreadPoolExecutor] = None
+_session: Optional[requests.Session] = None
+_owner_pid: Optional[int] = None
+_init_lock = threading.Lock()
+
+
+def validator_nodes() -> Dict[str, str]:
+    """Tanımlı validator'lar: {validator_name -> RPC URL}."""
+    nodes = {}
+    for i in range(1, 5):
+        url = getattr(Config, f'VALIDATOR{i}_URL', None)
+        if url:
+            nodes[f"validator{i}"] = url
+    return nodes
+
+
+def _pool() -> Tuple[ThreadPoolExecutor, requests.Session]:
+    """Thread havuzu ve HTTP session'ı (fork sonrası yeniden oluşturulur)."""
+    global _executor, _session, _owner_pid
+    with _init_lock:
+        if _owner_pid != os.getpid():
+            workers = max(1, Config.VALIDATOR_RPC_WORKERS)
+            _executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='ValidatorRPC')
+            _session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=workers, pool_maxsize=workers)
+            _session.mount('http://', adapter)
+            _session.mount('https://', adapter)
+            _owner_pid = os.getpid()
+        return _executor, _session
+
+
+def _post(session: requests.Session, url: str, payload, timeout: float) -> dict:
+    started = time.monotonic()
+    try:
+        resp = session.post(url, json=payload, timeout=timeout)
+        result = {"ok": resp.ok, "status_code": resp.status_code, "error": None}
+        try:
+            result["response"] = resp.json()
+        except ValueError:
+            result["response"] = None
+    except Exception as e:
+        result = {"ok": False, "status_code": None, "response": None, "error": str(e)[:50]}
+    result["latency_ms"] = int((time.monotonic() - started) * 1000)
+    return result
+
+
+def post_all(payload, nodes: Dict[str, str] = None, deadline: float = None) -> Dict[str, dict]:
+    """
+    Aynı JSON-RPC payload'unu tüm node'lara paralel gönder.
+
+    Args:
+        payload: JSON-RPC istek gövdesi (tek istek veya batch listesi)
+        nodes: {name -> url} (default: tüm validator'lar)
+        deadline: Toplam bekleme süresi (saniye, default: VALIDATOR_RPC_TIMEOUT)
+
+    Returns:
+        {name -> {"ok", "status_code", "response", "error", "latency_ms"}}
+        deadline'a yetişmeyen node'lar "timeout" hatasıyla döner.
+    """
+    nodes = validator_nodes() if nodes is None else nodes
+    deadline = deadline or Config.VALIDATOR_RPC_TIMEOUT
+    executor, session = _pool()
+
+    futures = {name: executor.submit(_post, session, url, payload, deadline) for name, url in nodes.items()}
+    wait(futures.values(), timeout=deadline)
+
+    results = {}
+    for name, future in futures.items():
+        if future.done():
+            results[name] = future.result()
+        else:
+            results[name] = {"ok": False, "status_code": None, "response": None, "error": "timeout", "latency_ms": int(deadline * 1000)}
+    return results
+
+
+def call_all(calls: List[Tuple[str, list]], nodes: Dict[str, str] = None, deadline: float = None) -> Dict[str, dict]:
+    """
+    JSON-RPC çağrılarını her node'a tek batch istekle, tüm node'lara paralel gönder.
+
+    Returns:
+        {name -> {"ok", "results": [her çağrının sonucu veya None], "error", "latency_ms"}}
+    """
+    payload = [{"jsonrpc": "2.0", "method": method, "params": params, "id": i} for i, (method, params) in enumerate(calls)]
+    results = {}
+    for name, response in post_all(payload, nodes, deadline).items():
+        body = response.pop("response")
+        values = [None] * len(calls)
+        if isinstance(body, list):
+            for item in body:
+                if isinstance(item, dict) and item.get("id") in range(len(calls)):
+                    values[item["id"]] = item.get("result")
+        elif response["ok"] and not response["error"]:
+            response["error"] = "invalid batch response"
+        response["ok"] = response["ok"] and isinstance(body, list)
+        response["results"] = values
+        results[name] = response
+    return results
+
+
+def probe_all(nodes: Dict[str, str] = None, deadline: float = None) -> Dict[str, dict]:
+    """
+    Tüm validator'ların blok numarası ve peer sayısı (eth_blockNumber + net_peerCount).
+
+    Returns:
+        {name -> {"status": online|offline, "block_number", "peer_count", "url", "latency_ms", "error"}}
+    """
+    nodes = validator_nodes() if nodes is None else nodes
+    statuses = {}
+    for name, response in call_all([("eth_blockNumber", []), ("net_peerCount", [])], nodes, deadline).items():
+        block_number, peer_count = response["results"]
+        online = response["ok"] and block_number is not None
+        statuses[name] = {
+            "status": "online" if online else "offline",
+            "block_number": int(block_number, 16) if online else None,
+            "peer_count": int(peer_count, 16) if online and peer_count is not None else None,
+            "url": nodes[name],
+            "latency_ms": response["latency_ms"],
+            "error": None if online else (response["error"] or "no result")
+        }
+    return statuses
@@ -0,0 +1,166 @@
+"""
+Validator Health Monitor.
+Validator'ların blok yüksekliği, peer sayısı ve gecikmesini arka planda periyodik
+olarak ölçer; endpoint'ler her istekte node'ları sorgulamak yerine bu snapshot'tan okur.
+
+- Arka plan thread'i ilk kullanımda başlar (process başına, fork sonrası yeniden).
+- Snapshot VALIDATOR_HEALTH_TTL'den eskiyse (thread durmuşsa) istek anında yenilenir.
+- Her node için circuit breaker: art arda VALIDATOR_BREAKER_THRESHOLD hata sonrası
+  node VALIDATOR_BREAKER_RESET saniye boyunca sorgulanmaz (open), sonra tek
+  deneme yapılır (half_open); başarılıysa tekrar kapanır.
+"""
+import os
+import time
+import threading
+import logging
+from typing import Dict, Optional
+
+from backend.config import Config
+from backend.infra.validator_client import probe_all, validator_nodes
+
+logger = logging.getLogger('validator_health')
+
+
+class CircuitBreaker:
+    """Tek node için closed -> open -> half_open devre kesici."""
+
+    def __init__(self, threshold: int, reset_timeout: float):
+        self.threshold = max(1, threshold)
+        self.reset_timeout = reset_timeout
+        self.state = "closed"
+        self.failures = 0
+        self.opened_at = 0.0
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        """Node'a istek gönderilebilir mi? (open süresi dolduysa tek deneme izni)"""
+        with self._lock:
+            if self.state == "open" and time.monotonic() - self.opened_at >= self.reset_timeout:
+                self.state = "half_open"
+                return True
+            return self.state == "closed"
+
+    def record(self, success: bool):
+        with self._lock:
+            if success:
+                self.state = "closed"
+                self.failures = 0
+                return
+            self.failures += 1
+            if self.state == "half_open" or self.failures >= self.threshold:
+                if self.state != "open":
+                    logger.warning(f"Circuit breaker açıldı ({self.failures} hata)")
+                self.state = "open"
+                self.opened_at = time.monotonic()
+
+
+class ValidatorHealthMonitor:
+    """Validator durum snapshot'ı + circuit breaker'lar."""
+
+    def __init__(self, nodes: Dict[str, str] = None, interval: float = None, ttl: float = None):
+        self.nodes = validator_nodes() if nodes is None else nodes
+        self.interval = interval or Config.VALIDATOR_HEALTH_INTERVAL
+        self.ttl = ttl or Config.VALIDATOR_HEALTH_TTL
+        self.breakers = {
+            name: CircuitBreaker(Config.VALIDATOR_BREAKER_THRESHOLD, Config.VALIDATOR_BREAKER_RESET)
+            for name in self.nodes
+        }
+        self._snapshot: Dict[str, dict] = {}
+        self._updated_at = 0.0
+        self._refresh_lock = threading.Lock()
+        self._thread_lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._stop_event = threading.Event()
+
+    def snapshot(self) -> Dict[str, dict]:
+        """
+        Son ölçülen durumlar.
+
+        Returns:
+            {name -> {"status", "block_number", "peer_count", "url", "latency_ms",
+                      "error", "checked_at", "circuit"}}
+        """
+        self._ensure_thread()
+        if time.monotonic() - self._updated_at > self.ttl:
+            self.refresh(max_age=self.ttl)
+        return {name: dict(status) for name, status in self._snapshot.items()}
+
+    def refresh(self, max_age: float = None):
+        """
+        Tüm node'ları (açık devreler hariç) paralel sorgula ve snapshot'ı güncelle.
+        max_age verilirse ve snapshot o kadar güncelse (ör. başka thread yeniledi) atlanır.
+        """
+        with self._refresh_lock:
+            if max_age is not None and time.monotonic() - self._updated_at <= max_age:
+                return
+            allowed = {name: url for name, url in self.nodes.items() if self.breakers[name].allow()}
+            probes = probe_all(allowed) if allowed else {}
+            checked_at = time.time()
+
+            snapshot = {}
+            for name, url in self.nodes.items():
+                probe = probes.get(name)
+                if probe is not None:
+                    self.breakers[name].record(probe["status"] == "online")
+                    status = dict(probe, checked_at=checked_at)
+                else:
+                    # Devre açık: node sorgulanmadı, son hata ve ölçüm zamanı korunur
+                    previous = self._snapshot.get(name, {})
+                    status = {
+                        "status": "offline",
+                        "block_number": None,
+                        "peer_count": None,
+                        "url": url,
+                        "latency_ms": None,
+                        "error": previous.get("error") or "circuit open",
+                        "checked_at": previous.get("checked_at")
+                    }
+                status["circuit"] = self.breakers[name].state
+                snapshot[name] = status
+
+            self._snapshot = snapshot
+            self._updated_at = time.monotonic()
+
+    def allowed_nodes(self) -> Dict[str, str]:
+        """Devresi açık olmayan node'lar (doğrudan istek gönderecek çağıranlar için)."""
+        return {name: url for name, url in self.nodes.items() if self.breakers[name].allow()}
+
+    def record(self, name: str, success: bool):
+        """Doğrudan yapılan isteğin sonucunu node'un breaker'ına bildir."""
+        breaker = self.breakers.get(name)
+        if breaker:
+            breaker.record(success)
+
+    def _ensure_thread(self):
+        if self._thread is None or not self._thread.is_alive():
+            with self._thread_lock:
+                if self._thread is None or not self._thread.is_alive():
+                    self._thread = threading.Thread(
+                        target=self._run,
+                        daemon=True,
+                        name='ValidatorHealthMonitor'
+                    )
+                    self._thread.start()
+
+    def _run(self):
+        while not self._stop_event.is_set():
+            try:
+                self.refresh()
+            except Exception as e:
+                logger.error(f"Validator health refresh hatası: {e}")
+            self._stop_event.wait(self.interval)
+
+
+_monitor: Optional[ValidatorHealthMonitor] = None
+_monitor_pid: Optional[int] = None
+_monitor_lock = threading.Lock()
+
+
+def get_health_monitor() -> ValidatorHealthMonitor:
+    """Process genelinde tek monitor (fork sonrası thread'i ile birlikte yeniden oluşturulur)."""
+    global _monitor, _monitor_pid
+    with _monitor_lock:
+        if _monitor is None or _monitor_pid != os.getpid():
+            _monitor = ValidatorHealthMonitor()
+            _monitor_pid = os.getpid()
+        return _monitor
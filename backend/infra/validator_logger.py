@@ -8,9 +8,9 @@ import logging
 from datetime import datetime
 from decimal import Decimal
 from typing import Optional
-import requests
 
 from backend.config import Config
+from backend.infra.validator_health import get_health_monitor
 
 logger = logging.getLogger('validator_logger')
 logger.setLevel(logging.INFO)
@@ -182,53 +182,26 @@ def init_validator_logs():
 
 
 def get_validator_status(validator_name: str) -> dict:
-    """Validator'ın güncel durumunu al."""
+    """Validator'ın güncel durumunu al (health monitor snapshot'ından)."""
     info = VALIDATORS.get(validator_name)
     if not info or not info.get("url"):
         return {"status": "offline", "error": "URL not configured"}
 
-    try:
-        resp = requests.post(
-            info["url"],
-            json={
-                "jsonrpc": "2.0",
-                "method": "eth_blockNumber",
-                "params": [],
-                "id": 1
-            },
-            timeout=3
-        )
-
-        if resp.ok:
-            data = resp.json()
-            block_number = int(data.get("result", "0x0"), 16)
-
-            peer_resp = requests.post(
-                info["url"],
-                json={
-                    "jsonrpc": "2.0",
-                    "method": "net_peerCount",
-                    "params": [],
-                    "id": 2
-                },
-                timeout=3
-            )
-
-            peer_count = 0
-            if peer_resp.ok:
-                peer_data = peer_resp.json()
-                peer_count = int(peer_data.get("result", "0x0"), 16)
+    probe = get_health_monitor().snapshot().get(validator_name)
+    if probe is None:
+        return {"status": "offline", "error": "not monitored"}
+    return _format_status(probe)
 
-            return {
-                "status": "online",
-                "block_number": block_number,
-                "peer_count": peer_count,
-                "url": info["url"]
-            }
-    except Exception as e:
-        return {"status": "offline", "error": str(e)[:50]}
 
-    return {"status": "offline", "error": "Unknown error"}
+def _format_status(probe: dict) -> dict:
+    if probe["status"] == "online":
+        return {
+            "status": "online",
+            "block_number": probe["block_number"],
+            "peer_count": probe["peer_count"] or 0,
+            "url": probe["url"]
+        }
+    return {"status": "offline", "error": probe["error"]}
 
 
 def broadcast_to_all_validators(tx_data: dict) -> dict:
@@ -240,6 +213,7 @@ def broadcast_to_all_validators(tx_data: dict) -> dict:
         "details": []
     }
 
+    # Durumlar health monitor snapshot'ından okunur (node'lar sorgulanmaz)
     for validator_name, info in VALIDATORS.items():
         if not info.get("url"):
             continue
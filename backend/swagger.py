@@ -3,7 +3,7 @@ Flask-RESTX API - DTL Multi-Indexer PoC
 OpenCBDC UTXO-based storage ile çalışır.
 PostgreSQL bağımlılığı YOK - Tüm veri OpenCBDC ledger'da.
 
-Mimari: Transfer -> Blockchain -> IPFS -> OpenCBDC UTXO -> Multi-Indexer
+Mimari: Transfer -> OpenCBDC UTXO -> (arka planda) Blockchain -> IPFS -> Multi-Indexer
 """
 from flask import request, g
 from flask_restx import Api, Resource, Namespace, fields
@@ -30,7 +30,7 @@ def init_swagger(app):
         - UTXO-based bakiye takibi
 
         ## 🔗 Mimari
-        - **Transfer** -> Blockchain'e yaz -> IPFS'e metadata -> OpenCBDC UTXO -> Multi-Indexer broadcast
+        - **Transfer** -> OpenCBDC UTXO (202) -> arka planda Blockchain'e yaz -> IPFS'e metadata -> Multi-Indexer broadcast
         - **Scheduler** -> Blockchain'i kontrol -> OpenCBDC ledger güncelle
         - **Event Listener** -> Blockchain event'lerini dinle
 
@@ -78,6 +78,17 @@ def init_swagger(app):
         'metadata': fields.Raw(description='IPFS metadata (opsiyonel)')
     })
 
+    batch_item_model = transactions_ns.model('BatchTransferItem', {
+        'from': fields.String(required=True, description='Gönderen adresi'),
+        'to': fields.String(required=True, description='Alıcı adresi'),
+        'amount': fields.Float(required=True, description='Miktar')
+    })
+
+    transfer_batch_model = transactions_ns.model('TransferBatchRequest', {
+        'transfers': fields.List(fields.Nested(batch_item_model), required=True, description='Transfer listesi'),
+        'validator': fields.String(description='Hangi validator üzerinden işlem yapılacak (validator1-4)')
+    })
+
     template_input_model = templates_ns.model('TemplateInput', {
         'template_name': fields.String(required=True, description='Şablon adı'),
         'payee_name': fields.String(description='Alıcı adı'),
@@ -246,10 +257,13 @@ def init_swagger(app):
     @accounts_ns.route('/<string:address>/utxos')
     class AccountUTXOs(Resource):
         def get(self, address):
-            """Hesaba ait UTXO'lar"""
+            """Hesaba ait UTXO'lar (?unspent=true: sadece harcanabilir çıktılar)"""
             from backend.infra.opencbdc_storage import OpenCBDCLedger
 
-            utxos = OpenCBDCLedger.get_utxos_by_address(address)
+            if request.args.get('unspent', 'false').lower() == 'true':
+                utxos = OpenCBDCLedger.get_unspent_utxos(address)
+            else:
+                utxos = OpenCBDCLedger.get_utxos_by_address(address)
 
             return {
                 "address": address.lower(),
@@ -281,22 +295,18 @@ def init_swagger(app):
             Transfer yap.
 
             Akış:
-            1. Bakiye kontrolü (OpenCBDC)
-            2. Blockchain'e smart contract transfer yaz
-            3. IPFS'e metadata yükle
-            4. OpenCBDC UTXO oluştur (tx_hash + ipfs_cid ile)
-            5. Tüm validator'lara logla
+            1. Bakiye kontrolü + OpenCBDC UTXO oluştur (yanıt bu adımdan sonra döner)
+            2. Arka planda: Blockchain'e transfer yaz -> receipt bekle
+            3. Arka planda: IPFS'e metadata (+ template değiştiyse snapshot) yükle
+            4. Arka planda: Tüm validator'lara logla
 
+            Yanıt 202 + tx_id; arka plan aşamalarının durumu
+            GET /transactions/<tx_id>/status ile izlenir.
             Besu loglarında: "Imported #X / 1 tx" görülür.
             """
             from backend.infra.opencbdc_storage import OpenCBDCLedger
-            from backend.infra.blockchain import BlockchainClient
-            from backend.infra.validator_logger import (
-                log_transfer_to_all_validators,
-                init_validator_logs
-            )
-            from backend.config import Config
-            from datetime import datetime
+            from backend.infra.transfer_pipeline import get_transfer_pipeline
+            from backend.infra.validator_logger import init_validator_logs
 
             # Validator loglarını başlat
             init_validator_logs()
@@ -312,9 +322,8 @@ def init_swagger(app):
             if not from_address:
                 return {"error": "from adresi zorunlu"}, 400
 
-            # Template logic
+            # Template logic (snapshot arka planda alınır)
             tpl = None
-            template_snapshot_cid = None
             if template_id:
                 tpl = OpenCBDCLedger.get_template(template_id)
                 if not tpl:
@@ -325,17 +334,6 @@ def init_swagger(app):
                     to_address = tpl.get("payee_account", "").lower()
                 if amount_val is None:
                     amount_val = tpl.get("default_amount")
-                
-                # Snapshot al (Template JSON'u tekrar IPFS'e yaz)
-                try:
-                    from backend.infra.ipfs_client import IPFSClient
-                    ipfs = IPFSClient()
-                    # Snapshot için sadece gerekli veriyi al
-                    snapshot_data = {k: v for k, v in tpl.items() if k not in ['_backup_data']}
-                    snapshot_data["snapshot_at"] = datetime.utcnow().isoformat()
-                    template_snapshot_cid = ipfs.add_json(snapshot_data)
-                except:
-                    pass
             
             # Validation
             if not to_address:
@@ -351,100 +349,107 @@ def init_swagger(app):
             except:
                 return {"error": "geçersiz amount"}, 400
 
-            # 1. Blockchain'e transaction yaz
-            tx_hash = None
-            block_number = None
-            try:
-                blockchain = BlockchainClient()
-                if blockchain.is_connected():
-                    # Native ETH transfer (gas free on private network)
-                    # amount'u wei'ye çevir (1 DTL = 1 wei for simplicity)
-                    tx = blockchain.build_transfer_tx(
-                        from_addr=Config.DEPLOYER_ADDRESS,
-                        to_addr=to_address,
-                        amount_ether=str(amount / 1000000),  # Scale down for demo
-                        gas_limit=21000
-                    )
-
-                    # Transaction'ı imzala ve gönder
-                    tx_hash = blockchain.sign_and_send_transaction(
-                        tx,
-                        Config.DEPLOYER_PRIVATE_KEY
-                    )
-
-                    # Receipt'i bekle
-                    receipt = blockchain.wait_for_transaction_receipt(tx_hash, timeout=30)
-                    block_number = receipt.get('blockNumber')
-
-            except Exception as e:
-                # Blockchain hatası durumunda devam et (mock mode)
-                tx_hash = f"0x{datetime.utcnow().strftime('%Y%m%d%H%M%S%f')}"
-
-            # 2. IPFS'e metadata yükle
-            ipfs_cid = None
-            try:
-                from backend.infra.ipfs_client import IPFSClient
-                ipfs = IPFSClient()
-
-                tx_metadata = {
-                    "type": "transfer",
-                    "from": from_address,
-                    "to": to_address,
-                    "amount": str(amount),
-                    "tx_hash": tx_hash,
-                    "block_number": block_number,
-                    "validator": source_validator,
-                    "timestamp": datetime.utcnow().isoformat(),
-                    "template_id": template_id,
-                    "custom": metadata or {}
-                }
-                ipfs_cid = ipfs.add_json(tx_metadata)
-            except Exception as e:
-                # IPFS hatası transfer'i engellemez
-                pass
-
-            # 3. OpenCBDC'de transfer yap
+            # 1. OpenCBDC'de transfer yap
+            pipeline = get_transfer_pipeline()
             result = OpenCBDCLedger.transfer(
                 sender_address=from_address,
                 receiver_address=to_address,
                 amount=amount,
-                tx_hash=tx_hash,
-                ipfs_cid=ipfs_cid,
                 template_id=template_id,
                 template_cid=tpl.get("cid") if template_id else None,
-                template_snapshot_cid=template_snapshot_cid
+                pipeline_status="queued",
+                validator=source_validator,
+                metadata=metadata,
+                pipeline_owner=pipeline.owner
             )
 
             if "error" in result:
                 return result, 400
 
-            # 4. Tüm validator'lara logla (template bilgisi dahil)
-            try:
-                log_transfer_to_all_validators(
-                    tx_hash=tx_hash or "pending",
-                    sender=from_address,
-                    receiver=to_address,
-                    amount=amount,
-                    ipfs_cid=ipfs_cid,
-                    block_number=block_number,
-                    source_validator=source_validator,
-                    template_id=template_id,
-                    template_cid=tpl.get("cid") if template_id and tpl else None,
-                    template_snapshot_cid=template_snapshot_cid,
-                    template_name=tpl.get("template_name") if template_id and tpl else None
-                )
-            except Exception:
-                pass  # Log hatası transfer'i engellemez
-
-            result["tx_hash"] = tx_hash
-            result["ipfs_cid"] = ipfs_cid
-            result["block_number"] = block_number
+            # 2-4. Blockchain + IPFS + validator log arka planda
+            pipeline.submit({
+                "tx_id": result["tx_id"],
+                "from": from_address,
+                "to": to_address,
+                "amount": amount,
+                "validator": source_validator,
+                "template_id": template_id,
+                "template": tpl,
+                "metadata": metadata
+            })
+
+            result["pipeline_status"] = "queued"
+            result["status_url"] = f"/transactions/{result['tx_id']}/status"
             result["validator"] = source_validator
-            result["message"] = "Transfer tamamlandı. Blockchain + IPFS + OpenCBDC kaydedildi."
+            result["message"] = "Transfer OpenCBDC'ye kaydedildi. Blockchain + IPFS arka planda işleniyor."
             if template_id:
                 result["template_used"] = True
 
-            return result, 201
+            return result, 202
+
+    @transactions_ns.route('/transfer/batch')
+    class TransferBatch(Resource):
+        @transactions_ns.expect(transfer_batch_model)
+        def post(self):
+            """
+            Toplu transfer (group commit).
+
+            Tüm transferler tek lock alımı ve tek kalıcı yazma ile OpenCBDC
+            ledger'a uygulanır. Her transfer için ayrı sonuç döner;
+            yetersiz bakiye vb. hatalar diğer transferleri engellemez.
+            Başarılı transferler tekli transfer gibi arka plan pipeline'ına
+            (blockchain + IPFS + validator log) gönderilir; yanıt 202.
+            """
+            from backend.infra.opencbdc_storage import OpenCBDCLedger
+            from backend.infra.transfer_pipeline import get_transfer_pipeline
+            from backend.infra.validator_logger import init_validator_logs
+
+            # Validator loglarını başlat
+            init_validator_logs()
+
+            payload = request.get_json(silent=True) or {}
+            transfers = payload.get("transfers")
+            source_validator = payload.get("validator", "validator1")
+
+            if not isinstance(transfers, list) or not transfers:
+                return {"error": "transfers listesi zorunlu"}, 400
+
+            pipeline = get_transfer_pipeline()
+            items = []
+            for entry in transfers:
+                entry = entry if isinstance(entry, dict) else {}
+                items.append({
+                    "sender_address": str(entry.get("from") or "").strip().lower(),
+                    "receiver_address": str(entry.get("to") or "").strip().lower(),
+                    "amount": entry.get("amount"),
+                    "pipeline_status": "queued",
+                    "validator": source_validator,
+                    "pipeline_owner": pipeline.owner
+                })
+
+            result = OpenCBDCLedger.transfer_batch(items)
+            if not result["succeeded"]:
+                return result, 400
+
+            # Blockchain + IPFS + validator log arka planda
+            for item in result["results"]:
+                if item.get("status") != "success":
+                    continue
+                pipeline.submit({
+                    "tx_id": item["tx_id"],
+                    "from": item["sender"],
+                    "to": item["receiver"],
+                    "amount": Decimal(item["amount"]),
+                    "validator": source_validator,
+                    "template_id": None,
+                    "template": None,
+                    "metadata": None
+                })
+                item["pipeline_status"] = "queued"
+                item["status_url"] = f"/transactions/{item['tx_id']}/status"
+
+            result["validator"] = source_validator
+            return result, 202
 
     @transactions_ns.route('/<int:tx_id>')
     class TransactionDetail(Resource):
@@ -458,6 +463,29 @@ def init_swagger(app):
 
             return tx
 
+    @transactions_ns.route('/<int:tx_id>/status')
+    class TransactionStatus(Resource):
+        def get(self, tx_id):
+            """
+            Transfer pipeline durumu.
+            queued -> chain_submitted -> chain_confirmed -> ipfs_pinned -> completed (veya failed)
+            """
+            from backend.infra.opencbdc_storage import OpenCBDCLedger
+
+            tx = OpenCBDCLedger.get_transaction(tx_id)
+            if not tx:
+                return {"error": "transaction not found"}, 404
+
+            return {
+                "tx_id": tx_id,
+                "pipeline_status": tx.get("pipeline_status", "completed"),
+                "pipeline_error": tx.get("pipeline_error"),
+                "tx_hash": tx.get("tx_hash"),
+                "block_number": tx.get("block_number"),
+                "ipfs_cid": tx.get("ipfs_cid"),
+                "template_snapshot_cid": tx.get("template_snapshot_cid")
+            }
+
 
     # ==================== TEMPLATES (IPFS) ====================
 
@@ -548,6 +576,18 @@ def init_swagger(app):
             from backend.infra.opencbdc_storage import OpenCBDCLedger
             return OpenCBDCLedger.get_stats()
 
+    @ledger_ns.route('/revert-failed')
+    class RevertFailedList(Resource):
+        def get(self):
+            """Reorg'da geri alınamamış, telafi bekleyen transaction'lar"""
+            from backend.infra.opencbdc_storage import OpenCBDCLedger
+
+            transactions = OpenCBDCLedger.get_revert_failed_transactions()
+            return {
+                "transactions": transactions,
+                "count": len(transactions)
+            }
+
     @ledger_ns.route('/utxos')
     class UTXOList(Resource):
         def get(self):
@@ -595,7 +635,7 @@ def init_swagger(app):
     class Health(Resource):
         def get(self):
             """Sistem durumu"""
-            from backend.infra.blockchain import BlockchainClient
+            from backend.infra.blockchain import get_blockchain_client
             from backend.infra.opencbdc_storage import OpenCBDCLedger
             from backend.extensions import get_redis
             import os
@@ -625,12 +665,23 @@ def init_swagger(app):
                 except:
                     pass
 
-            # Blockchain
+            # Blockchain (blok numarası + peer sayısı tek batch istekte)
             try:
-                bc = BlockchainClient()
-                if bc.is_connected():
-                    status["blockchain"] = True
-                    status["block_number"] = bc.get_block_number()
+                chain = get_blockchain_client().get_chain_status()
+                status["blockchain"] = True
+                status["block_number"] = chain["block_number"]
+                status["peer_count"] = chain["peer_count"]
+            except:
+                pass
+
+            # Validator'lar (health monitor snapshot'ından, node'lar sorgulanmaz)
+            try:
+                from backend.infra.validator_health import get_health_monitor
+                snapshot = get_health_monitor().snapshot()
+                status["validators"] = {
+                    "online": sum(1 for v in snapshot.values() if v["status"] == "online"),
+                    "total": len(snapshot)
+                }
             except:
                 pass
 
@@ -638,12 +689,20 @@ def init_swagger(app):
             try:
                 from backend.infra.ipfs_client import IPFSClient
                 ipfs = IPFSClient()
+                status["ipfs_cache"] = ipfs.cache.stats()
                 version = ipfs.get_version()
                 if version:
                     status["ipfs"] = True
             except:
                 pass
 
+            # IPFS outbox (yüklenmeyi bekleyen içerikler)
+            try:
+                from backend.infra.ipfs_outbox import get_ipfs_outbox
+                status["ipfs_outbox"] = get_ipfs_outbox().stats()
+            except:
+                pass
+
             return status
 
     @health_ns.route('/seed')
@@ -711,59 +770,21 @@ def init_swagger(app):
     @nodes_ns.route('')
     class NodeList(Resource):
         def get(self):
-            """Tüm validator node'ların durumunu göster"""
-            import requests
-            from backend.config import Config
+            """Tüm validator node'ların durumunu göster (health monitor snapshot'ından)"""
+            from backend.infra.validator_health import get_health_monitor
 
             nodes = []
-            validators = [
-                ("Validator 1", Config.VALIDATOR1_URL),
-                ("Validator 2", Config.VALIDATOR2_URL),
-                ("Validator 3", getattr(Config, 'VALIDATOR3_URL', None)),
-                ("Validator 4", getattr(Config, 'VALIDATOR4_URL', None)),
-            ]
-
-            for name, url in validators:
-                if not url:
-                    continue
-
-                node_info = {
-                    "name": name,
-                    "url": url,
-                    "status": "offline",
-                    "block_number": None,
-                    "peers": None
-                }
-
-                try:
-                    # Block number
-                    resp = requests.post(url, json={
-                        "jsonrpc": "2.0",
-                        "method": "eth_blockNumber",
-                        "params": [],
-                        "id": 1
-                    }, timeout=3)
-                    if resp.ok:
-                        data = resp.json()
-                        if data.get("result"):
-                            node_info["block_number"] = int(data["result"], 16)
-                            node_info["status"] = "online"
-
-                    # Peer count
-                    resp = requests.post(url, json={
-                        "jsonrpc": "2.0",
-                        "method": "net_peerCount",
-                        "params": [],
-                        "id": 2
-                    }, timeout=3)
-                    if resp.ok:
-                        data = resp.json()
-                        if data.get("result"):
-                            node_info["peers"] = int(data["result"], 16)
-                except:
-                    pass
-
-                nodes.append(node_info)
+            for validator_name, probe in get_health_monitor().snapshot().items():
+                nodes.append({
+                    "name": f"Validator {validator_name[len('validator'):]}",
+                    "url": probe["url"],
+                    "status": probe["status"],
+                    "block_number": probe["block_number"],
+                    "peers": probe["peer_count"],
+                    "latency_ms": probe["latency_ms"],
+                    "checked_at": probe["checked_at"],
+                    "circuit": probe["circuit"]
+                })
 
             # Tüm node'lar aynı blokta mı kontrol et
             block_numbers = [n["block_number"] for n in nodes if n["block_number"]]
@@ -782,43 +803,23 @@ def init_swagger(app):
         def get(self, tx_id):
             """Bir işlemin OpenCBDC ledger'da var olduğunu doğrula"""
             from backend.infra.opencbdc_storage import OpenCBDCLedger
-            import requests
-            from backend.config import Config
+            from backend.infra.validator_health import get_health_monitor
 
             tx = OpenCBDCLedger.get_transaction(tx_id)
             if not tx:
                 return {"error": "Transaction bulunamadı"}, 404
 
-            validators = [
-                ("Validator 1", Config.VALIDATOR1_URL),
-                ("Validator 2", Config.VALIDATOR2_URL),
-            ]
-
+            snapshot = get_health_monitor().snapshot()
             results = []
-            for name, url in validators:
-                if not url:
+            for validator_name in ("validator1", "validator2"):
+                if validator_name not in snapshot:
                     continue
-
-                result = {
-                    "node": name,
-                    "has_data": False,
-                    "block_check": False
-                }
-
-                try:
-                    resp = requests.post(url, json={
-                        "jsonrpc": "2.0",
-                        "method": "eth_blockNumber",
-                        "params": [],
-                        "id": 1
-                    }, timeout=3)
-                    if resp.ok:
-                        result["block_check"] = True
-                        result["has_data"] = True
-                except:
-                    pass
-
-                results.append(result)
+                online = snapshot[validator_name]["status"] == "online"
+                results.append({
+                    "node": f"Validator {validator_name[len('validator'):]}",
+                    "has_data": online,
+                    "block_check": online
+                })
 
             verified_count = sum(1 for r in results if r["has_data"])
             total = len(results)
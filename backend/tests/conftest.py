@@ -0,0 +1,63 @@
+"""
+Ortak fixture'lar.
+Ledger her testte geçici bir data dizinine yönlendirilir (gerçek backend/data'ya dokunulmaz).
+"""
+import os
+
+import pytest
+
+from backend.config import Config
+from backend.infra import opencbdc_storage as storage
+
+
+def _use_data_dir(monkeypatch, data_dir: str):
+    monkeypatch.setattr(storage, "STORAGE_DIR", data_dir)
+    monkeypatch.setattr(storage, "LEDGER_FILE", os.path.join(data_dir, "opencbdc_ledger.json"))
+    monkeypatch.setattr(storage, "VALIDATOR_LEDGER_FILES", {
+        f"validator{i}": os.path.join(data_dir, f"opencbdc_validator{i}.json") for i in range(1, 5)
+    })
+    monkeypatch.setattr(storage, "WAL_FILE", os.path.join(data_dir, "opencbdc_ledger.wal"))
+    monkeypatch.setattr(storage, "LOCK_FILE", os.path.join(data_dir, "opencbdc_ledger.lock"))
+    monkeypatch.setattr(storage, "SQLITE_FILE", os.path.join(data_dir, "opencbdc_ledger.db"))
+
+
+def _reopen():
+    """Process yeniden başlamış gibi: backend'i kapat, state'i diskten tekrar yükle."""
+    storage._backend.close()
+    storage._state = None
+    storage._index = None
+    storage._backend = storage._create_backend()
+    return storage._load_ledger()
+
+
+def _open_ledger(monkeypatch, data_dir: str, backend: str):
+    """Geçici dizinde boş ledger; OpenCBDCLedger döner."""
+    monkeypatch.setattr(Config, "LEDGER_BACKEND", backend)
+    monkeypatch.setattr(Config, "LEDGER_WAL_GROUP_COMMIT_MS", 0)
+    _use_data_dir(monkeypatch, data_dir)
+    monkeypatch.setattr(storage, "_backend", storage._create_backend())
+    monkeypatch.setattr(storage, "_state", None)
+    monkeypatch.setattr(storage, "_index", None)
+    monkeypatch.setattr(storage, "_change_feed", storage._ChangeFeed(Config.LEDGER_CHANGE_FEED_SIZE))
+
+    storage.OpenCBDCLedger.reset_ledger()
+    return storage.OpenCBDCLedger
+
+
+@pytest.fixture(params=["json", "sqlite"])
+def ledger(request, monkeypatch, tmp_path):
+    """Backend'den bağımsız testler her iki backend ile çalışır."""
+    yield _open_ledger(monkeypatch, str(tmp_path), request.param)
+    storage._backend.close()
+
+
+@pytest.fixture
+def json_ledger(monkeypatch, tmp_path):
+    """JSON snapshot + WAL backend'ine özgü testler için."""
+    yield _open_ledger(monkeypatch, str(tmp_path), "json")
+    storage._backend.close()
+
+
+@pytest.fixture
+def reopen():
+    return _reopen
@@ -0,0 +1,144 @@
+"""
+WAL ve checkpoint testleri: yarım yazılmış son kayıt, snapshot + WAL replay eşdeğerliği.
+"""
+import json
+import os
+from decimal import Decimal
+
+from backend.infra import opencbdc_storage as storage
+from backend.infra.ledger_backends import DecimalEncoder
+from backend.infra.ledger_wal import WriteAheadLog
+
+ALICE = "0xba00000000000000000000000000000000000001"
+BOB = "0xul00000000000000000000000000000000000002"
+CAROL = "0xca00000000000000000000000000000000000003"
+
+
+def _dump(state: dict) -> dict:
+    """State'in karşılaştırılabilir kopyası."""
+    return json.loads(json.dumps(state, cls=DecimalEncoder))
+
+
+def _make_history(ledger):
+    ledger.create_account(ALICE, Decimal(100))
+    ledger.create_account(BOB, Decimal(50))
+    ledger.transfer(ALICE, BOB, Decimal(30))
+    ledger.transfer(BOB, CAROL, Decimal("12.5"))
+    ledger.mint(CAROL, Decimal(5))
+    ledger.transfer(CAROL, ALICE, Decimal("17.5"))
+
+
+# ==================== WriteAheadLog ====================
+
+def test_wal_replay_skips_torn_last_line(tmp_path):
+    path = str(tmp_path / "ledger.wal")
+    wal = WriteAheadLog(path, group_commit_ms=0)
+    for seq in range(1, 4):
+        wal.wait_durable(wal.append({"seq": seq, "ops": []}))
+    wal.close()
+    intact_size = os.path.getsize(path)
+
+    with open(path, "ab") as f:
+        f.write(b'{"seq":4,"ops":[["acc"')
+
+    assert [r["seq"] for r in wal.replay()] == [1, 2, 3]
+    # repair olmadan dosyaya dokunulmaz
+    assert os.path.getsize(path) > intact_size
+
+    assert [r["seq"] for r in wal.replay(repair=True)] == [1, 2, 3]
+    assert os.path.getsize(path) == intact_size
+
+    # Kırpılan log'a eklenen kayıt okunabilir
+    wal.append({"seq": 4, "ops": []})
+    wal.close()
+    assert [r["seq"] for r in wal.replay(after_seq=2)] == [3, 4]
+
+
+def test_wal_read_stops_at_corrupt_line(tmp_path):
+    path = str(tmp_path / "ledger.wal")
+    with open(path, "wb") as f:
+        f.write(b'{"seq":1,"ops":[]}\n{"seq":2,"o\n{"seq":3,"ops":[]}\n')
+
+    wal = WriteAheadLog(path)
+    records = list(wal.read())
+    assert [r["seq"] for r, _ in records] == [1]
+    assert records[0][1] == len(b'{"seq":1,"ops":[]}\n')
+
+
+# ==================== Ledger recovery ====================
+
+def test_torn_wal_tail_recovers_last_durable_state(json_ledger, reopen):
+    _make_history(json_ledger)
+    expected = _dump(storage._state)
+
+    storage._backend.close()
+    with open(storage.WAL_FILE, "ab") as f:
+        f.write(b'{"seq":999,"ops":[["acc","0xdead",{"balance":"1')
+
+    recovered = reopen()
+    assert _dump(recovered) == expected
+    with open(storage.WAL_FILE, "rb") as f:
+        assert f.read().endswith(b"\n")
+
+    # Onarılan log üzerine yazmaya devam edilebilir
+    assert json_ledger.transfer(ALICE, BOB, Decimal(1))["status"] == "success"
+    assert _dump(reopen()) == _dump(storage._state)
+
+
+def test_checkpoint_truncate_replay_equivalence(json_ledger, reopen):
+    _make_history(json_ledger)
+    live = _dump(storage._state)
+
+    # Sadece WAL replay ile
+    assert os.path.getsize(storage.WAL_FILE) > 0
+    assert _dump(reopen()) == live
+
+    # Checkpoint: snapshot yazılır, WAL boşalır; aynı state
+    json_ledger.checkpoint()
+    assert os.path.getsize(storage.WAL_FILE) == 0
+    assert _dump(reopen()) == live
+
+    # Snapshot + checkpoint sonrası yeni WAL kayıtları
+    json_ledger.transfer(ALICE, CAROL, Decimal(3))
+    json_ledger.transfer(BOB, ALICE, Decimal(2))
+    live = _dump(storage._state)
+    assert _dump(reopen()) == live
+    assert live["metadata"]["wal_seq"] == storage._state["metadata"]["wal_seq"]
+
+
+def test_automatic_checkpoints_keep_state(monkeypatch, json_ledger, reopen):
+    monkeypatch.setattr(storage._backend, "checkpoint_interval", 3)
+    _make_history(json_ledger)
+    for _ in range(4):
+        json_ledger.transfer(ALICE, BOB, Decimal(1))
+    live = _dump(storage._state)
+
+    with open(storage.WAL_FILE, "rb") as f:
+        assert len(f.read().splitlines()) < 3
+    assert _dump(reopen()) == live
+
+
+def test_batch_and_checkpoint_are_one_wal_record(json_ledger, reopen):
+    json_ledger.create_account(ALICE, Decimal(100))
+    before = _dump(storage._state)
+
+    result = json_ledger.transfer_batch(
+        [{"sender_address": ALICE, "receiver_address": BOB, "amount": 10, "tx_hash": "0xaa", "log_index": 0}],
+        checkpoint={"event_listener_block": 42}
+    )
+    assert result["succeeded"] == 1
+
+    with open(storage.WAL_FILE, "rb") as f:
+        lines = f.read().splitlines(keepends=True)
+    kinds = [op[0] for op in json.loads(lines[-1])["ops"]]
+    assert "tx" in kinds and "meta" in kinds
+
+    # Kayıt yarım kaldıysa (crash) transfer de checkpoint de görülmez
+    storage._backend.close()
+    with open(storage.WAL_FILE, "wb") as f:
+        f.write(b"".join(lines[:-1]) + lines[-1][:len(lines[-1]) // 2])
+
+    recovered = _dump(reopen())
+    assert recovered == before
+    assert json_ledger.get_metadata("event_listener_block") is None
+    assert json_ledger.get_balance(ALICE) == Decimal(100)
@@ -0,0 +1,293 @@
+"""
+OpenCBDCLedger testleri: event dedup'lı transfer_batch, reorg geri alma,
+coin selection / para üstü çıktıları ve değişiklik akışı.
+"""
+import threading
+import time
+from decimal import Decimal
+
+from backend.infra import opencbdc_storage as storage
+from backend.infra.opencbdc_storage import _select_coins
+
+ALICE = "0xba00000000000000000000000000000000000001"
+BOB = "0xul00000000000000000000000000000000000002"
+CAROL = "0xca00000000000000000000000000000000000003"
+
+
+def _event(sender, receiver, amount, tx_hash, log_index=0):
+    return {
+        "sender_address": sender,
+        "receiver_address": receiver,
+        "amount": amount,
+        "tx_hash": tx_hash,
+        "log_index": log_index
+    }
+
+
+def _assert_balances_match_utxos(ledger, *addresses):
+    for address in addresses:
+        unspent = sum((Decimal(u["amount"]) for u in ledger.get_unspent_utxos(address)), Decimal("0"))
+        assert Decimal(ledger.get_account(address)["balance"]) == unspent == ledger.get_balance(address)
+
+
+# ==================== transfer_batch ====================
+
+def test_transfer_batch_deduplicates_events(ledger):
+    ledger.create_account(ALICE, Decimal(100))
+
+    result = ledger.transfer_batch([
+        _event(ALICE, BOB, 10, "0xAA", 0),
+        _event(ALICE, BOB, 10, "0xaa", 0),   # aynı event (tx_hash büyük/küçük harf)
+        _event(ALICE, CAROL, 5, "0xaa", 1),
+        {"sender_address": ALICE, "receiver_address": BOB, "amount": "abc"},
+    ], checkpoint={"event_listener_block": 7})
+
+    assert (result["succeeded"], result["duplicates"], result["failed"]) == (2, 1, 1)
+    first, duplicate, third, invalid = result["results"]
+    assert duplicate["status"] == "duplicate"
+    assert duplicate["tx_id"] == first["tx_id"]
+    assert third["tx_id"] == first["tx_id"] + 1
+    assert invalid["error"] == "invalid amount"
+    assert ledger.get_metadata("event_listener_block") == 7
+    assert ledger.get_balance(BOB) == Decimal(10)
+
+    # Aynı blokların tekrar işlenmesi (restart/replay) bakiyeleri değiştirmez
+    replay = ledger.transfer_batch(
+        [_event(ALICE, BOB, 10, "0xaa", 0), _event(ALICE, CAROL, 5, "0xaa", 1)],
+        checkpoint={"event_listener_block": 8}
+    )
+    assert (replay["succeeded"], replay["duplicates"]) == (0, 2)
+    assert [r["tx_id"] for r in replay["results"]] == [first["tx_id"], third["tx_id"]]
+    assert ledger.get_metadata("event_listener_block") == 8
+    assert ledger.get_balance(ALICE) == Decimal(85)
+    _assert_balances_match_utxos(ledger, ALICE, BOB, CAROL)
+
+
+def test_transfer_batch_checkpoint_without_transfers(ledger):
+    cursor = ledger.get_change_cursor()
+    result = ledger.transfer_batch([], checkpoint={"event_listener_block": 3})
+
+    assert result["status"] == "failed"
+    assert ledger.get_metadata("event_listener_block") == 3
+    changes = ledger.get_changes(cursor)["changes"]
+    assert [op[0] for op in changes[-1]["ops"]] == ["meta"]
+
+
+def test_transfer_batch_survives_reopen(ledger, reopen):
+    ledger.create_account(ALICE, Decimal(100))
+    ledger.transfer_batch([_event(ALICE, BOB, 10, "0xbb")], checkpoint={"event_listener_block": 11})
+
+    reopen()
+    assert ledger.get_metadata("event_listener_block") == 11
+    replay = ledger.transfer_batch([_event(ALICE, BOB, 10, "0xbb")])
+    assert replay["duplicates"] == 1
+    assert ledger.get_balance(BOB) == Decimal(10)
+
+
+# ==================== revert_events ====================
+
+def test_revert_events_restores_balances(ledger):
+    ledger.create_account(ALICE, Decimal(100))
+    applied = ledger.transfer_batch([_event(ALICE, BOB, 30, "0xcc")])["results"][0]
+
+    result = ledger.revert_events([("0xcc", 0), ("0xmissing", 0)], checkpoint={"event_listener_block": 4})
+
+    assert (result["status"], result["reverted"], result["failed"]) == ("success", 1, 0)
+    reverse = result["results"][0]
+    assert reverse["reverts"] == applied["tx_id"]
+    assert ledger.get_transaction(applied["tx_id"])["status"] == "reverted"
+    assert ledger.get_transaction(reverse["tx_id"])["reverts"] == applied["tx_id"]
+    assert ledger.get_balance(ALICE) == Decimal(100)
+    assert ledger.get_balance(BOB) == Decimal(0)
+    assert ledger.get_metadata("event_listener_block") == 4
+
+    # Event yeni zincirde tekrar görülürse yeniden uygulanır
+    again = ledger.transfer_batch([_event(ALICE, BOB, 30, "0xcc")])
+    assert again["succeeded"] == 1
+    assert again["results"][0]["tx_id"] != applied["tx_id"]
+    _assert_balances_match_utxos(ledger, ALICE, BOB)
+
+
+def test_revert_events_marks_revert_failed(ledger, reopen):
+    ledger.create_account(ALICE, Decimal(100))
+    applied = ledger.transfer_batch([
+        _event(ALICE, BOB, 30, "0xdd", 0),
+        _event(ALICE, BOB, 5, "0xdd", 1),
+    ])["results"]
+    # Alıcı ilk transferin tutarını harcadı: son uygulanan (5) geri alınır, ilki (30) alınamaz
+    ledger.transfer(BOB, CAROL, Decimal(30))
+
+    result = ledger.revert_events([("0xdd", 0), ("0xdd", 1)])
+
+    assert (result["status"], result["reverted"], result["failed"]) == ("partial", 1, 1)
+    failed = ledger.get_transaction(applied[0]["tx_id"])
+    assert failed["status"] == "revert_failed"
+    assert failed["revert_error"] == "insufficient balance"
+    assert failed["revert_failed_at"]
+    assert ledger.get_transaction(applied[1]["tx_id"])["status"] == "reverted"
+
+    assert ledger.get_stats()["revert_failed"] == 1
+    assert [tx["tx_id"] for tx in ledger.get_revert_failed_transactions()] == [applied[0]["tx_id"]]
+    _assert_balances_match_utxos(ledger, ALICE, BOB, CAROL)
+
+    reopen()
+    assert ledger.get_stats()["revert_failed"] == 1
+
+    # Bakiye geri gelince tekrar denenen geri alma başarılı olur ve kayıt listeden çıkar
+    ledger.transfer(CAROL, BOB, Decimal(30))
+    retry = ledger.revert_events([("0xdd", 0)])
+    assert retry["reverted"] == 1
+    assert ledger.get_transaction(applied[0]["tx_id"])["status"] == "reverted"
+    assert ledger.get_stats()["revert_failed"] == 0
+    assert ledger.get_revert_failed_transactions() == []
+
+
+# ==================== Coin selection ====================
+
+def _outputs(*amounts):
+    return [{"utxo_id": f"u{i}", "amount": str(amount)} for i, amount in enumerate(amounts)]
+
+
+def test_select_coins_prefers_smallest_single_output():
+    selected = _select_coins(_outputs(5, 50, 20, 30), Decimal(20))
+    assert [u["utxo_id"] for u in selected] == ["u2"]
+
+    selected = _select_coins(_outputs(5, 50, 20, 30), Decimal(25))
+    assert [u["utxo_id"] for u in selected] == ["u3"]
+
+
+def test_select_coins_combines_largest_first():
+    selected = _select_coins(_outputs(5, 10, 20), Decimal(28))
+    assert [u["utxo_id"] for u in selected] == ["u2", "u1"]
+
+    assert _select_coins(_outputs(5, 10), Decimal(16)) is None
+    assert _select_coins([], Decimal(1)) is None
+
+
+def test_transfer_creates_change_output(ledger):
+    ledger.create_account(ALICE, Decimal(100))
+    mint_utxo = ledger.get_unspent_utxos(ALICE)[0]
+
+    result = ledger.transfer(ALICE, BOB, Decimal(30))
+
+    assert result["inputs"] == [mint_utxo["utxo_id"]]
+    tx = ledger.get_transaction(result["tx_id"])
+    assert tx["change_utxo_id"] == result["change_utxo_id"]
+
+    unspent = {u["utxo_id"]: u for u in ledger.get_unspent_utxos(ALICE)}
+    assert list(unspent) == [result["change_utxo_id"]]
+    change = unspent[result["change_utxo_id"]]
+    assert (change["type"], change["amount"], change["tx_id"]) == ("change", "70", result["tx_id"])
+
+    [output] = ledger.get_unspent_utxos(BOB)
+    assert output["utxo_id"] == result["utxo_id"]
+    assert output["amount"] == "30"
+
+    spent = next(u for u in ledger.get_utxos_by_address(ALICE) if u["utxo_id"] == mint_utxo["utxo_id"])
+    assert (spent["status"], spent["spent_by_tx"]) == ("spent", result["tx_id"])
+    _assert_balances_match_utxos(ledger, ALICE, BOB)
+
+
+def test_transfer_exact_amount_has_no_change(ledger):
+    ledger.create_account(ALICE, Decimal(0))
+    ledger.mint(ALICE, Decimal(10))
+    ledger.mint(ALICE, Decimal(40))
+
+    result = ledger.transfer(ALICE, BOB, Decimal(40))
+
+    assert len(result["inputs"]) == 1
+    assert result["change_utxo_id"] is None
+    assert [u["amount"] for u in ledger.get_unspent_utxos(ALICE)] == ["10"]
+
+
+def test_transfer_spends_multiple_inputs(ledger):
+    ledger.create_account(ALICE, Decimal(0))
+    for amount in (5, 10, 20):
+        ledger.mint(ALICE, Decimal(amount))
+
+    result = ledger.transfer(ALICE, BOB, Decimal(28))
+
+    # 20 + 10 harcanır, 5 dokunulmaz, 2 para üstü
+    assert len(result["inputs"]) == 2
+    unspent = {u["utxo_id"]: u for u in ledger.get_unspent_utxos(ALICE)}
+    assert sorted(u["amount"] for u in unspent.values()) == ["2", "5"]
+    assert unspent[result["change_utxo_id"]]["amount"] == "2"
+    assert ledger.get_balance(ALICE) == Decimal(7)
+    _assert_balances_match_utxos(ledger, ALICE, BOB)
+
+
+def test_transfer_insufficient_balance(ledger):
+    ledger.create_account(ALICE, Decimal(10))
+
+    result = ledger.transfer(ALICE, BOB, Decimal(11))
+
+    assert result["error"] == "insufficient balance"
+    assert result["available"] == "10"
+    assert ledger.get_account(BOB) is None
+    assert ledger.get_balance(ALICE) == Decimal(10)
+
+
+# ==================== Change feed ====================
+
+def test_change_feed_cursor(ledger):
+    ledger.create_account(ALICE, Decimal(100))
+    cursor = ledger.get_change_cursor()
+
+    first = ledger.transfer(ALICE, BOB, Decimal(1))
+    ledger.transfer(ALICE, BOB, Decimal(2))
+
+    page = ledger.get_changes(cursor, limit=1)
+    assert len(page["changes"]) == 1
+    assert page["cursor"] == cursor + 1
+    assert not page["truncated"]
+    txs = [op[1] for op in page["changes"][0]["ops"] if op[0] == "tx"]
+    assert [tx["tx_id"] for tx in txs] == [first["tx_id"]]
+
+    rest = ledger.get_changes(page["cursor"])
+    assert [c["seq"] for c in rest["changes"]] == [cursor + 2]
+    assert rest["cursor"] == ledger.get_change_cursor()
+
+    empty = ledger.get_changes(rest["cursor"])
+    assert empty == {"cursor": rest["cursor"], "changes": [], "truncated": False}
+
+
+def test_change_feed_wakes_waiting_reader(ledger):
+    ledger.create_account(ALICE, Decimal(100))
+    cursor = ledger.get_change_cursor()
+
+    timer = threading.Timer(0.1, ledger.transfer, args=(ALICE, BOB, Decimal(1)))
+    timer.start()
+    started = time.monotonic()
+    result = ledger.get_changes(cursor, timeout=5)
+    timer.join()
+
+    assert len(result["changes"]) == 1
+    assert time.monotonic() - started < 2
+
+
+def test_change_feed_truncation(monkeypatch, ledger):
+    monkeypatch.setattr(storage, "_change_feed", storage._ChangeFeed(3))
+    ledger.create_account(ALICE, Decimal(100))
+    cursor = ledger.get_change_cursor()
+
+    for _ in range(5):
+        ledger.transfer(ALICE, BOB, Decimal(1))
+
+    result = ledger.get_changes(cursor)
+    assert result["truncated"]
+    assert [c["seq"] for c in result["changes"]] == [cursor + 3, cursor + 4, cursor + 5]
+
+    # Akışta kalan aralıktan okuyan tüketici kayıp görmez
+    result = ledger.get_changes(cursor + 2)
+    assert not result["truncated"]
+    assert len(result["changes"]) == 3
+
+
+def test_change_feed_marks_reload(ledger):
+    ledger.create_account(ALICE, Decimal(100))
+    cursor = ledger.get_change_cursor()
+
+    ledger.reset_ledger()
+
+    [change] = ledger.get_changes(cursor)["changes"]
+    assert change["reload"] is True